@@ -0,0 +1,166 @@
+import time
+import asyncio
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from autogen_core import CancellationToken
+
+
+class AgentPool:
+    """
+    Bounded pool of interchangeable agents built by one factory.
+
+    acquire() hands an agent to exactly one request at a time: an idle agent
+    when there is one, otherwise a new one from the factory. At most
+    `max_size` agents are in use at once on an event loop; further requests
+    wait for a release. Released agents are reset (model context cleared)
+    before they are handed out again, so no conversation leaks between
+    requests. Agents that fail to reset are dropped. Factories should reuse
+    a shared model client rather than build one per agent.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 8):
+        self.factory = factory
+        self.max_size = max_size
+        self._idle: List[Any] = []
+        # asyncio primitives belong to one event loop
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self.stats = {"created": 0, "reused": 0, "waits": 0, "discarded": 0}
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_size)
+        return slots
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Check out an agent for the duration of the block"""
+        slots = self._loop_slots()
+        if slots.locked():
+            self.stats["waits"] += 1
+        async with slots:
+            if self._idle:
+                agent = self._idle.pop()
+                self.stats["reused"] += 1
+            else:
+                agent = self.factory()
+                self.stats["created"] += 1
+            try:
+                yield agent
+            finally:
+                await self._release(agent)
+
+    async def _release(self, agent: Any) -> None:
+        try:
+            await agent.on_reset(CancellationToken())
+        except Exception as e:
+            self.stats["discarded"] += 1
+            print(f"⚠️ Warning: dropping {getattr(agent, 'name', 'agent')} after failed reset: {e}")
+            return
+        if len(self._idle) < self.max_size:
+            self._idle.append(agent)
+
+    def clear(self) -> None:
+        """Drop idle agents, e.g. after the model client was replaced"""
+        self._idle.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "idle": len(self._idle), "max_size": self.max_size}
+
+
+class _SessionEntry:
+    def __init__(self, agent: Any):
+        self.agent = agent
+        self.last_used = time.monotonic()
+        self.active = 0
+        self.lock = asyncio.Lock()
+
+
+class SessionAgents:
+    """
+    One agent per chat session, created on first use and dropped when idle.
+
+    session() checks out the session's agent for one streamed turn. Turns of
+    the same session run one at a time, so their messages never interleave
+    in the agent's context; at most `max_concurrent` turns run at once over
+    all sessions (per event loop), the rest wait. Sessions idle for longer
+    than `idle_timeout` seconds are evicted whenever a session is accessed,
+    and beyond `max_sessions` the least recently used idle session goes.
+    Without a session id the turn gets a fresh agent that is not kept.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_concurrent: int = 16,
+                 idle_timeout: float = 1800, max_sessions: int = 1000):
+        self.factory = factory
+        self.max_concurrent = max_concurrent
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self.stats = {"created": 0, "evicted": 0, "closed": 0, "turns": 0, "waits": 0}
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_concurrent)
+        return slots
+
+    def evict_idle(self, keep: Optional[str] = None) -> int:
+        """
+        Drop sessions idle past the timeout, then the oldest idle ones beyond max_sessions.
+
+        `keep` is a session about to be used: it is never evicted and counts
+        toward max_sessions even if it does not exist yet.
+        """
+        now = time.monotonic()
+        idle = [sid for sid, entry in self._sessions.items() if not entry.active and sid != keep]
+        evict = [sid for sid in idle if now - self._sessions[sid].last_used > self.idle_timeout]
+        incoming = 1 if keep is not None and keep not in self._sessions else 0
+        overflow = len(self._sessions) + incoming - len(evict) - self.max_sessions
+        if overflow > 0:
+            evict += [sid for sid in idle if sid not in evict][:overflow]
+        for sid in evict:
+            del self._sessions[sid]
+        self.stats["evicted"] += len(evict)
+        return len(evict)
+
+    def _entry(self, session_id: Optional[str]) -> _SessionEntry:
+        if session_id is None:
+            self.stats["created"] += 1
+            return _SessionEntry(self.factory())
+        self.evict_idle(keep=session_id)
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = _SessionEntry(self.factory())
+            self.stats["created"] += 1
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    @asynccontextmanager
+    async def session(self, session_id: Optional[str]) -> AsyncIterator[Any]:
+        """The session's agent for one turn, under the global concurrency limit"""
+        entry = self._entry(session_id)
+        entry.active += 1
+        try:
+            slots = self._loop_slots()
+            if slots.locked():
+                self.stats["waits"] += 1
+            async with entry.lock, slots:
+                self.stats["turns"] += 1
+                yield entry.agent
+        finally:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+    def close(self, session_id: str) -> None:
+        """Forget a session whose chat has ended"""
+        if self._sessions.pop(session_id, None) is not None:
+            self.stats["closed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "sessions": len(self._sessions), "max_concurrent": self.max_concurrent}
@@ -36,6 +36,13 @@ class EmbeddingsManager:
             )
         return cls._embeddings
 
+    @classmethod
+    def get_sentence_transformer(cls):
+        """Return the SentenceTransformer behind the shared embeddings, for direct batched encoding"""
+        embeddings = cls.get_embeddings()
+        # Newer langchain_huggingface versions keep the model in a private attribute
+        return getattr(embeddings, '_client', None) or embeddings.client
+
 class DocumentQAAgent:
     def __init__(self):
         # Model client
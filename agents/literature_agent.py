@@ -1,5 +1,6 @@
 import os
-from typing import AsyncGenerator
+import asyncio
+from typing import AsyncGenerator, List
 from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
 from autogen_agentchat.agents import AssistantAgent
@@ -8,9 +9,11 @@ from autogen_core.models import UserMessage
 from autogen_ext.models.azure import AzureAIChatCompletionClient
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from azure.core.credentials import AzureKeyCredential
-from autogen_core.tools import FunctionTool
+from autogen_core.tools import BaseTool, FunctionTool
 from autogen_core import CancellationToken
-from tools.arxiv_search_tool import query_arxiv, query_web
+from autogen_core.model_context import BufferedChatCompletionContext
+from agents.agent_pool import SessionAgents
+from tools.arxiv_search_tool import query_arxiv_async, query_web_async
 from prompts.prompt_template import LITERATURE_AGENT_PROMPT
 
 load_dotenv()
@@ -49,22 +52,98 @@ client = AzureAIChatCompletionClient(
 #         "family": "unknown",
 #     },
 # )
-# Wrap arxiv/web search tools
-arxiv_tool = FunctionTool(query_arxiv, description="Searches arXiv for research papers.")
-web_tool = FunctionTool(query_web, description="Searches the web for relevant academic content.")
+# Wrap arxiv/web search tools (async, so tool calls do not block the event loop)
+arxiv_tool = FunctionTool(query_arxiv_async, name="query_arxiv", description="Searches arXiv for research papers.")
+web_tool = FunctionTool(query_web_async, name="query_web", description="Searches the web for relevant academic content.")
+
+# Tool calls requested in one assistant turn already run concurrently (the agent gathers
+# them, in call order; sync functions go to the default thread pool). Each agent runs at
+# most TOOL_CALLS_PER_TURN of them at a time.
+TOOL_CALLS_PER_TURN = int(os.getenv("TOOL_CALLS_PER_TURN", "4"))
+
+class ConcurrencyLimitedTool(BaseTool):
+    """A tool whose calls wait for a slot of a semaphore shared with other tools"""
+
+    def __init__(self, tool: BaseTool, semaphore: asyncio.Semaphore):
+        super().__init__(tool.args_type(), tool.return_type(), tool.name, tool.description)
+        self._tool = tool
+        self._semaphore = semaphore
+
+    async def run(self, args, cancellation_token: CancellationToken):
+        async with self._semaphore:
+            return await self._tool.run(args, cancellation_token)
+
+def limit_tool_concurrency(tools: List[BaseTool], limit: int = TOOL_CALLS_PER_TURN) -> List[BaseTool]:
+    """The tools for one agent, sharing a limit on concurrent calls; its turns run one at a time, so this bounds a turn"""
+    semaphore = asyncio.Semaphore(limit)
+    return [ConcurrencyLimitedTool(tool, semaphore) for tool in tools]
+
+# One agent per chat session, dropped after LITERATURE_SESSION_IDLE_SECONDS without use;
+# at most LITERATURE_MAX_CONCURRENT_STREAMS turns stream from the model at once
+LITERATURE_MAX_CONCURRENT_STREAMS = int(os.getenv("LITERATURE_MAX_CONCURRENT_STREAMS", "16"))
+LITERATURE_SESSION_IDLE_SECONDS = float(os.getenv("LITERATURE_SESSION_IDLE_SECONDS", "1800"))
+LITERATURE_MAX_SESSIONS = int(os.getenv("LITERATURE_MAX_SESSIONS", "1000"))
+# Messages of a session's conversation kept in the model context
+LITERATURE_CONTEXT_MESSAGES = int(os.getenv("LITERATURE_CONTEXT_MESSAGES", "20"))
+
+class RecentMessagesContext(BufferedChatCompletionContext):
+    """Model context that keeps only the last `buffer_size` messages, in memory as well as in requests"""
+
+    def __init__(self, buffer_size: int, initial_messages=None):
+        super().__init__(buffer_size, initial_messages)
+        self.max_messages = buffer_size
+        self.stored = len(initial_messages or [])
+
+    async def add_message(self, message) -> None:
+        await super().add_message(message)
+        self.stored += 1
+        if self.stored > self.max_messages:
+            # get_messages returns the recent window the model sees; keep only that
+            recent = await self.get_messages()
+            await self.clear()
+            for kept in recent:
+                await super().add_message(kept)
+            self.stored = len(recent)
+
+    async def clear(self) -> None:
+        await super().clear()
+        self.stored = 0
+
+    async def load_state(self, state) -> None:
+        await super().load_state(state)
+        self.stored = len(state.get("messages", []))
 
 # Define agent
-literature_assistant = AssistantAgent(
-    name="LiteratureCollectionAgent",
-    model_client=client,
-    tools=[arxiv_tool, web_tool],
-    system_message=LITERATURE_AGENT_PROMPT,
-    reflect_on_tool_use=True,
-    model_client_stream=True
+def create_literature_agent():
+    return AssistantAgent(
+        name="LiteratureCollectionAgent",
+        model_client=client,
+        tools=limit_tool_concurrency([arxiv_tool, web_tool]),
+        system_message=LITERATURE_AGENT_PROMPT,
+        reflect_on_tool_use=True,
+        model_client_stream=True,
+        model_context=RecentMessagesContext(buffer_size=LITERATURE_CONTEXT_MESSAGES)
+    )
+
+literature_sessions = SessionAgents(
+    create_literature_agent,
+    max_concurrent=LITERATURE_MAX_CONCURRENT_STREAMS,
+    idle_timeout=LITERATURE_SESSION_IDLE_SECONDS,
+    max_sessions=LITERATURE_MAX_SESSIONS
 )
 
+def close_literature_session(session_id: str) -> None:
+    """Drop a session's agent when its chat ends"""
+    literature_sessions.close(session_id)
+
 # Async runner wrapper with proper token streaming
-async def run_literature_agent_stream(user_input: str) -> AsyncGenerator[str, None]:
+async def run_literature_agent_stream(user_input: str, session_id: str = None) -> AsyncGenerator[str, None]:
+    """Stream one turn of the session's literature agent; without session_id the turn has no history"""
+    async with literature_sessions.session(session_id) as literature_assistant:
+        async for token in _stream_literature_turn(literature_assistant, user_input):
+            yield token
+
+async def _stream_literature_turn(literature_assistant, user_input: str) -> AsyncGenerator[str, None]:
     stream = literature_assistant.on_messages_stream(
         [TextMessage(content=user_input, source="user")],
         cancellation_token=CancellationToken()
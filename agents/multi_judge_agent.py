@@ -1,14 +1,21 @@
 import os
 import json
+import time
 import asyncio
 from typing import AsyncGenerator
 from dotenv import load_dotenv
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import TextMessage, ToolCallRequestEvent
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from autogen_ext.models.azure import AzureAIChatCompletionClient
 from azure.core.credentials import AzureKeyCredential
 from autogen_core import CancellationToken
+from agents.agent_pool import AgentPool
+from agents.literature_agent import arxiv_tool, web_tool, limit_tool_concurrency
+from tools.candidate_pool import build_candidate_pool, format_candidate_pool
+from tools.rank_fusion import fuse_judge_outputs, format_fused_papers, parse_judge_output, rank_candidates_by_retrieval
+from tools.semantic_cache import SemanticCache, replay_chunks
 import json
 
 load_dotenv()
@@ -48,12 +55,58 @@ client = AzureAIChatCompletionClient(
 #     },
 # )
 
+# "shared_pool": retrieve one candidate pool, judges only score it (one LLM call each)
+# "independent": every judge runs its own tool-driven retrieval
+MULTI_JUDGE_MODES = ("shared_pool", "independent")
+MULTI_JUDGE_MODE = os.getenv("MULTI_JUDGE_MODE", "shared_pool")
+
+# Judge outputs are fused deterministically ("rrf", "borda" or "weighted"); only the
+# top-k papers go to the Final Judge, which writes them up without re-ranking
+JUDGE_FUSION_METHOD = os.getenv("JUDGE_FUSION_METHOD", "rrf")
+JUDGE_FUSION_TOP_K = int(os.getenv("JUDGE_FUSION_TOP_K", "5"))
+JUDGE_FUSION_WEIGHTS = {"Judge_Relevance": 1.0, "Judge_Impact": 1.0, "Judge_Novelty": 1.0}
+
+# Seconds a request may spend before the Final Judge starts (candidate retrieval plus
+# judges); judges still running then are cancelled and the finished ones aggregated
+JUDGE_DEADLINE_SECONDS = float(os.getenv("JUDGE_DEADLINE_SECONDS", "60"))
+# Part of the deadline candidate retrieval may use in "shared_pool" mode
+CANDIDATE_POOL_TIMEOUT_SECONDS = float(os.getenv("CANDIDATE_POOL_TIMEOUT_SECONDS", "20"))
+
+# Agents per judge (and Final Judge) that may serve requests at the same time
+JUDGE_POOL_SIZE = int(os.getenv("JUDGE_POOL_SIZE", "8"))
+
+# Final answers cached by query embedding: a similar enough query replays the stored answer
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+# The file (SEMANTIC_CACHE_PATH, default ./semantic_cache.sqlite3) is resolved on first use
+semantic_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "500")),
+)
+
+def get_semantic_cache_stats():
+    """Hit rate and LLM tokens saved by the recommendation cache"""
+    return semantic_cache.get_stats()
+
+def _usage_tokens(messages) -> int:
+    """Prompt plus completion tokens reported for the model calls behind these messages"""
+    return sum(m.models_usage.prompt_tokens + m.models_usage.completion_tokens
+               for m in messages if getattr(m, "models_usage", None))
+
 # === Judge Agent Factory ===
-def create_judge_agent(name, model_client, dimension_prompt):
+def create_judge_agent(name, model_client, dimension_prompt, use_tools=True):
+    if not use_tools:
+        # Scoring a given pool: a single model call, no tool round or reflection turn
+        return AssistantAgent(
+            name=name,
+            model_client=model_client,
+            system_message=dimension_prompt
+        )
     return AssistantAgent(
         name=name,
         model_client=model_client,
         system_message=dimension_prompt,
+        tools=limit_tool_concurrency([arxiv_tool, web_tool]),
         reflect_on_tool_use=True
     )
 
@@ -94,6 +147,35 @@ Step 2: Score each paper (1–10) based on innovation, and provide a one-line ex
 Return only a valid JSON list (no explanation, no markdown block).
 """
 
+# === Scoring prompts for the shared candidate pool
+_pool_scoring_instructions = """
+You are given the user's query and a pool of candidate papers, each with an id like [P3].
+Do not search for other papers.
+
+Return only a valid JSON list with one object per candidate you consider worth recommending,
+e.g. [{"id": "P3", "score": 8, "reason": "..."}] (no explanation, no markdown block).
+"""
+
+judge_relevance_scoring_prompt = """
+You are a semantic relevance expert.
+
+Score each candidate paper on its semantic relevancy to the user's query (1–10), and explain briefly.
+""" + _pool_scoring_instructions
+
+judge_impact_scoring_prompt = """
+You are a scientific impact expert.
+
+Score each candidate paper on its scientific impact (1–10): how highly cited, influential,
+or reputable (venue, authors) it is. Explain briefly.
+""" + _pool_scoring_instructions
+
+judge_novelty_scoring_prompt = """
+You are a novelty and originality expert.
+
+Score each candidate paper (1–10) based on innovation: new ideas, novel methods, or unique
+perspectives. Provide a one-line explanation.
+""" + _pool_scoring_instructions
+
 # === Final Judge Prompt
 final_judge_prompt = """
 You are the final evaluator.
@@ -118,140 +200,320 @@ Please follow this output format:
 2. A concluding summary paragraph that synthesizes the overall recommendation set—what kinds of papers are included, what trends or strengths are evident, and why they are suited to the user's query.
 """
 
-# === Final Judge
-final_judge = AssistantAgent(
-    name="Final_Judge",
-    model_client=client,
-    system_message=final_judge_prompt,
-    model_client_stream=True
+# === Agent pools
+# Each request checks out its own judges and Final Judge, reset on release; all share `client`
+JUDGES = (
+    # name, scoring prompt ("shared_pool"), retrieval prompt ("independent")
+    ("Judge_Relevance", judge_relevance_scoring_prompt, judge_relevance_prompt),
+    ("Judge_Impact", judge_impact_scoring_prompt, judge_impact_prompt),
+    ("Judge_Novelty", judge_novelty_scoring_prompt, judge_novelty_prompt),
+)
+
+judge_pools = {}
+for _name, _scoring_prompt, _retrieval_prompt in JUDGES:
+    judge_pools[(_name, "shared_pool")] = AgentPool(
+        lambda name=_name, prompt=_scoring_prompt: create_judge_agent(name, client, prompt, use_tools=False),
+        max_size=JUDGE_POOL_SIZE
+    )
+    judge_pools[(_name, "independent")] = AgentPool(
+        lambda name=_name, prompt=_retrieval_prompt: create_judge_agent(name, client, prompt),
+        max_size=JUDGE_POOL_SIZE
+    )
+
+final_judge_pool = AgentPool(
+    lambda: AssistantAgent(
+        name="Final_Judge",
+        model_client=client,
+        system_message=final_judge_prompt,
+        model_client_stream=True
+    ),
+    max_size=JUDGE_POOL_SIZE
 )
 
+def get_agent_pool_stats():
+    """Agents created, reused and waited for, per pool"""
+    stats = {f"{name}/{mode}": pool.get_stats() for (name, mode), pool in judge_pools.items()}
+    stats["Final_Judge"] = final_judge_pool.get_stats()
+    return stats
+
 
 # Async runner wrapper with proper token streaming
-async def run_multi_judge_agents(user_input: str) -> AsyncGenerator[str, None]:
+async def run_multi_judge_agents(user_input: str, mode: str = None, deadline: float = None,
+                                 use_cache: bool = True) -> AsyncGenerator[str, None]:
     """
     Run three Judge agents concurrently with real-time progress feedback,
     then aggregate their outputs via a Final Judge.
-    """
-    judge1 = create_judge_agent("Judge_Relevance", client, judge_relevance_prompt)
-    judge2 = create_judge_agent("Judge_Impact", client, judge_impact_prompt)
-    judge3 = create_judge_agent("Judge_Novelty", client, judge_novelty_prompt)
 
-    # Define judges
-    judge_agents = [judge1, judge2, judge3]
+    In "shared_pool" mode (default, see MULTI_JUDGE_MODE) the candidate papers are
+    retrieved and deduplicated once and the judges only score them; in "independent"
+    mode every judge retrieves its own papers with the search tools.
 
-    print("🚀 Starting concurrent evaluation by 3 Judge Agents...")
+    Judges get `deadline` seconds from the start of the request (default
+    JUDGE_DEADLINE_SECONDS), of which candidate retrieval may use at most
+    CANDIDATE_POOL_TIMEOUT_SECONDS. When it expires, the judges still running
+    are cancelled and only the finished ones are aggregated; with no judge
+    output, the pool's retrieval order is used, and without a pool the user
+    gets a timeout message.
 
-    async def invoke_judge(judge_agent):
-        print(f"🕒 {judge_agent.name} started evaluation...")
+    Complete answers are stored in the semantic cache; a later query similar
+    enough to a cached one gets the stored answer replayed as a stream.
+    """
+    mode = mode or MULTI_JUDGE_MODE
+    if mode not in MULTI_JUDGE_MODES:
+        raise ValueError(f"Unknown multi-judge mode: {mode}. Must be one of: {', '.join(MULTI_JUDGE_MODES)}")
+
+    cache = semantic_cache if use_cache and SEMANTIC_CACHE_ENABLED else None
+    embedding = None
+    if cache is not None:
+        embedding = await asyncio.to_thread(cache.embed, user_input)
+        hit = await asyncio.to_thread(cache.lookup, user_input, mode, embedding)
+        if hit is not None:
+            print(f"♻️ Semantic cache hit ({hit.similarity:.3f}) for: {hit.query} ({hit.tokens} LLM tokens saved)")
+            for chunk in replay_chunks(hit.answer):
+                yield chunk
+            return
+
+    run = {"tokens": 0, "answer": None, "complete": False}
+    async for token in _run_judges_and_final_judge(user_input, mode, deadline, run):
+        yield token
+
+    if cache is not None and embedding is not None and run["complete"] and run["answer"]:
+        # Answers missing a judge (deadline, failure) are not cached
+        await asyncio.to_thread(cache.store, user_input, run["answer"], run["tokens"], mode, embedding)
+
+
+async def _run_judges_and_final_judge(user_input: str, mode: str, deadline: float, run: dict) -> AsyncGenerator[str, None]:
+    """The multi-judge pipeline; records LLM tokens, the final answer and whether every judge contributed in `run`"""
+    deadline = JUDGE_DEADLINE_SECONDS if deadline is None else deadline
+    start_time = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+
+    if mode == "shared_pool":
+        yield "📚 **Collecting candidate papers...**\n\n"
         try:
-            response = await judge_agent.on_messages(
-                [TextMessage(content=user_input, source="user")],
-                cancellation_token=CancellationToken()
-            )
-            print(f"✅ {judge_agent.name} finished evaluation.")
-            return response.chat_message.content
+            pool = await asyncio.wait_for(build_candidate_pool(user_input),
+                                          timeout=min(CANDIDATE_POOL_TIMEOUT_SECONDS, deadline))
+        except asyncio.TimeoutError:
+            print(f"⌛ Candidate retrieval exceeded {min(CANDIDATE_POOL_TIMEOUT_SECONDS, deadline):g}s")
+            yield "⌛ **Searching for candidate papers took too long.** Please try again in a moment.\n"
+            return
+        judge_input = f"User query: {user_input}\n\nCandidate papers:\n{format_candidate_pool(pool)}"
+    else:
+        pool = None
+        judge_input = user_input
+    judge_names = [name for name, _, _ in JUDGES]
+
+    print(f"🚀 Starting concurrent evaluation by 3 Judge Agents (deadline {deadline:g}s)...")
+    yield f"⚖️ **Evaluating with {len(judge_names)} judges...**\n\n"
+
+    async def invoke_judge(name, cancellation_token):
+        try:
+            async with judge_pools[(name, mode)].acquire() as judge_agent:
+                print(f"🕒 {name} started evaluation...")
+                response = await judge_agent.on_messages(
+                    [TextMessage(content=judge_input, source="user")],
+                    cancellation_token=cancellation_token
+                )
+            # One model call per tool-call request, plus the one that produced the final message
+            llm_calls = 1 + sum(isinstance(m, ToolCallRequestEvent) for m in response.inner_messages or [])
+            run["tokens"] += _usage_tokens([*(response.inner_messages or []), response.chat_message])
+            print(f"✅ {name} finished evaluation ({llm_calls} LLM calls).")
+            return response.chat_message.content, llm_calls
         except Exception as e:
-            print(f"❌ {judge_agent.name} failed: {e}")
-            return None
-
-    # Run all judge agents concurrently
-    judge_outputs_list = await asyncio.gather(*(invoke_judge(j) for j in judge_agents))
+            print(f"❌ {name} failed: {e}")
+            return None, 0
+
+    # Run all judge agents concurrently, each with its own cancellation token
+    cancellation_tokens = {name: CancellationToken() for name in judge_names}
+    tasks = {
+        asyncio.create_task(invoke_judge(name, cancellation_tokens[name])): name
+        for name in judge_names
+    }
+    pending = set(tasks)
+    judge_results = {}
+    try:
+        while pending:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                output, llm_calls = judge_results[name] = task.result()
+                elapsed = time.perf_counter() - start_time
+                if output:
+                    yield f"✅ **{name}** finished ({elapsed:.1f}s)\n\n"
+                else:
+                    yield f"❌ **{name}** failed ({elapsed:.1f}s)\n\n"
+    finally:
+        # Deadline passed (or the consumer went away): stop the judges still running
+        for task in pending:
+            cancellation_tokens[tasks[task]].cancel()
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if pending:
+        late = ", ".join(sorted(tasks[task] for task in pending))
+        print(f"⌛ Judge deadline of {deadline:g}s reached; cancelled: {late}")
+        yield f"⌛ **Deadline reached**, continuing without: {late}\n\n"
 
     # Check and map judge outputs
     judge_outputs = {}
-    for judge, output in zip(judge_agents, judge_outputs_list):
+    for name in judge_names:
+        output, _ = judge_results.get(name, (None, 0))
         if output:
-            judge_outputs[judge.name] = output
-        else:
-            print(f"⚠️ Warning: {judge.name} returned no output.")
-
-    # Prepare JSON input for final judge
-    final_input = json.dumps(judge_outputs, indent=2)
+            judge_outputs[name] = output
+        elif name in judge_results:
+            print(f"⚠️ Warning: {name} returned no output.")
+
+    judge_llm_calls = sum(calls for _, calls in judge_results.values())
+    print(f"📊 Judges ({mode}): {judge_llm_calls} LLM calls in {time.perf_counter() - start_time:.1f}s")
+
+    fused = fuse_judge_outputs(judge_outputs, method=JUDGE_FUSION_METHOD, top_k=JUDGE_FUSION_TOP_K,
+                               weights=JUDGE_FUSION_WEIGHTS, candidates=pool)
+    # Only an answer built from every judge's scores is worth caching
+    run["complete"] = bool(fused) and all(
+        name in judge_outputs and parse_judge_output(judge_outputs[name], pool) for name in judge_names
+    )
+    if not judge_outputs:
+        if not pool:
+            # Nothing to aggregate: no judge output and no candidates to fall back on
+            print("⚠️ Warning: no judge output before the deadline and no candidate pool; giving up.")
+            yield "⌛ **No recommendations could be prepared in time.** Please try again in a moment.\n"
+            return
+        # No judge finished in time: fall back to the pool's retrieval order
+        print("⚠️ Warning: no judge output before the deadline; ranking candidates by retrieval order.")
+        fused = rank_candidates_by_retrieval(pool, top_k=JUDGE_FUSION_TOP_K)
 
     print("🎯 Aggregating all evaluations with Final Judge...")
 
+    if fused:
+        # Ranking is already decided: the Final Judge only writes it up
+        aggregation_prompt = (
+            f"User query: {user_input}\n\n"
+            + (f"Expert judges scored candidate papers on semantic relevance, impact and novelty; "
+               f"their scores were fused into the ranking below (top {len(fused)}).\n\n"
+               if judge_outputs else
+               f"The papers below are the top {len(fused)} search results for the query, in ranked order.\n\n")
+            + 
+            "Your task is to:\n"
+            "1. Present the papers in exactly this order. For each paper, provide:\n"
+            "   - Title\n"
+            "   - Abstract (a concise version of the one given)\n"
+            "   - Link (if available)\n"
+            "2. Write a final summary paragraph describing the selection trends and why these papers are particularly suited to the user's needs.\n\n"
+            "DO NOT include scores, judge names, internal calculations, or tool usage logs.\n"
+            "ONLY include the final output.\n\n"
+            f"Ranked papers:\n{format_fused_papers(fused)}"
+        )
+    else:
+        # No judge output could be parsed: let the Final Judge rank the raw evaluations
+        print("⚠️ Warning: judge outputs could not be parsed; sending raw evaluations to the Final Judge.")
+        if pool is not None:
+            # Judges refer to papers by id; the final judge needs the papers themselves
+            final_input = json.dumps({
+                "candidates": [candidate.to_dict() for candidate in pool],
+                "evaluations": judge_outputs
+            }, indent=2)
+        else:
+            final_input = json.dumps(judge_outputs, indent=2)
+
         # Create aggregation prompt for Final Judge (no JSON parsing)
-    aggregation_prompt = (
-        "You are the final judge aggregating independent evaluations from three judge agents.\n\n"
-        f"User query: {user_input}\n\n"
-        "Each judge has independently reviewed a set of papers based on a specific dimension: semantic relevance, impact, or novelty.\n"
-        "Their outputs may include paper titles, abstracts, scores (1–10), and short reasons.\n\n"
-        "Your task is to:\n"
-        "1. Read the user's query carefully.\n"
-        "2. Read all three agents' evaluations.\n"
-        "3. Select and rank the top 5 papers across all outputs that best match the user's query.\n"
-        "4. For each selected paper, provide:\n"
-        "   - Title\n"
-        "   - Abstract\n"
-        "   - Link (if available)\n"
-        "5. Write a final summary paragraph describing the selection trends and why these papers are particularly suited to the user's needs.\n\n"
-        "DO NOT include any judge disagreements, internal calculations, or tool usage logs.\n"
-        "ONLY include the final output.\n\n"
-        f"Here is the input JSON containing the three judges' evaluations:\n{final_input}"
-    )
+        aggregation_prompt = (
+            "You are the final judge aggregating independent evaluations from three judge agents.\n\n"
+            f"User query: {user_input}\n\n"
+            "Each judge has independently reviewed a set of papers based on a specific dimension: semantic relevance, impact, or novelty.\n"
+            "Their outputs may include paper titles, abstracts, scores (1–10), and short reasons.\n\n"
+            "Your task is to:\n"
+            "1. Read the user's query carefully.\n"
+            "2. Read all three agents' evaluations.\n"
+            "3. Select and rank the top 5 papers across all outputs that best match the user's query.\n"
+            "4. For each selected paper, provide:\n"
+            "   - Title\n"
+            "   - Abstract\n"
+            "   - Link (if available)\n"
+            "5. Write a final summary paragraph describing the selection trends and why these papers are particularly suited to the user's needs.\n\n"
+            "DO NOT include any judge disagreements, internal calculations, or tool usage logs.\n"
+            "ONLY include the final output.\n\n"
+            + ("Here is the input JSON containing the candidate papers and the three judges' scores (by candidate id):\n"
+               if pool is not None else
+               "Here is the input JSON containing the three judges' evaluations:\n")
+            + final_input
+        )
+
+    raw_chars = sum(len(output) for output in judge_outputs.values())
+    print(f"📉 Aggregation prompt: {len(aggregation_prompt)} chars (raw judge outputs: {raw_chars} chars)")
 
     print("🏁 Invoking Final Judge...")
-    stream = final_judge.on_messages_stream(
-        [TextMessage(content=aggregation_prompt, source="user")],
-        cancellation_token=CancellationToken()
-    )
-
-    # Yield a loader indicator
-    yield "⏳ Thinking..."
+    # Checked out for the whole stream: no other request shares its model context
+    async with final_judge_pool.acquire() as final_judge:
+        stream = final_judge.on_messages_stream(
+            [TextMessage(content=aggregation_prompt, source="user")],
+            cancellation_token=CancellationToken()
+        )
+
+        # Yield a loader indicator
+        yield "⏳ Thinking..."
     
-    # Track the tools being used
-    announced_tools = set()  
-    result_shown = False
+        # Track the tools being used
+        announced_tools = set()  
+        result_shown = False
     
-    async for chunk_event in stream:
-        # If it's a string (direct content chunk)
-        if isinstance(chunk_event, str):
-            yield chunk_event
+        async for chunk_event in stream:
+            # Final response: the complete answer, not streamed again
+            if isinstance(chunk_event, Response):
+                run["answer"] = chunk_event.chat_message.content
+                run["tokens"] += _usage_tokens([*(chunk_event.inner_messages or []), chunk_event.chat_message])
+
+            # If it's a string (direct content chunk)
+            elif isinstance(chunk_event, str):
+                yield chunk_event
             
-        # If it has a content attribute
-        elif hasattr(chunk_event, 'content'):
-            # Check for tool calls
-            if isinstance(chunk_event.content, list):
-                for function_call in chunk_event.content:
-                    if hasattr(function_call, 'name'):
-                        tool_name = function_call.name
+            # If it has a content attribute
+            elif hasattr(chunk_event, 'content'):
+                # Check for tool calls
+                if isinstance(chunk_event.content, list):
+                    for function_call in chunk_event.content:
+                        if hasattr(function_call, 'name'):
+                            tool_name = function_call.name
                         
-                        # Only announce a tool if we haven't announced it yet
-                        if tool_name not in announced_tools:
-                            announced_tools.add(tool_name)
+                            # Only announce a tool if we haven't announced it yet
+                            if tool_name not in announced_tools:
+                                announced_tools.add(tool_name)
                             
-                            # Announce the tool being used
-                            yield f"\n\n🔍 **Using tool: {tool_name}**\n"
+                                # Announce the tool being used
+                                yield f"\n\n🔍 **Using tool: {tool_name}**\n"
                             
-                            # Add function arguments display
-                            if hasattr(function_call, 'arguments') and function_call.arguments:
-                                try:
-                                    # Parse the arguments if they're a string containing JSON
-                                    if isinstance(function_call.arguments, str):
-                                        try:
-                                            args_obj = json.loads(function_call.arguments)
-                                            if args_obj == {} or not args_obj:
-                                                continue
-                                            args_formatted = json.dumps(args_obj, indent=2)
-                                        except:
+                                # Add function arguments display
+                                if hasattr(function_call, 'arguments') and function_call.arguments:
+                                    try:
+                                        # Parse the arguments if they're a string containing JSON
+                                        if isinstance(function_call.arguments, str):
+                                            try:
+                                                args_obj = json.loads(function_call.arguments)
+                                                if args_obj == {} or not args_obj:
+                                                    continue
+                                                args_formatted = json.dumps(args_obj, indent=2)
+                                            except:
+                                                args_formatted = json.dumps(function_call.arguments, indent=2)
+                                        else:
                                             args_formatted = json.dumps(function_call.arguments, indent=2)
-                                    else:
-                                        args_formatted = json.dumps(function_call.arguments, indent=2)
                                     
-                                    yield f"\n\n📋 **Tool call arguments:**\n\n```json\n{args_formatted}\n```\n\n"
-                                except Exception as e:
-                                     yield f"\n\n❌ **Error displaying arguments:** {str(e)}\n\n"
-                            else:
-                                # Add an extra newline for consistent spacing
-                                yield "\n"
+                                        yield f"\n\n📋 **Tool call arguments:**\n\n```json\n{args_formatted}\n```\n\n"
+                                    except Exception as e:
+                                         yield f"\n\n❌ **Error displaying arguments:** {str(e)}\n\n"
+                                else:
+                                    # Add an extra newline for consistent spacing
+                                    yield "\n"
                         
-            # Handle final response
-            elif isinstance(chunk_event.content, str):
-                # If we used tools and haven't shown results marker yet
-                if announced_tools and not result_shown:
-                    yield f"\n\n✅ **Results:**\n\n"
-                    result_shown = True
+                # Handle final response
+                elif isinstance(chunk_event.content, str):
+                    # If we used tools and haven't shown results marker yet
+                    if announced_tools and not result_shown:
+                        yield f"\n\n✅ **Results:**\n\n"
+                        result_shown = True
                     
-                # Yield the final content
-                yield chunk_event.content
+                    # Yield the final content
+                    yield chunk_event.content
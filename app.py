@@ -3,6 +3,7 @@ import chainlit as cl
 from agents.document_agent import DocumentQAAgent
 from prompts.prompt_template import FILE_UPLOAD_MESSAGE
 from orchestrator.sk_router_planner import multi_agent_dispatch_stream
+from agents.literature_agent import close_literature_session
 from prompts.prompt_template import LITERATURE_AGENT_DESCRIPTION, DOCUMENT_AGENT_DESCRIPTION
 import asyncio
 from dotenv import load_dotenv
@@ -133,7 +134,7 @@ async def handle_search_message(message: cl.Message):
         full_response = ""
         
         # Stream tokens from the appropriate agent
-        async for token in multi_agent_dispatch_stream(user_input):
+        async for token in multi_agent_dispatch_stream(user_input, cl.context.session.id):
             if token:
                 # Skip the loader token
                 if token == "⏳ Thinking...":
@@ -202,6 +203,7 @@ async def end():
     document_qa_agent = cl.user_session.get("document_qa_agent")
     if document_qa_agent:
         document_qa_agent.cleanup()
+    close_literature_session(cl.context.session.id)
     
     # Remove temporary files
     active_docs = cl.user_session.get("active_documents", [])
@@ -32,7 +32,7 @@ Select ONLY the most relevant skill for the user's query:
 - 'qa_plugin': Handle file uploads, document analysis, and retrieval-augmented generation (RAG) discussions based on user-uploaded documents. Use for answering questions about user files or for RAG-based academic discussions.
 """
 
-async def multi_agent_dispatch_stream(user_input: str) -> str:
+async def multi_agent_dispatch_stream(user_input: str, session_id: str = None) -> str:
     print(f"\n---\nUser input: {user_input}\n---")
     result = await kernel.invoke_prompt(
         prompt=system_prompt + "\nUser: " + user_input,
@@ -49,12 +49,12 @@ async def multi_agent_dispatch_stream(user_input: str) -> str:
         async for token in run_multi_judge_agents(user_input):
             yield token
     elif "literature_plugin" in result_str:
-        async for token in run_literature_agent_stream(user_input):
+        async for token in run_literature_agent_stream(user_input, session_id):
             yield token
     elif "qa_plugin" in result_str:
         document_qa_agent = DocumentQAAgent()
         async for token in document_qa_agent.run_document_agent_stream(user_input):
             yield token
     else:
-        async for token in run_literature_agent_stream(user_input):
+        async for token in run_literature_agent_stream(user_input, session_id):
             yield token # default feedback
\ No newline at end of file
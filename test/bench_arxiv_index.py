@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Build, update and query the offline arXiv index on a synthetic metadata dump.
+
+Reports build time, index size, hybrid (BM25 + embedding) query latency and
+the effect of an incremental update with a newer dump. Real dumps can be
+indexed with `python -m tools.arxiv_index INDEX_DIR arxiv-metadata.json`.
+
+Usage:
+    python test/bench_arxiv_index.py [--papers N] [--queries N] [--no-embeddings]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+from tools.arxiv_index import ArxivIndex, update_index
+
+TOPICS = [
+    "retrieval augmented generation", "graph neural networks", "diffusion models",
+    "reinforcement learning from human feedback", "protein structure prediction",
+    "quantum error correction", "federated learning", "vision transformers",
+    "speech recognition", "causal inference", "neural radiance fields", "code generation",
+]
+FILLER = ("model method results data training performance approach propose show task "
+          "benchmark evaluation large efficient novel framework experiments analysis").split()
+
+
+def make_paper(i, stamp="2024-01-15"):
+    rng = random.Random(i)
+    topic = TOPICS[i % len(TOPICS)]
+    abstract = " ".join(rng.choice(FILLER) for _ in range(120))
+    return {
+        "id": f"{2000 + i // 100000}.{i % 100000:05d}",
+        "title": f"A study of {topic} {rng.choice(FILLER)} {i}",
+        "authors": "Ada Lovelace, Alan Turing and Grace Hopper",
+        "authors_parsed": [["Lovelace", "Ada", ""], ["Turing", "Alan", ""], ["Hopper", "Grace", ""]],
+        "categories": "cs.LG cs.AI",
+        "abstract": f"We study {topic}. {abstract}",
+        "update_date": stamp,
+        "versions": [{"version": "v1", "created": f"Mon, {1 + i % 28} Jan {2015 + i % 10} 10:00:00 GMT"}],
+    }
+
+
+def write_dump(path, papers):
+    with open(path, "w", encoding="utf-8") as f:
+        for paper in papers:
+            f.write(json.dumps(paper) + "\n")
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--papers', type=int, default=20000, help='Papers in the synthetic dump')
+    parser.add_argument('--queries', type=int, default=200, help='Queries to time')
+    parser.add_argument('--segment-size', type=int, default=10000, help='Papers per index segment')
+    parser.add_argument('--no-embeddings', action='store_true', help='BM25 only (no embedding model needed)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="arxiv_index_bench_")
+    index_dir = os.path.join(workdir, "index")
+    try:
+        print("Offline arXiv Index Benchmark")
+        print("=" * 50)
+
+        dump = os.path.join(workdir, "dump-1.jsonl")
+        write_dump(dump, (make_paper(i) for i in range(args.papers)))
+
+        start = time.perf_counter()
+        counts = update_index(index_dir, [dump], segment_size=args.segment_size, embed=not args.no_embeddings)
+        print(f"Build: {counts['added']} papers in {time.perf_counter() - start:.1f}s, "
+              f"{directory_size(index_dir) / 1024 / 1024:.1f} MB on disk")
+
+        start = time.perf_counter()
+        index = ArxivIndex(index_dir)
+        print(f"Open: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        # First query loads the embedding model; not part of the latency figures
+        index.search(TOPICS[0])
+        latencies = []
+        for i in range(args.queries):
+            query = TOPICS[i % len(TOPICS)]
+            start = time.perf_counter()
+            papers = index.search(query, max_results=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not all(query in paper.title for paper in papers):
+                print(f"✗ Unexpected results for {query!r}: {[p.title for p in papers]}")
+        latencies.sort()
+        print(f"Query latency: median {statistics.median(latencies):.1f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms")
+
+        # Newer dump: the full old set (unchanged), 1% updated entries and 5% new papers
+        updated = args.papers // 100
+        new = args.papers // 20
+        newer = [make_paper(i, stamp="2024-06-01" if i < updated else "2024-01-15") for i in range(args.papers)]
+        newer += [make_paper(i) for i in range(args.papers, args.papers + new)]
+        dump = os.path.join(workdir, "dump-2.jsonl")
+        write_dump(dump, newer)
+
+        start = time.perf_counter()
+        counts = update_index(index_dir, [dump], segment_size=args.segment_size, embed=not args.no_embeddings)
+        print(f"Update: {counts['added']} added, {counts['replaced']} replaced, "
+              f"{counts['unchanged']} unchanged in {time.perf_counter() - start:.1f}s")
+
+        print(f"Stale after update: {index.is_stale()}")
+        index = ArxivIndex(index_dir)
+        print(f"Papers: {index.num_live} live of {index.num_docs} stored")
+        print("=" * 50)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
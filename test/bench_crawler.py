@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the web crawler.
+
+Starts a local HTTP server that serves a synthetic site graph and runs
+crawl_website against it. Nothing touches the network. You can set the
+fanout, depth, page size, share of PDF links, per-request latency and
+error rate.
+
+Reports pages/s, bytes/s, peak RSS and the per-page fetch latency
+distribution. Use --min-pages-per-second to fail (exit code 1) on
+throughput regressions.
+
+Usage:
+    python test/bench_crawler.py --fanout 10 --depth 2 --latency-ms 50 --concurrent
+"""
+
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+from tools.web_crawling_tools import crawl_website
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+def make_pdf(text):
+    """Build a minimal single-page PDF containing `text`"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+    objects[3] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+class SyntheticSite:
+    """
+    A k-ary site graph: page n links to pages n*fanout+1 .. n*fanout+fanout.
+
+    Leaf links are PDFs with probability pdf_share. Pages are generated
+    deterministically from their id, so every run serves the same site.
+    """
+
+    def __init__(self, fanout, depth, page_size, pdf_share, latency_ms, error_rate):
+        self.fanout = fanout
+        self.depth = depth
+        self.page_size = page_size
+        self.pdf_share = pdf_share
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.vocabulary = [f"word{i}" for i in range(5000)]
+
+    def _chance(self, page_id, salt):
+        """Deterministic per-page pseudo-random number in [0, 1)"""
+        digest = hashlib.md5(f"{salt}:{page_id}".encode()).digest()
+        return int.from_bytes(digest[:4], 'big') / 2 ** 32
+
+    def is_pdf(self, page_id):
+        return page_id > 0 and self._chance(page_id, 'pdf') < self.pdf_share
+
+    def render_html(self, page_id):
+        links = []
+        for child in range(page_id * self.fanout + 1, page_id * self.fanout + self.fanout + 1):
+            suffix = 'pdf' if self.is_pdf(child) else 'html'
+            links.append(f'<a href="/page/{child}.{suffix}">Page {child}</a>')
+
+        # Unique text per page so near-duplicate detection does not prune the graph
+        rng = random.Random(page_id)
+        words = []
+        size = 0
+        while size < self.page_size:
+            word = rng.choice(self.vocabulary)
+            words.append(word)
+            size += len(word) + 1
+
+        return (
+            f'<html><head><title>Page {page_id}</title></head><body>'
+            f'<p>{" ".join(words)}</p>{"".join(links)}</body></html>'
+        ).encode('utf-8')
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if site.latency:
+                    time.sleep(site.latency)
+
+                try:
+                    name = self.path.rsplit('/', 1)[-1]
+                    page_id, extension = name.split('.')
+                    page_id = int(page_id)
+                except ValueError:
+                    self.send_error(404)
+                    return
+
+                if site._chance(page_id, 'error') < site.error_rate:
+                    self.send_error(500)
+                    return
+
+                if extension == 'pdf':
+                    body = make_pdf(f"Synthetic PDF document {page_id}")
+                    content_type = 'application/pdf'
+                else:
+                    body = site.render_html(page_id)
+                    content_type = 'text/html; charset=utf-8'
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fanout', type=int, default=8, help='Links per page')
+    parser.add_argument('--depth', type=int, default=2, help='Crawl depth (max_depth)')
+    parser.add_argument('--page-size', type=int, default=20_000, help='Approximate text bytes per HTML page')
+    parser.add_argument('--pdf-share', type=float, default=0.1, help='Fraction of links that are PDFs')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Server-side delay per request')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Fraction of pages answering HTTP 500')
+    parser.add_argument('--concurrent', action='store_true', help='Use the concurrent crawl engine')
+    parser.add_argument('--max-concurrency', type=int, default=10)
+    parser.add_argument('--per-host-concurrency', type=int, default=10)
+    parser.add_argument('--per-host-delay', type=float, default=0.0)
+    parser.add_argument('--extract-workers', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--min-pages-per-second', type=float, help='Exit with status 1 below this throughput')
+    args = parser.parse_args()
+
+    site = SyntheticSite(args.fanout, args.depth, args.page_size, args.pdf_share, args.latency_ms, args.error_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), site.handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    start_url = f"http://127.0.0.1:{server.server_address[1]}/page/0.html"
+
+    logging.disable(logging.ERROR)
+    options = {"max_links_per_page": args.fanout, "use_cache": False, "concurrent": args.concurrent}
+    if args.concurrent:
+        options.update(
+            max_concurrency=args.max_concurrency,
+            per_host_concurrency=args.per_host_concurrency,
+            per_host_delay=args.per_host_delay,
+            extract_workers=args.extract_workers
+        )
+
+    start = time.perf_counter()
+    result = crawl_website(start_url, max_depth=args.depth, **options)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    fetch_stats = result.get("fetch_stats", {})
+    report = {
+        "mode": "concurrent" if args.concurrent else "sequential",
+        "pages": fetch_stats.get("pages", 0),
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(fetch_stats.get("pages", 0) / elapsed, 1),
+        "bytes_per_second": round(fetch_stats.get("bytes", 0) / elapsed),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if RESOURCE_AVAILABLE else None,
+        "latency_ms": fetch_stats.get("latency_ms", {}),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("Crawler Benchmark (offline synthetic site)")
+        print("=" * 50)
+        print(f"Site: fanout={args.fanout} depth={args.depth} page_size={args.page_size} "
+              f"pdf_share={args.pdf_share} latency={args.latency_ms}ms error_rate={args.error_rate}")
+        print(f"Mode: {report['mode']}")
+        print(f"  - Pages fetched: {report['pages']} in {report['seconds']}s")
+        print(f"  - Throughput: {report['pages_per_second']} pages/s, {report['bytes_per_second'] / 1024:.1f} KB/s")
+        if report['peak_rss_mb'] is not None:
+            print(f"  - Peak RSS: {report['peak_rss_mb']} MB")
+        latency = report['latency_ms']
+        if latency:
+            print(f"  - Latency per page: p50={latency['p50']}ms p90={latency['p90']}ms "
+                  f"p99={latency['p99']}ms max={latency['max']}ms")
+        print("=" * 50)
+
+    if args.min_pages_per_second is not None and report['pages_per_second'] < args.min_pages_per_second:
+        print(f"✗ Throughput {report['pages_per_second']} pages/s is below {args.min_pages_per_second}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
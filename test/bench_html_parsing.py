@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the crawler's HTML extraction step.
+
+Compares the old path (two separate html.parser parses for text and links)
+with the single-pass parse_html on the fastest available parser, over a
+corpus of saved HTML pages.
+
+Usage:
+    python test/bench_html_parsing.py [corpus_dir] [--rounds N]
+
+If no corpus directory is given, a synthetic corpus is generated.
+"""
+
+import sys
+import os
+import glob
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+import tools.web_crawling_tools as crawler_module
+from tools.web_crawling_tools import WebCrawler
+
+
+def generate_corpus(directory, num_pages=200):
+    """Write synthetic article-like pages with navigation, scripts and many links"""
+    random.seed(42)
+    vocabulary = [f"term{i}" for i in range(2000)]
+
+    for i in range(num_pages):
+        nav = ''.join(f'<li><a href="/section/{j}">Section {j}</a></li>' for j in range(40))
+        paragraphs = ''.join(
+            '<p>' + ' '.join(random.choices(vocabulary, k=120)) +
+            f' <a href="/article/{random.randint(0, 10000)}">related</a></p>'
+            for _ in range(30)
+        )
+        html = (
+            f'<html><head><title>Article {i}</title>'
+            f'<meta name="description" content="Synthetic article {i}">'
+            f'<meta name="keywords" content="alpha, beta, gamma">'
+            f'<script>var tracking = {{"id": {i}}};</script><style>p {{ margin: 0 }}</style></head>'
+            f'<body><nav><ul>{nav}</ul></nav><main>{paragraphs}</main>'
+            f'<footer><a href="/legal">Legal</a><a href="/login">Login</a></footer></body></html>'
+        )
+        with open(os.path.join(directory, f'page_{i}.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+
+def run(label, parse_page, pages, rounds):
+    """Time parse_page over the corpus and print pages per second"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url, html in pages:
+            parse_page(url, html)
+    elapsed = time.perf_counter() - start
+
+    pages_per_second = len(pages) * rounds / elapsed
+    print(f"{label:<40} {pages_per_second:>10.1f} pages/s")
+    return pages_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus_dir', nargs='?', help='Directory of saved .html pages')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the corpus per variant')
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus_dir
+    if corpus_dir is None:
+        corpus_dir = tempfile.mkdtemp(prefix='html_corpus_')
+        generate_corpus(corpus_dir)
+        print(f"Generated synthetic corpus in {corpus_dir}")
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '**', '*.htm*'), recursive=True)):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            pages.append((f"https://example.com/{os.path.basename(path)}", f.read()))
+
+    if not pages:
+        print(f"No .html files found in {corpus_dir}")
+        return
+
+    logging.disable(logging.ERROR)
+    crawler = WebCrawler()
+    fast_parser = crawler_module.HTML_PARSER
+
+    print("HTML Extraction Benchmark")
+    print("=" * 50)
+    print(f"Pages: {len(pages)}  Rounds: {args.rounds}  Fast parser: {fast_parser}")
+    print()
+
+    def two_pass(url, html):
+        crawler.extract_text_from_html(html)
+        crawler.extract_links_from_html(html, url)
+
+    def single_pass(url, html):
+        crawler.parse_html(html, url)
+
+    try:
+        crawler_module.HTML_PARSER = 'html.parser'
+        before = run("before: 2x html.parser", two_pass, pages, args.rounds)
+        run("single pass, html.parser", single_pass, pages, args.rounds)
+
+        crawler_module.HTML_PARSER = fast_parser
+        after = run(f"after: single pass, {fast_parser}", single_pass, pages, args.rounds)
+    finally:
+        crawler_module.HTML_PARSER = fast_parser
+
+    print()
+    print(f"Speedup: {after / before:.2f}x")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+LLM calls, search calls and end-to-end latency of the multi-judge pipeline,
+in "independent" mode (each judge runs its own tool-driven retrieval) and
+"shared_pool" mode (one deduplicated candidate pool, judges only score it).
+
+No model endpoint or network is used: the model client answers with tool
+calls or JSON after a simulated latency, and the arXiv / web backends sleep
+and return synthetic results. The search cache and outbound rate limiters
+are the real ones.
+
+The second table repeats shared_pool requests where each model call is slow
+with probability `--slow-prob`, with and without the judge deadline, and
+reports latency percentiles. The defaults keep a plain run to a few minutes;
+for steadier tail percentiles use e.g. `--requests 40 --slow-latency 20`
+(searches run at the real arXiv rate limit, so expect 10+ minutes).
+
+The third table runs `--users` concurrent requests for two rounds and
+reports how many agents the pools built and reused, and how many model
+calls saw another request's messages in their context.
+
+Usage:
+    python test/bench_multi_judge.py [--llm-latency S] [--search-latency S] [--arxiv-rate R]
+                                     [--requests N] [--slow-prob P] [--slow-latency S] [--deadline S]
+                                     [--users N]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+# Agent modules build their model clients at import; no request is sent
+os.environ.setdefault("GITHUB_TOKEN", "multi-judge-benchmark")
+
+from autogen_core import FunctionCall
+from autogen_core.models import CreateResult, FunctionExecutionResultMessage, RequestUsage, SystemMessage, UserMessage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+import agents.multi_judge_agent as multi_judge
+import tools.arxiv_search_tool as search_tool
+import tools.candidate_pool as candidate_pool
+from tools.arxiv_search_tool import ArxivPaper
+from tools.rate_limiter import UpstreamLimiter
+
+QUERY = "Recommend must-read papers on retrieval augmented generation"
+
+
+class SimulatedModelClient(ReplayChatCompletionClient):
+    """Answers like a judge model: search tool calls first (when tools are offered), then JSON"""
+
+    def __init__(self, latency: float, slow_prob: float = 0.0, slow_latency: float = 0.0, seed: int = 0):
+        super().__init__([], model_info={
+            "json_output": True, "function_calling": True, "vision": False, "family": "unknown", "structured_output": True
+        })
+        self.latency = latency
+        self.slow_prob = slow_prob
+        self.slow_latency = slow_latency
+        self.calls = 0
+        self.cancelled = 0
+        self.leaks = 0
+        self._ids = itertools.count()
+        self._rng = random.Random(seed)
+
+    async def _wait(self, cancellation_token):
+        # Like a real HTTP call: linked to the caller's cancellation token
+        latency = self.slow_latency if self._rng.random() < self.slow_prob else self.latency
+        future = asyncio.ensure_future(asyncio.sleep(latency))
+        if cancellation_token is not None:
+            cancellation_token.link_future(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    def _respond(self, messages, tools) -> CreateResult:
+        self.calls += 1
+        # Every request sends one user message; more means another request's context leaked in
+        self.leaks += sum(isinstance(m, UserMessage) for m in messages) > 1
+        usage = RequestUsage(prompt_tokens=sum(len(str(m.content)) // 4 for m in messages), completion_tokens=200)
+        if tools and not isinstance(messages[-1], FunctionExecutionResultMessage):
+            system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+            focus = system.split("\n")[1] if "\n" in system else system
+            calls = [
+                FunctionCall(id=str(next(self._ids)), name="query_arxiv", arguments=json.dumps({"query": f"{QUERY} {focus}"})),
+                FunctionCall(id=str(next(self._ids)), name="query_web", arguments=json.dumps({"query": f"{QUERY} {focus}"})),
+            ]
+            return CreateResult(finish_reason="function_calls", content=calls, usage=usage, cached=False)
+        if any(isinstance(m, FunctionExecutionResultMessage) for m in messages):
+            # Independent judges describe the papers they retrieved themselves
+            scores = [{"title": f"Paper {i}", "link": f"https://arxiv.org/abs/2401.{i:05d}", "abstract": "Abstract " * 40,
+                       "score": 10 - i, "reason": "simulated"} for i in range(1, 8)]
+        else:
+            scores = [{"id": f"P{i}", "score": 10 - i, "reason": "simulated"} for i in range(1, 6)]
+        return CreateResult(finish_reason="stop", content=json.dumps(scores), usage=usage, cached=False)
+
+    async def create(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        await self._wait(cancellation_token)
+        return self._respond(messages, tools)
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        await self._wait(cancellation_token)
+        result = self._respond(messages, tools)
+        if isinstance(result.content, str):
+            for i in range(0, len(result.content), 20):
+                yield result.content[i:i + 20]
+        yield result
+
+
+def install_simulated_backends(search_latency: float, arxiv_rate: float, counts: dict):
+    """Replace the network calls under the search tools with sleeps returning synthetic results"""
+
+    async def fetch_arxiv_papers_async(topic, max_results, sort_by, sort_order):
+        counts["arxiv"] += 1
+        await asyncio.sleep(search_latency)
+        return [ArxivPaper(f"2401.{i:05d}", f"{topic} paper {i}", ["A. Author"], "2024", "Abstract " * 40, "cs.CL",
+                           f"https://arxiv.org/pdf/2401.{i:05d}") for i in range(max_results)]
+
+    def run_web_search(search_type, search_params):
+        counts["web"] += 1
+        time.sleep(search_latency)
+        return [{"title": f"{search_params['keywords']} result {i}", "href": f"https://arxiv.org/abs/2401.{i:05d}",
+                 "body": "Snippet " * 20} for i in range(search_params["max_results"])]
+
+    search_tool.fetch_arxiv_papers_async = fetch_arxiv_papers_async
+    search_tool._run_web_search = run_web_search
+    # KeyBERT needs the embedding model; the topic is the query itself here
+    search_tool.extract_main_topic = candidate_pool.extract_main_topic = lambda query: query
+    search_tool.arxiv_limiter = UpstreamLimiter("arXiv", rate=arxiv_rate, burst=1)
+    search_tool.web_limiter = UpstreamLimiter("DuckDuckGo", rate=search_tool.WEB_RATE_LIMIT, burst=2)
+
+
+def use_client(client):
+    multi_judge.client = client
+    # Pooled agents hold the previous client
+    for pool in [*multi_judge.judge_pools.values(), multi_judge.final_judge_pool]:
+        pool.clear()
+
+
+async def run_mode(mode: str, args) -> dict:
+    counts = {"arxiv": 0, "web": 0}
+    install_simulated_backends(args.search_latency, args.arxiv_rate, counts)
+    search_tool.arxiv_cache.clear()
+    search_tool.web_cache.clear()
+
+    client = SimulatedModelClient(args.llm_latency)
+    use_client(client)
+
+    start = time.perf_counter()
+    async for _ in multi_judge.run_multi_judge_agents(QUERY, mode=mode, deadline=3600, use_cache=False):
+        pass
+    return {"seconds": time.perf_counter() - start, "llm_calls": client.calls,
+            "searches": counts["arxiv"] + counts["web"]}
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run_tail(deadline: float, args) -> dict:
+    """Time to the first Final Judge token over `--requests` shared_pool requests with slow model calls"""
+    install_simulated_backends(args.search_latency, args.arxiv_rate, {"arxiv": 0, "web": 0})
+    client = SimulatedModelClient(args.llm_latency, args.slow_prob, args.slow_latency, seed=42)
+    use_client(client)
+
+    latencies = []
+    for _ in range(args.requests):
+        search_tool.arxiv_cache.clear()
+        search_tool.web_cache.clear()
+        start = time.perf_counter()
+        async for token in multi_judge.run_multi_judge_agents(QUERY, mode="shared_pool", deadline=deadline,
+                                                             use_cache=False):
+            if token == "⏳ Thinking...":
+                latencies.append(time.perf_counter() - start)
+    return {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95), "p99": percentile(latencies, 99),
+            "cancelled": client.cancelled}
+
+
+async def run_users(args) -> list:
+    """Two rounds of `--users` concurrent shared_pool requests on the agent pools"""
+    install_simulated_backends(args.search_latency, args.arxiv_rate, {"arxiv": 0, "web": 0})
+    client = SimulatedModelClient(args.llm_latency)
+    use_client(client)
+
+    async def one_request():
+        # Same query for everyone: searches are shared, the agents are not
+        async for _ in multi_judge.run_multi_judge_agents(QUERY, mode="shared_pool", deadline=3600, use_cache=False):
+            pass
+
+    rounds = []
+    for _ in range(2):
+        before = multi_judge.get_agent_pool_stats()
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(args.users)))
+        after = multi_judge.get_agent_pool_stats()
+        rounds.append({
+            "seconds": time.perf_counter() - start,
+            "created": sum(after[k]["created"] - before[k]["created"] for k in after),
+            "reused": sum(after[k]["reused"] - before[k]["reused"] for k in after),
+            "leaks": client.leaks,
+        })
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--llm-latency', type=float, default=2.0, help='Seconds per simulated model call')
+    parser.add_argument('--search-latency', type=float, default=1.0, help='Seconds per simulated search request')
+    parser.add_argument('--arxiv-rate', type=float, default=search_tool.ARXIV_RATE_LIMIT,
+                        help='arXiv requests per second allowed by the outbound limiter')
+    parser.add_argument('--requests', type=int, default=10, help='Requests per configuration in the tail latency run')
+    parser.add_argument('--slow-prob', type=float, default=0.05, help='Probability that a model call is slow')
+    parser.add_argument('--slow-latency', type=float, default=8.0, help='Seconds per slow model call')
+    parser.add_argument('--deadline', type=float, default=4.0, help='Judge deadline for the tail latency run')
+    parser.add_argument('--users', type=int, default=8, help='Concurrent requests in the agent pool run')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("independent", "shared_pool"):
+        results[mode] = asyncio.run(run_mode(mode, args))
+
+    print()
+    print("Multi-Judge Pipeline Benchmark")
+    print("=" * 50)
+    print(f"{'mode':<14} {'LLM calls':>10} {'searches':>9} {'seconds':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<14} {r['llm_calls']:>10} {r['searches']:>9} {r['seconds']:>9.1f}")
+    before, after = results["independent"], results["shared_pool"]
+    print(f"Reduction: {1 - after['llm_calls'] / before['llm_calls']:.0%} LLM calls, "
+          f"{1 - after['seconds'] / before['seconds']:.0%} latency")
+    print("=" * 50)
+
+    tail = {
+        "no deadline": asyncio.run(run_tail(3600, args)),
+        f"deadline {args.deadline:g}s": asyncio.run(run_tail(args.deadline, args)),
+    }
+    print()
+    print(f"Time to Final Judge, {args.requests} requests, {args.slow_prob:.0%} of model calls take {args.slow_latency:g}s")
+    print("=" * 50)
+    print(f"{'judges':<14} {'p50':>7} {'p95':>7} {'p99':>7} {'cancelled':>10}")
+    for name, r in tail.items():
+        print(f"{name:<14} {r['p50']:>7.1f} {r['p95']:>7.1f} {r['p99']:>7.1f} {r['cancelled']:>10}")
+    print("=" * 50)
+
+    rounds = asyncio.run(run_users(args))
+    print()
+    print(f"Agent pools, {args.users} concurrent requests per round")
+    print("=" * 50)
+    print(f"{'round':<6} {'seconds':>8} {'agents built':>13} {'reused':>7} {'context leaks':>14}")
+    for i, r in enumerate(rounds, 1):
+        print(f"{i:<6} {r['seconds']:>8.1f} {r['created']:>13} {r['reused']:>7} {r['leaks']:>14}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Concurrent load against a simulated rate-limited upstream, with and without UpstreamLimiter.
+
+The simulated service accepts `--capacity` requests per second and answers
+anything above that with 429 and a Retry-After header. Each client coroutine
+needs one successful response. Without the limiter, clients retry after a
+short fixed delay; with it, they go through the shared token bucket, backoff
+and circuit breaker used by the arXiv and web search tools.
+
+A final check cancels `--cancelled` queued callers (as a request deadline
+does) and verifies that a fresh call afterwards does not inherit their wait.
+
+Usage:
+    python test/bench_rate_limiter.py [--clients N] [--capacity R] [--retry-after S]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+from tools.rate_limiter import RetryableError, UpstreamLimiter, UpstreamUnavailable
+
+
+class SimulatedUpstream:
+    """Fixed-window server: `capacity` requests per second, 429 beyond that"""
+
+    def __init__(self, capacity: float, retry_after: float, latency: float = 0.05):
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.latency = latency
+        self.window_start = 0.0
+        self.window_count = 0
+        self.requests = 0
+        self.throttled = 0
+
+    async def request(self):
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        if loop.time() - self.window_start >= 1.0:
+            self.window_start = loop.time()
+            self.window_count = 0
+        self.window_count += 1
+        rejected = self.window_count > self.capacity
+        await asyncio.sleep(self.latency)
+        if rejected:
+            self.throttled += 1
+            raise RetryableError("HTTP 429", throttled=True, retry_after=self.retry_after)
+        return "ok"
+
+
+async def naive_client(upstream, max_attempts):
+    for _ in range(max_attempts):
+        try:
+            return await upstream.request()
+        except RetryableError:
+            await asyncio.sleep(0.5)
+    return None
+
+
+async def limited_client(upstream, limiter):
+    try:
+        return await limiter.call_async(upstream.request)
+    except UpstreamUnavailable:
+        return None
+
+
+async def run(mode, args):
+    upstream = SimulatedUpstream(args.capacity, args.retry_after)
+    limiter = UpstreamLimiter("simulated", rate=args.capacity, burst=1,
+                              max_retries=args.attempts - 1, base_delay=0.5)
+    start = time.perf_counter()
+    if mode == "naive retry":
+        results = await asyncio.gather(*[naive_client(upstream, args.attempts) for _ in range(args.clients)])
+    else:
+        results = await asyncio.gather(*[limited_client(upstream, limiter) for _ in range(args.clients)])
+    elapsed = time.perf_counter() - start
+
+    ok = sum(1 for r in results if r is not None)
+    print(f"{mode:<14} {ok:>4}/{args.clients:<4} {upstream.requests:>9} {upstream.throttled:>6} "
+          f"{elapsed:>8.1f}s {ok / elapsed:>8.2f}/s")
+    if mode != "naive retry":
+        stats = limiter.get_stats()
+        print(f"               queue wait avg {stats['queue_wait_avg']}s, max {stats['queue_wait_max']}s, "
+              f"retries {stats['retries']}, circuit {stats['circuit']}")
+
+
+async def check_cancelled_waiters(args) -> float:
+    """Queue `args.cancelled` callers behind one token, cancel them, and time a fresh call"""
+    limiter = UpstreamLimiter("simulated", rate=1, burst=1)
+
+    async def noop():
+        return "ok"
+
+    await limiter.call_async(noop)
+    waiters = [asyncio.create_task(limiter.call_async(noop)) for _ in range(args.cancelled)]
+    await asyncio.sleep(0.1)
+    for task in waiters:
+        task.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+    # The bucket refills to one token within a second; the cancelled reservations must not count
+    await asyncio.sleep(1.0)
+    start = time.perf_counter()
+    await limiter.call_async(noop)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=60, help='Concurrent clients, one successful call each')
+    parser.add_argument('--capacity', type=float, default=5, help='Upstream capacity (requests per second)')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After sent with 429 responses')
+    parser.add_argument('--attempts', type=int, default=4, help='Attempts per client')
+    parser.add_argument('--cancelled', type=int, default=9, help='Queued callers cancelled in the final check')
+    args = parser.parse_args()
+
+    print("Outbound Rate Limiter Benchmark")
+    print("=" * 50)
+    print(f"{'mode':<14} {'ok':>9} {'requests':>9} {'429s':>6} {'time':>9} {'goodput':>10}")
+    for mode in ("naive retry", "limiter"):
+        asyncio.run(run(mode, args))
+    print("=" * 50)
+
+    wait = asyncio.run(check_cancelled_waiters(args))
+    print(f"Fresh call after {args.cancelled} cancelled waiters (rate=1, burst=1): waited {wait:.2f}s "
+          f"[{'OK' if wait < 0.5 else 'FAIL'}]")
+
+
+if __name__ == "__main__":
+    main()
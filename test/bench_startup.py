@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Startup cost of the agent modules with the lazy, shared KeyBERT model.
+
+Each scenario runs in a fresh interpreter and reports wall time, peak RSS
+and the number of sentence-transformer models in memory:
+
+- import: what app.py pays before accepting connections (KeyBERT is lazy)
+- import + eager KeyBERT: the previous behaviour, KeyBERT() loaded at import
+- first query (shared): document embeddings plus the first keyword
+  extraction, with KeyBERT reusing the EmbeddingsManager model
+- first query (separate): the same work with KeyBERT's own model copy
+
+Usage:
+    python test/bench_startup.py [--repeat N] [--skip-models]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+QUERY = "recent advances in retrieval augmented generation for question answering"
+
+MEASURE = '''
+import sys, time, json, gc
+sys.path.append('.')
+start = time.perf_counter()
+{setup}
+elapsed = time.perf_counter() - start
+
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+except ImportError:
+    peak_mb = None
+
+models = 0
+if 'sentence_transformers' in sys.modules:
+    from sentence_transformers import SentenceTransformer
+    models = sum(1 for o in gc.get_objects() if isinstance(o, SentenceTransformer))
+
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": peak_mb, "models": models}}))
+'''
+
+IMPORT_AGENTS = "import agents.literature_agent\nimport agents.document_agent"
+EAGER_KEYBERT = "from keybert import KeyBERT\n_eager_kw_model = KeyBERT()"
+LOAD_EMBEDDINGS = "from agents.document_agent import EmbeddingsManager\nEmbeddingsManager.get_embeddings()"
+
+SCENARIOS = [
+    ("import", IMPORT_AGENTS, False),
+    ("import + eager KeyBERT", f"{EAGER_KEYBERT}\n{IMPORT_AGENTS}", True),
+    ("first query (shared)",
+     f"{IMPORT_AGENTS}\n{LOAD_EMBEDDINGS}\n"
+     f"from tools.arxiv_search_tool import extract_main_topic\nextract_main_topic({QUERY!r})", True),
+    ("first query (separate)",
+     f"{EAGER_KEYBERT}\n{IMPORT_AGENTS}\n{LOAD_EMBEDDINGS}\n"
+     f"_eager_kw_model.extract_keywords({QUERY!r}, keyphrase_ngram_range=(1, 3), stop_words='english')", True),
+]
+
+
+def run_scenario(setup):
+    """Run one scenario in a fresh interpreter and return its measurements"""
+    env = dict(os.environ)
+    # Agent modules build their model clients at import; no request is sent
+    env.setdefault("GITHUB_TOKEN", "startup-benchmark")
+
+    proc = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(setup=setup)],
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario (best time is reported)')
+    parser.add_argument('--skip-models', action='store_true', help='Only measure the import scenario')
+    args = parser.parse_args()
+
+    print("Agent Startup Benchmark")
+    print("=" * 50)
+    print(f"{'scenario':<26} {'seconds':>8} {'peak RSS MB':>12} {'models':>7}")
+
+    for name, setup, needs_models in SCENARIOS:
+        if needs_models and args.skip_models:
+            continue
+
+        runs = [run_scenario(setup) for _ in range(args.repeat)]
+        ok = [r for r in runs if "error" not in r]
+        if not ok:
+            print(f"{name:<26} ✗ {runs[0]['error']}")
+            continue
+
+        best = min(ok, key=lambda r: r["seconds"])
+        rss = f"{best['peak_rss_mb']:.0f}" if best["peak_rss_mb"] is not None else "n/a"
+        print(f"{name:<26} {best['seconds']:>8.2f} {rss:>12} {best['models']:>7}")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Time to answer for one literature agent turn in which the model asks for
+query_arxiv and query_web together, with the tool-call limit at 1 (calls
+run one after the other) and at TOOL_CALLS_PER_TURN.
+
+No model endpoint or network is used: the model client requests both tools
+and then answers, and the tools are stand-ins that take `--arxiv-latency`
+(async) and `--web-latency` (sync, blocking) seconds. The requested call
+order is checked against the order of the returned results.
+
+Usage:
+    python test/bench_tool_calls.py [--arxiv-latency S] [--web-latency S] [--llm-latency S]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+# Agent modules build their model clients at import; no request is sent
+os.environ.setdefault("GITHUB_TOKEN", "tool-call-benchmark")
+
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import CreateResult, FunctionExecutionResultMessage, RequestUsage
+from autogen_core.tools import FunctionTool
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import TextMessage, ToolCallExecutionEvent, ToolCallRequestEvent
+
+from agents.literature_agent import TOOL_CALLS_PER_TURN, limit_tool_concurrency
+from prompts.prompt_template import LITERATURE_AGENT_PROMPT
+
+
+class ToolCallingModelClient(ReplayChatCompletionClient):
+    """Asks for query_arxiv and query_web in one turn, then answers from their results"""
+
+    def __init__(self, latency: float):
+        super().__init__([], model_info={
+            "json_output": True, "function_calling": True, "vision": False, "family": "unknown", "structured_output": True
+        })
+        self.latency = latency
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        await asyncio.sleep(self.latency)
+        usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        if not isinstance(messages[-1], FunctionExecutionResultMessage):
+            query = json.dumps({"query": "latest retrieval augmented generation papers"})
+            yield CreateResult(finish_reason="function_calls", usage=usage, cached=False, content=[
+                FunctionCall(id="call-arxiv", name="query_arxiv", arguments=query),
+                FunctionCall(id="call-web", name="query_web", arguments=query),
+            ])
+            return
+        answer = "Summary of " + ", ".join(r.content for r in messages[-1].content)
+        yield answer
+        yield CreateResult(finish_reason="stop", content=answer, usage=usage, cached=False)
+
+
+def simulated_tools(arxiv_latency: float, web_latency: float):
+    async def query_arxiv(query: str) -> str:
+        await asyncio.sleep(arxiv_latency)
+        return "arxiv results"
+
+    def query_web(query: str) -> str:
+        # Blocking, like the sync DuckDuckGo client: runs in the thread pool
+        time.sleep(web_latency)
+        return "web results"
+
+    return [FunctionTool(query_arxiv, name="query_arxiv", description="Searches arXiv for research papers."),
+            FunctionTool(query_web, name="query_web", description="Searches the web for relevant academic content.")]
+
+
+async def run_turn(limit: int, args) -> dict:
+    agent = AssistantAgent(
+        name="LiteratureCollectionAgent",
+        model_client=ToolCallingModelClient(args.llm_latency),
+        tools=limit_tool_concurrency(simulated_tools(args.arxiv_latency, args.web_latency), limit),
+        system_message=LITERATURE_AGENT_PROMPT,
+        reflect_on_tool_use=True,
+        model_client_stream=True
+    )
+    start = time.perf_counter()
+    requested, returned, tools_started, tools_seconds = [], [], 0.0, 0.0
+    async for event in agent.on_messages_stream([TextMessage(content="Latest RAG papers?", source="user")],
+                                                cancellation_token=CancellationToken()):
+        if isinstance(event, ToolCallRequestEvent):
+            requested = [call.id for call in event.content]
+            tools_started = time.perf_counter()
+        elif isinstance(event, ToolCallExecutionEvent):
+            returned = [result.call_id for result in event.content if not result.is_error]
+            tools_seconds = time.perf_counter() - tools_started
+    # Failed calls are left out of `returned`, so they fail the order check too
+    return {"tools": tools_seconds, "total": time.perf_counter() - start, "ordered": requested == returned}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arxiv-latency', type=float, default=1.0, help='Seconds per simulated arXiv search (async)')
+    parser.add_argument('--web-latency', type=float, default=1.5, help='Seconds per simulated web search (sync)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Seconds per simulated model call')
+    args = parser.parse_args()
+
+    print("Parallel Tool Call Benchmark")
+    print("=" * 50)
+    print(f"{'calls at once':<14} {'tool phase':>11} {'turn':>8} {'results in call order':>22}")
+    for limit in (1, TOOL_CALLS_PER_TURN):
+        r = asyncio.run(run_turn(limit, args))
+        print(f"{limit:<14} {r['tools']:>10.2f}s {r['total']:>7.2f}s {str(r['ordered']):>22}")
+    print(f"Slowest single tool: {max(args.arxiv_latency, args.web_latency):.2f}s, "
+          f"sum of tools: {args.arxiv_latency + args.web_latency:.2f}s")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the crawler's visited-set backends.
+
+Inserts N synthetic crawl URLs into each backend and reports the Python heap
+memory it holds, scaled to memory per million URLs, along with insert/lookup
+throughput and the measured false-positive rate.
+
+Usage:
+    python test/bench_visited_sets.py [--urls N] [--probes M]
+"""
+
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+
+from tools.visited_sets import ExactVisitedSet, BloomVisitedSet, DiskVisitedSet
+
+
+def make_url(i):
+    """Realistic-length crawl URL (~80 characters)"""
+    return f"https://www.example-university.edu/research/publications/{i // 1000}/article-{i}.html?ref=nav"
+
+
+def bench(name, factory, num_urls, num_probes):
+    """Fill one backend and return its measurements"""
+    tracemalloc.start()
+    visited = factory()
+
+    start = time.perf_counter()
+    for i in range(num_urls):
+        visited.add(make_url(i))
+    insert_seconds = time.perf_counter() - start
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Every inserted URL must be found
+    start = time.perf_counter()
+    missing = sum(1 for i in range(0, num_urls, max(1, num_urls // num_probes)) if make_url(i) not in visited)
+    lookup_seconds = time.perf_counter() - start
+
+    # Unseen URLs that are reported as visited
+    false_positives = sum(1 for i in range(num_urls, num_urls + num_probes) if make_url(i) in visited)
+
+    disk_bytes = os.path.getsize(visited.path) if isinstance(visited, DiskVisitedSet) else 0
+    if hasattr(visited, 'close'):
+        visited.close()
+
+    return {
+        "name": name,
+        "mb_per_million": current / num_urls * 1_000_000 / (1024 * 1024),
+        "disk_mb_per_million": disk_bytes / num_urls * 1_000_000 / (1024 * 1024),
+        "inserts_per_second": num_urls / insert_seconds,
+        "lookups_per_second": num_probes / lookup_seconds if lookup_seconds else float('inf'),
+        "missing": missing,
+        "false_positive_rate": false_positives / num_probes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=200_000, help='URLs inserted per backend')
+    parser.add_argument('--probes', type=int, default=20_000, help='Lookups of seen and unseen URLs')
+    args = parser.parse_args()
+
+    backends = [
+        ("exact", ExactVisitedSet),
+        ("bloom (p=0.001)", lambda: BloomVisitedSet(error_rate=0.001)),
+        ("bloom (p=0.01)", lambda: BloomVisitedSet(error_rate=0.01)),
+        ("disk (sqlite)", DiskVisitedSet),
+    ]
+
+    print("Visited Set Memory Benchmark")
+    print("=" * 50)
+    print(f"URLs per backend: {args.urls}  Probes: {args.probes}")
+    print()
+    print(f"{'backend':<18} {'MB/1M (RAM)':>12} {'MB/1M (disk)':>13} {'inserts/s':>11} {'lookups/s':>11} {'FP rate':>9}")
+
+    for name, factory in backends:
+        r = bench(name, factory, args.urls, args.probes)
+        print(f"{r['name']:<18} {r['mb_per_million']:>12.1f} {r['disk_mb_per_million']:>13.1f} "
+              f"{r['inserts_per_second']:>11.0f} {r['lookups_per_second']:>11.0f} {r['false_positive_rate']:>9.4f}")
+        if r['missing']:
+            print(f"  ✗ {r['missing']} inserted URLs were not found")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
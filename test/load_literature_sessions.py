@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Load test for per-session literature agents.
+
+No model endpoint is used: a stub model client streams a fixed answer after
+a simulated latency and records how many streams run at once.
+
+The first table runs N concurrent sessions, each sending `--turns`
+messages one after the other, and reports throughput. It should grow with
+the number of sessions up to `--max-concurrent` and stay flat beyond it.
+The second table churns through new sessions for `--rounds` rounds and
+reports traced memory after each round, with idle sessions evicted and
+with every session kept.
+
+Usage:
+    python test/load_literature_sessions.py [--latency S] [--turns N] [--max-concurrent N] [--rounds N]
+"""
+
+import gc
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tracemalloc
+
+# Add current directory to path to import our tools
+sys.path.append('.')
+# Agent modules build their model clients at import; no request is sent
+os.environ.setdefault("GITHUB_TOKEN", "literature-load-test")
+
+from autogen_core.models import CreateResult, RequestUsage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+import agents.literature_agent as literature_agent
+from agents.agent_pool import SessionAgents
+
+ANSWER = "Here are recent papers on retrieval augmented generation. " * 20
+
+
+class StubModelClient(ReplayChatCompletionClient):
+    """Streams ANSWER in small chunks after `latency` seconds, never calling tools"""
+
+    def __init__(self, latency: float):
+        super().__init__([], model_info={
+            "json_output": True, "function_calling": True, "vision": False, "family": "unknown", "structured_output": True
+        })
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            for i in range(0, len(ANSWER), 40):
+                yield ANSWER[i:i + 40]
+            yield CreateResult(finish_reason="stop", content=ANSWER, cached=False,
+                               usage=RequestUsage(prompt_tokens=sum(len(str(m.content)) // 4 for m in messages),
+                                                  completion_tokens=len(ANSWER) // 4))
+        finally:
+            self.active -= 1
+
+
+async def session_turns(session_id: str, turns: int):
+    for turn in range(turns):
+        async for _ in literature_agent.run_literature_agent_stream(f"Latest RAG papers, turn {turn}", session_id):
+            pass
+
+
+async def run_throughput(sessions: int, args) -> dict:
+    client = StubModelClient(args.latency)
+    literature_agent.client = client
+    literature_agent.literature_sessions = SessionAgents(literature_agent.create_literature_agent,
+                                                         max_concurrent=args.max_concurrent)
+    start = time.perf_counter()
+    await asyncio.gather(*(session_turns(f"session-{i}", args.turns) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {"turns": sessions * args.turns, "seconds": elapsed, "throughput": sessions * args.turns / elapsed,
+            "peak": client.peak}
+
+
+async def run_churn(evict: bool, args) -> list:
+    literature_agent.client = StubModelClient(args.latency / 10)
+    sessions = literature_agent.literature_sessions = SessionAgents(
+        literature_agent.create_literature_agent, max_concurrent=args.max_concurrent,
+        idle_timeout=0 if evict else float("inf"), max_sessions=10 ** 9
+    )
+    rounds = []
+    tracemalloc.start()
+    for r in range(args.rounds):
+        # New sessions every round, several turns each, like users coming and going
+        await asyncio.gather(*(session_turns(f"round-{r}-session-{i}", args.turns) for i in range(args.sessions)))
+        sessions.evict_idle()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        rounds.append({"sessions": sessions.get_stats()["sessions"], "kb": current / 1024})
+    tracemalloc.stop()
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds before the stub model starts streaming')
+    parser.add_argument('--turns', type=int, default=3, help='Messages per session')
+    parser.add_argument('--max-concurrent', type=int, default=16, help='Global limit on concurrent model streams')
+    parser.add_argument('--sessions', type=int, default=20, help='New sessions per round in the memory run')
+    parser.add_argument('--rounds', type=int, default=8, help='Rounds in the memory run')
+    args = parser.parse_args()
+
+    print("Literature Agent Session Load Test")
+    print("=" * 50)
+    print(f"{'sessions':>8} {'turns':>6} {'seconds':>8} {'turns/s':>8} {'peak streams':>13}")
+    for sessions in (1, 2, 4, 8, 16, 32):
+        r = asyncio.run(run_throughput(sessions, args))
+        print(f"{sessions:>8} {r['turns']:>6} {r['seconds']:>8.2f} {r['throughput']:>8.2f} {r['peak']:>13}")
+    print("=" * 50)
+
+    evicted = asyncio.run(run_churn(True, args))
+    kept = asyncio.run(run_churn(False, args))
+    print()
+    print(f"Memory over {args.rounds} rounds of {args.sessions} new sessions")
+    print("=" * 50)
+    print(f"{'round':<6} {'evict idle: sessions':>20} {'KB':>8} {'keep all: sessions':>19} {'KB':>8}")
+    for i, (e, k) in enumerate(zip(evicted, kept), 1):
+        print(f"{i:<6} {e['sessions']:>20} {e['kb']:>8.0f} {k['sessions']:>19} {k['kb']:>8.0f}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
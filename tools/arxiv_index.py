@@ -0,0 +1,519 @@
+import os
+import re
+import json
+import math
+import mmap
+import heapq
+import argparse
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from tools.arxiv_search_tool import ArxivPaper, _clean
+from tools.link_relevance import load_sentence_transformer
+
+# Index format written to manifest.json
+INDEX_VERSION = 1
+
+# Papers per segment; each build or update writes one or more segments
+DEFAULT_SEGMENT_SIZE = 100_000
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# BM25 candidates considered per query before fusion with vector scores
+DEFAULT_CANDIDATES = 200
+
+# Up to this many papers, queries also scan all embeddings for vector-only matches;
+# larger indexes only rerank the BM25 candidates by embedding similarity
+VECTOR_SCAN_LIMIT = int(os.getenv("ARXIV_INDEX_VECTOR_SCAN_LIMIT", "100000"))
+
+# Reciprocal rank fusion constant
+RRF_K = 60
+
+# Texts encoded per forward pass when embedding abstracts
+EMBED_BATCH_SIZE = 64
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to we with "
+    "which our these can using based via into than not also".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stop words, as indexed by BM25"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOP_WORDS]
+
+
+def _record_from_metadata(raw: Dict) -> Optional[Dict]:
+    """Compact record of one entry of the arXiv metadata dump (Kaggle JSONL format)"""
+    arxiv_id = raw.get("id")
+    title = _clean(raw.get("title"))
+    if not arxiv_id or not title:
+        return None
+
+    if raw.get("authors_parsed"):
+        authors = [' '.join(p for p in (parts[1], parts[0]) if p) for parts in raw["authors_parsed"] if parts]
+    else:
+        authors = [a.strip() for a in re.split(r',|\band\b', _clean(raw.get("authors"))) if a.strip()]
+
+    # Submission date of the first version, falling back to the last update
+    published = raw.get("update_date") or ""
+    versions = raw.get("versions") or []
+    if versions and versions[0].get("created"):
+        try:
+            published = parsedate_to_datetime(versions[0]["created"]).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            pass
+
+    categories = (raw.get("categories") or "").split()
+    return {
+        "id": arxiv_id,
+        "title": title,
+        "authors": authors,
+        "published": published,
+        "category": categories[0] if categories else "",
+        "abstract": _clean(raw.get("abstract")),
+        # Changes when arXiv updates the entry; unchanged entries are skipped on update
+        "stamp": raw.get("update_date") or str(len(versions))
+    }
+
+
+def iter_metadata_dump(path: str) -> Iterator[Dict]:
+    """Records of an arXiv metadata dump, one JSON object per line"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = _record_from_metadata(json.loads(line))
+            except (ValueError, AttributeError, IndexError):
+                continue
+            if record is not None:
+                yield record
+
+
+def _date_number(published: str) -> int:
+    digits = published.replace("-", "")[:8]
+    return int(digits) if digits.isdigit() else 0
+
+
+class _Segment:
+    """One immutable, memory-mapped slice of the index"""
+
+    def __init__(self, path: str, base: int):
+        self.path = path
+        self.base = base
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self.doc_len = load("doc_len.npy")
+        self.dates = load("dates.npy")
+        self.term_offsets = load("term_offsets.npy")
+        self.post_docs = load("post_docs.npy")
+        self.post_tf = load("post_tf.npy")
+        self.record_offsets = load("record_offsets.npy")
+        self.deletes = load("deletes.npy")
+        emb_path = os.path.join(path, "embeddings.npy")
+        self.embeddings = np.load(emb_path, mmap_mode='r') if os.path.exists(emb_path) else None
+        self._records_file = open(os.path.join(path, "papers.jsonl"), "rb")
+        self._records = mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term_id + 1 >= len(self.term_offsets):
+            return self.post_docs[:0], self.post_tf[:0]
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return self.post_docs[start:end], self.post_tf[start:end]
+
+    def record(self, local_id: int) -> Dict:
+        start, end = self.record_offsets[local_id], self.record_offsets[local_id + 1]
+        return json.loads(self._records[start:end])
+
+    def close(self) -> None:
+        self._records.close()
+        self._records_file.close()
+
+
+class ArxivIndex:
+    """
+    Offline arXiv paper index built from the arXiv metadata dump.
+
+    Titles and abstracts are indexed in a BM25 inverted index; MiniLM abstract
+    embeddings (normalized float32) are stored alongside. All arrays are .npy
+    files opened memory-mapped, so opening an index is cheap and only the pages
+    a query touches are read. Updates append segments: a paper that reappears
+    with a newer update_date replaces its older copy, unchanged papers are skipped.
+
+    Queries rank the BM25 candidates and the embedding matches separately and
+    combine the two rankings with reciprocal rank fusion.
+    """
+
+    def __init__(self, directory: str, model=None):
+        self.directory = directory
+        self._model = model
+        self._model_loaded = model is not None
+        self._model_lock = threading.Lock()
+
+        manifest_path = os.path.join(directory, "manifest.json")
+        self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported arXiv index version: {self.manifest.get('version')}")
+
+        with open(os.path.join(directory, "vocab.json"), encoding="utf-8") as f:
+            self.vocab: Dict[str, int] = json.load(f)
+
+        self.segments: List[_Segment] = []
+        base = 0
+        for name in self.manifest["segments"]:
+            segment = _Segment(os.path.join(directory, name), base)
+            self.segments.append(segment)
+            base += len(segment)
+        self.num_docs = base
+
+        # Papers replaced by a newer copy in a later segment
+        self.live = np.ones(self.num_docs, dtype=bool)
+        for segment in self.segments:
+            self.live[np.asarray(segment.deletes, dtype=np.int64)] = False
+        self.num_live = int(self.live.sum())
+        self.avg_doc_len = self.manifest["total_doc_len"] / self.num_docs if self.num_docs else 0.0
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, "manifest.json"))
+
+    def is_stale(self) -> bool:
+        """True if the index on disk was updated after this instance was opened"""
+        try:
+            return os.stat(os.path.join(self.directory, "manifest.json")).st_mtime_ns != self._manifest_mtime
+        except OSError:
+            return True
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+
+    def _get_model(self):
+        with self._model_lock:
+            if not self._model_loaded:
+                self._model = load_sentence_transformer()
+                self._model_loaded = True
+        return self._model
+
+    def _segment_of(self, doc: int) -> _Segment:
+        for segment in reversed(self.segments):
+            if doc >= segment.base:
+                return segment
+        raise IndexError(doc)
+
+    def bm25(self, query: str, limit: int = DEFAULT_CANDIDATES) -> List[Tuple[int, float]]:
+        """Top `limit` (global doc id, BM25 score) pairs for a query"""
+        term_ids = [self.vocab[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocab]
+        if not term_ids or not self.num_docs:
+            return []
+
+        # Document frequency over all segments
+        df = {tid: 0 for tid in term_ids}
+        for segment in self.segments:
+            for tid in term_ids:
+                docs, _ = segment.postings(tid)
+                df[tid] += len(docs)
+
+        heap: List[Tuple[float, int]] = []
+        for segment in self.segments:
+            scores = None
+            for tid in term_ids:
+                docs, tf = segment.postings(tid)
+                if not len(docs):
+                    continue
+                if scores is None:
+                    scores = np.zeros(len(segment), dtype=np.float32)
+                idf = math.log(1 + (self.num_docs - df[tid] + 0.5) / (df[tid] + 0.5))
+                tf = tf.astype(np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doc_len[docs] / self.avg_doc_len)
+                scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            if scores is None:
+                continue
+
+            scores[~self.live[segment.base:segment.base + len(segment)]] = 0
+            matched = np.flatnonzero(scores)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(scores[matched], -limit)[-limit:]]
+            for local_id in matched:
+                item = (float(scores[local_id]), segment.base + int(local_id))
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        return [(doc, score) for score, doc in sorted(heap, reverse=True)]
+
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        if not any(segment.embeddings is not None for segment in self.segments):
+            return None
+        model = self._get_model()
+        if model is None:
+            return None
+        return np.asarray(model.encode([query], normalize_embeddings=True, show_progress_bar=False)[0],
+                          dtype=np.float32)
+
+    def _vector_scan(self, query_embedding: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        heap: List[Tuple[float, int]] = []
+        for segment in self.segments:
+            if segment.embeddings is None:
+                continue
+            live = self.live[segment.base:segment.base + len(segment)]
+            for start in range(0, len(segment), 65536):
+                chunk = segment.embeddings[start:start + 65536] @ query_embedding
+                chunk[~live[start:start + len(chunk)]] = -np.inf
+                top = np.argpartition(chunk, -min(limit, len(chunk)))[-limit:]
+                for local_id in top:
+                    item = (float(chunk[local_id]), segment.base + start + int(local_id))
+                    if item[0] == -np.inf:
+                        continue
+                    if len(heap) < limit:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+        return [(doc, score) for score, doc in sorted(heap, reverse=True)]
+
+    def _similarities(self, query_embedding: np.ndarray, docs: List[int]) -> List[Tuple[int, float]]:
+        scored = []
+        for doc in docs:
+            segment = self._segment_of(doc)
+            if segment.embeddings is not None:
+                scored.append((doc, float(segment.embeddings[doc - segment.base] @ query_embedding)))
+        return sorted(scored, key=lambda item: item[1], reverse=True)
+
+    def search_ids(self, query: str, limit: int = 10, candidates: int = DEFAULT_CANDIDATES) -> List[Tuple[int, float]]:
+        """Global doc ids of the best matches with their fused (RRF) scores"""
+        candidates = max(candidates, limit)
+        lexical = self.bm25(query, candidates)
+
+        query_embedding = self._embed_query(query)
+        if query_embedding is None:
+            return lexical[:limit]
+
+        if self.num_docs <= VECTOR_SCAN_LIMIT:
+            semantic = self._vector_scan(query_embedding, candidates)
+        else:
+            semantic = self._similarities(query_embedding, [doc for doc, _ in lexical])
+
+        fused: Dict[int, float] = {}
+        for ranking in (lexical, semantic):
+            for rank, (doc, _) in enumerate(ranking):
+                fused[doc] = fused.get(doc, 0.0) + 1.0 / (RRF_K + rank + 1)
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def _date_of(self, doc: int) -> int:
+        segment = self._segment_of(doc)
+        return int(segment.dates[doc - segment.base])
+
+    def record(self, doc: int) -> Dict:
+        """Stored metadata record of a global doc id"""
+        segment = self._segment_of(doc)
+        return segment.record(doc - segment.base)
+
+    def search(self, query: str, max_results: int = 5, sort_by: str = "relevance",
+               sort_order: str = "descending", candidates: int = DEFAULT_CANDIDATES) -> List[ArxivPaper]:
+        """Papers matching a query, in the same form and order options as the arXiv API search"""
+        if sort_by == "submittedDate":
+            # Newest (or oldest) among the relevant candidates
+            hits = self.search_ids(query, limit=candidates, candidates=candidates)
+            docs = [doc for doc, _ in hits]
+            docs.sort(key=self._date_of, reverse=(sort_order == "descending"))
+            docs = docs[:max_results]
+        else:
+            docs = [doc for doc, _ in self.search_ids(query, limit=max_results, candidates=candidates)]
+            if sort_order == "ascending":
+                docs.reverse()
+
+        return [_paper_from_record(self.record(doc)) for doc in docs]
+
+
+def _paper_from_record(record: Dict) -> ArxivPaper:
+    return ArxivPaper(
+        arxiv_id=record["id"],
+        title=record["title"],
+        authors=record["authors"],
+        year=record["published"][:4],
+        abstract=record["abstract"],
+        primary_category=record["category"],
+        pdf_url=f"https://arxiv.org/pdf/{record['id']}"
+    )
+
+
+def _write_json(path: str, data) -> None:
+    # Written next to the target and renamed, so readers never see a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _load_known_papers(directory: str, segments: List[str]) -> Dict[str, Tuple[int, str]]:
+    """arxiv id -> (global doc id, update stamp) of every paper already indexed"""
+    known = {}
+    doc = 0
+    for name in segments:
+        with open(os.path.join(directory, name, "ids.tsv"), encoding="utf-8") as f:
+            for line in f:
+                arxiv_id, stamp = line.rstrip("\n").split("\t")
+                known[arxiv_id] = (doc, stamp)
+                doc += 1
+    return known
+
+
+def _write_segment(path: str, records: List[Dict], deletes: List[int],
+                   vocab: Dict[str, int], model) -> int:
+    """Write one segment; returns the total token count of its documents"""
+    os.makedirs(path, exist_ok=True)
+
+    postings: Dict[int, List[Tuple[int, int]]] = {}
+    doc_len = np.zeros(len(records), dtype=np.uint32)
+    dates = np.zeros(len(records), dtype=np.int32)
+    record_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+
+    with open(os.path.join(path, "papers.jsonl"), "wb") as papers, \
+            open(os.path.join(path, "ids.tsv"), "w", encoding="utf-8") as ids:
+        for local_id, record in enumerate(records):
+            # Title terms count twice
+            tokens = tokenize(record["title"]) * 2 + tokenize(record["abstract"])
+            doc_len[local_id] = len(tokens)
+            dates[local_id] = _date_number(record["published"])
+
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                term_id = vocab.setdefault(token, len(vocab))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            for term_id, tf in counts.items():
+                postings.setdefault(term_id, []).append((local_id, min(tf, 65535)))
+
+            stored = {k: v for k, v in record.items() if k != "stamp"}
+            papers.write(json.dumps(stored, ensure_ascii=False).encode("utf-8") + b"\n")
+            record_offsets[local_id + 1] = papers.tell()
+            ids.write(f"{record['id']}\t{record['stamp']}\n")
+
+    # CSR layout over the global term ids known when the segment was written
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    for term_id, plist in postings.items():
+        term_offsets[term_id + 1] = len(plist)
+    np.cumsum(term_offsets, out=term_offsets)
+    post_docs = np.empty(int(term_offsets[-1]), dtype=np.uint32)
+    post_tf = np.empty(int(term_offsets[-1]), dtype=np.uint16)
+    for term_id, plist in postings.items():
+        start = term_offsets[term_id]
+        docs, tfs = zip(*plist)
+        post_docs[start:start + len(plist)] = docs
+        post_tf[start:start + len(plist)] = tfs
+
+    np.save(os.path.join(path, "doc_len.npy"), doc_len)
+    np.save(os.path.join(path, "dates.npy"), dates)
+    np.save(os.path.join(path, "record_offsets.npy"), record_offsets)
+    np.save(os.path.join(path, "term_offsets.npy"), term_offsets)
+    np.save(os.path.join(path, "post_docs.npy"), post_docs)
+    np.save(os.path.join(path, "post_tf.npy"), post_tf)
+    np.save(os.path.join(path, "deletes.npy"), np.asarray(sorted(set(deletes)), dtype=np.int64))
+
+    if model is not None:
+        # Filled batch by batch, so a segment's embeddings never sit in memory at once
+        dim = model.get_sentence_embedding_dimension()
+        embeddings = np.lib.format.open_memmap(os.path.join(path, "embeddings.npy"), mode="w+",
+                                               dtype=np.float32, shape=(len(records), dim))
+        for start in range(0, len(records), EMBED_BATCH_SIZE * 16):
+            batch = records[start:start + EMBED_BATCH_SIZE * 16]
+            texts = [f"{r['title']}. {r['abstract']}" for r in batch]
+            embeddings[start:start + len(batch)] = model.encode(
+                texts, batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True, show_progress_bar=False
+            )
+        embeddings.flush()
+        del embeddings
+
+    return int(doc_len.sum())
+
+
+def update_index(directory: str, dump_paths: Iterable[str], segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 embed: bool = True, model=None) -> Dict[str, int]:
+    """
+    Build an index, or add the new and updated papers of newer dump files to an existing one.
+
+    Returns counts of added, replaced and unchanged (skipped) papers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, "manifest.json")
+    vocab_path = os.path.join(directory, "vocab.json")
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        with open(vocab_path, encoding="utf-8") as f:
+            vocab = json.load(f)
+    else:
+        manifest = {"version": INDEX_VERSION, "segments": [], "num_docs": 0, "total_doc_len": 0}
+        vocab = {}
+
+    if embed and model is None:
+        model = load_sentence_transformer()
+
+    known = _load_known_papers(directory, manifest["segments"])
+    counts = {"added": 0, "replaced": 0, "unchanged": 0}
+    pending: List[Dict] = []
+    deletes: List[int] = []
+
+    def flush():
+        name = f"seg-{len(manifest['segments']):05d}"
+        total_len = _write_segment(os.path.join(directory, name), pending, deletes, vocab, model)
+        manifest["segments"].append(name)
+        manifest["num_docs"] += len(pending)
+        manifest["total_doc_len"] += total_len
+        # Vocabulary first: a segment may reference new term ids
+        _write_json(vocab_path, vocab)
+        _write_json(manifest_path, manifest)
+        print(f"📦 Wrote {name}: {len(pending)} papers, {len(deletes)} replaced")
+        pending.clear()
+        deletes.clear()
+
+    for path in dump_paths:
+        for record in iter_metadata_dump(path):
+            previous = known.get(record["id"])
+            if previous is not None:
+                if previous[1] == record["stamp"]:
+                    counts["unchanged"] += 1
+                    continue
+                deletes.append(previous[0])
+                counts["replaced"] += 1
+            else:
+                counts["added"] += 1
+
+            known[record["id"]] = (manifest["num_docs"] + len(pending), record["stamp"])
+            pending.append(record)
+            if len(pending) >= segment_size:
+                flush()
+
+    if pending:
+        flush()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the offline arXiv index from metadata dumps")
+    parser.add_argument('index_dir', help='Index directory (created if missing)')
+    parser.add_argument('dumps', nargs='+', help='arXiv metadata dump files (JSONL), oldest first')
+    parser.add_argument('--segment-size', type=int, default=DEFAULT_SEGMENT_SIZE, help='Papers per segment')
+    parser.add_argument('--no-embeddings', action='store_true', help='Build the BM25 index only')
+    args = parser.parse_args()
+
+    counts = update_index(args.index_dir, args.dumps, segment_size=args.segment_size, embed=not args.no_embeddings)
+    print(f"✅ {counts['added']} added, {counts['replaced']} replaced, {counts['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    main()
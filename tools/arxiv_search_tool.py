@@ -1,18 +1,161 @@
+import os
+import re
+import httpx
+import asyncio
+import weakref
 import requests
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
 from duckduckgo_search import DDGS
-from typing import Dict, Any, List, Optional, Union
-from keybert import KeyBERT
+from typing import Dict, Any, List, Optional
+from duckduckgo_search.exceptions import DuckDuckGoSearchException, RatelimitException
+from tools.search_cache import SearchCache, normalize_query
+from tools.rate_limiter import RetryableError, UpstreamLimiter, UpstreamUnavailable, parse_retry_after
 
-kw_model = KeyBERT()
+# Atom feed namespaces used by the arXiv API
+ARXIV_NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+
+# Abstract length (characters) kept in tool results
+DEFAULT_ABSTRACT_CHARS = 400
+
+# Authors listed per paper before "et al."
+MAX_AUTHORS = 3
+
+_ARXIV_ID_RE = re.compile(r'arxiv\.org/abs/(.+?)(v\d+)?$')
+
+# Shared search result caches: identical searches within the TTL (seconds) are served
+# from memory, and concurrent identical searches share one request
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+arxiv_cache = SearchCache(ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_SIZE)
+web_cache = SearchCache(ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_SIZE)
+
+# Connection reuse for arXiv API calls
+_arxiv_session = requests.Session()
+
+# DDGS clients are reused per thread (tool calls run in worker threads)
+_ddgs_local = threading.local()
+
+# Async tools: request timeout (seconds) and concurrent requests per search backend
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "30"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+
+# Pooled client and concurrency limits of the async tools, one set per event loop
+_async_state = weakref.WeakKeyDictionary()
+
+# Outbound limits per upstream (requests per second); arXiv asks for at most one request every 3 seconds
+ARXIV_RATE_LIMIT = float(os.getenv("ARXIV_RATE_LIMIT", "0.34"))
+WEB_RATE_LIMIT = float(os.getenv("WEB_RATE_LIMIT", "1"))
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+arxiv_limiter = UpstreamLimiter("arXiv", rate=ARXIV_RATE_LIMIT, burst=1, max_retries=SEARCH_MAX_RETRIES)
+web_limiter = UpstreamLimiter("DuckDuckGo", rate=WEB_RATE_LIMIT, burst=2, max_retries=SEARCH_MAX_RETRIES)
+
+# Offline arXiv index (built with `python -m tools.arxiv_index`); when present, searches use it instead of the API
+ARXIV_INDEX_DIR = os.getenv("ARXIV_INDEX_DIR")
+_local_index = None
+_local_index_lock = threading.Lock()
+# Searches running on each open index; a replaced index is closed when its last search ends
+_local_index_users: Dict[Any, int] = {}
+
+class SearchError(Exception):
+    """A search request failed; not cached, so the next call retries"""
+
+# KeyBERT model, created on first keyword extraction rather than at import
+_kw_model = None
+_kw_model_lock = threading.Lock()
+
+def get_keyword_model():
+    """Return the shared KeyBERT model, built on the document agent's sentence-transformer"""
+    global _kw_model
+    if _kw_model is None:
+        with _kw_model_lock:
+            if _kw_model is None:
+                from keybert import KeyBERT
+                # Imported here: document_agent imports this module
+                from agents.document_agent import EmbeddingsManager
+                _kw_model = KeyBERT(model=EmbeddingsManager.get_sentence_transformer())
+    return _kw_model
 
 def extract_main_topic(query: str):
-    keywords = kw_model.extract_keywords(query, keyphrase_ngram_range=(1, 3), stop_words='english')
+    keywords = get_keyword_model().extract_keywords(query, keyphrase_ngram_range=(1, 3), stop_words='english')
     # keywords like [('deep learning', 0.89), ('impactful', 0.35)]
     if keywords:
         return keywords[0][0]
     return query
 
-def query_arxiv(query: str, max_results: int = 5, sort_by: str = "relevance", sort_order: str = "descending"):
+@dataclass
+class ArxivPaper:
+    """Compact record of one arXiv search result"""
+    arxiv_id: str
+    title: str
+    authors: List[str]
+    year: str
+    abstract: str
+    primary_category: str
+    pdf_url: str
+
+def _clean(text: Optional[str]) -> str:
+    """Collapse the line breaks and indentation arXiv puts in titles and abstracts"""
+    return ' '.join(text.split()) if text else ""
+
+def truncate_text(text: str, limit: int) -> str:
+    """Cut text to at most `limit` characters at a word boundary"""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(' ', 1)[0]
+    return cut.rstrip(' ,;:.') + "…"
+
+def parse_arxiv_feed(feed_xml: str, abstract_chars: int = DEFAULT_ABSTRACT_CHARS) -> List[ArxivPaper]:
+    """Parse an arXiv API Atom feed into compact paper records"""
+    root = ET.fromstring(feed_xml)
+    papers = []
+    
+    for entry in root.findall("atom:entry", ARXIV_NAMESPACES):
+        entry_id = _clean(entry.findtext("atom:id", "", ARXIV_NAMESPACES))
+        match = _ARXIV_ID_RE.search(entry_id)
+        # Error feeds contain a single entry without a paper id
+        if not match:
+            continue
+        arxiv_id = match.group(1)
+        
+        pdf_url = f"https://arxiv.org/pdf/{arxiv_id}"
+        for link in entry.findall("atom:link", ARXIV_NAMESPACES):
+            if link.get("title") == "pdf" and link.get("href"):
+                pdf_url = link.get("href").replace("http://", "https://")
+        
+        category = entry.find("arxiv:primary_category", ARXIV_NAMESPACES)
+        
+        papers.append(ArxivPaper(
+            arxiv_id=arxiv_id,
+            title=_clean(entry.findtext("atom:title", "", ARXIV_NAMESPACES)),
+            authors=[_clean(name.text) for name in entry.findall("atom:author/atom:name", ARXIV_NAMESPACES)],
+            year=entry.findtext("atom:published", "", ARXIV_NAMESPACES)[:4],
+            abstract=truncate_text(_clean(entry.findtext("atom:summary", "", ARXIV_NAMESPACES)), abstract_chars),
+            primary_category=category.get("term", "") if category is not None else "",
+            pdf_url=pdf_url
+        ))
+    
+    return papers
+
+def format_papers(papers: List[ArxivPaper], max_authors: int = MAX_AUTHORS, abstract_chars: int = 0) -> str:
+    """Render paper records as dense plain text: a header line and the (truncated) abstract per paper"""
+    lines = []
+    for i, paper in enumerate(papers, 1):
+        authors = ", ".join(paper.authors[:max_authors])
+        if len(paper.authors) > max_authors:
+            authors += " et al."
+        lines.append(f"[{i}] {paper.title} | {authors} | {paper.year} | {paper.primary_category} "
+                     f"| arXiv:{paper.arxiv_id} | {paper.pdf_url}")
+        if paper.abstract:
+            lines.append(truncate_text(paper.abstract, abstract_chars))
+    return "\n".join(lines)
+
+def query_arxiv(query: str, max_results: int = 5, sort_by: str = "relevance", sort_order: str = "descending",
+                abstract_chars: int = DEFAULT_ABSTRACT_CHARS):
     """
     Query the arXiv API for papers on a specific topic with sorting options.
     
@@ -21,31 +164,238 @@ def query_arxiv(query: str, max_results: int = 5, sort_by: str = "relevance", so
     - max_results: Maximum number of results to return (default: 5)
     - sort_by: Sorting field ("relevance" or "submittedDate") (default: "relevance")
     - sort_order: Sorting direction ("ascending" or "descending") (default: "descending")
+    - abstract_chars: Characters of each abstract to keep, 0 for the full abstract (default: 400)
     
     Returns:
-    - XML response as string, or error message
+    - One compact record per paper (title | authors | year | category | arXiv id | PDF link,
+      then the abstract), or error message
     """
-    valid_sort_by = ["relevance", "submittedDate"]
-    valid_sort_order = ["ascending", "descending"]
-
     print(f"Querying arXiv for: {query}")
     topic = extract_main_topic(query)
     print(f"Extracted topic: {topic}")
     
+    error = _check_sort_options(sort_by, sort_order)
+    if error:
+        return error
+    
+    # Full abstracts are cached; truncation happens per call
+    key = (normalize_query(topic), max_results, sort_by, sort_order)
+    try:
+        papers = arxiv_cache.get_or_compute(key, lambda: fetch_arxiv_papers(topic, max_results, sort_by, sort_order))
+    except SearchError as e:
+        return str(e)
+    
+    return _format_arxiv_results(topic, papers, abstract_chars)
+
+async def query_arxiv_async(query: str, max_results: int = 5, sort_by: str = "relevance",
+                            sort_order: str = "descending", abstract_chars: int = DEFAULT_ABSTRACT_CHARS):
+    """
+    Query the arXiv API for papers on a specific topic with sorting options, without blocking the event loop.
+    
+    Parameters:
+    - topic: Search topic
+    - max_results: Maximum number of results to return (default: 5)
+    - sort_by: Sorting field ("relevance" or "submittedDate") (default: "relevance")
+    - sort_order: Sorting direction ("ascending" or "descending") (default: "descending")
+    - abstract_chars: Characters of each abstract to keep, 0 for the full abstract (default: 400)
+    
+    Returns:
+    - One compact record per paper (title | authors | year | category | arXiv id | PDF link,
+      then the abstract), or error message
+    """
+    print(f"Querying arXiv for: {query}")
+    # Keyword extraction runs the embedding model: keep it off the event loop
+    topic = await asyncio.to_thread(extract_main_topic, query)
+    print(f"Extracted topic: {topic}")
+    
+    error = _check_sort_options(sort_by, sort_order)
+    if error:
+        return error
+    
+    try:
+        papers = await search_arxiv_papers_async(topic, max_results, sort_by, sort_order)
+    except SearchError as e:
+        return str(e)
+    
+    return _format_arxiv_results(topic, papers, abstract_chars)
+
+async def search_arxiv_papers_async(topic: str, max_results: int = 5, sort_by: str = "relevance",
+                                    sort_order: str = "descending") -> List[ArxivPaper]:
+    """Cached arXiv search for an already extracted topic, returning paper records; raises SearchError"""
+    key = (normalize_query(topic), max_results, sort_by, sort_order)
+    return await arxiv_cache.get_or_compute_async(
+        key, lambda: fetch_arxiv_papers_async(topic, max_results, sort_by, sort_order)
+    )
+
+def _check_sort_options(sort_by: str, sort_order: str) -> Optional[str]:
+    valid_sort_by = ["relevance", "submittedDate"]
+    valid_sort_order = ["ascending", "descending"]
+    
     if sort_by not in valid_sort_by:
         return f"Invalid sort_by parameter. Must be one of: {', '.join(valid_sort_by)}"
     
     if sort_order not in valid_sort_order:
         return f"Invalid sort_order parameter. Must be one of: {', '.join(valid_sort_order)}"
     
+    return None
+
+def _format_arxiv_results(topic: str, papers: List[ArxivPaper], abstract_chars: int) -> str:
+    if not papers:
+        return f"No arXiv papers found for: {topic}"
+    
+    return format_papers(papers, abstract_chars=abstract_chars)
+
+def _arxiv_query_url(topic: str, max_results: int, sort_by: str, sort_order: str) -> str:
     url = f"http://export.arxiv.org/api/query?search_query=all:{topic}&start=0&max_results={max_results}"
     url += f"&sortBy={sort_by}&sortOrder={sort_order}"
+    return url
+
+def _parse_arxiv_response(status_code: int, headers, text: str) -> List[ArxivPaper]:
+    if status_code in (429, 503):
+        raise RetryableError(f"HTTP {status_code}", throttled=True, retry_after=parse_retry_after(headers.get("Retry-After")))
+    if status_code >= 500:
+        raise RetryableError(f"HTTP {status_code}")
+    if status_code != 200:
+        raise SearchError(f"Failed to fetch arXiv data (HTTP {status_code})")
+    
+    try:
+        return parse_arxiv_feed(text, abstract_chars=0)
+    except ET.ParseError:
+        raise SearchError("Failed to parse arXiv data")
+
+def _refresh_local_index():
+    """Open or reopen the offline index; called with _local_index_lock held"""
+    global _local_index
+    from tools.arxiv_index import ArxivIndex
+    if _local_index is None or _local_index.is_stale():
+        if not ArxivIndex.exists(ARXIV_INDEX_DIR):
+            return None
+        previous, _local_index = _local_index, ArxivIndex(ARXIV_INDEX_DIR)
+        # A replaced index still searched elsewhere is closed by its last search
+        if previous is not None and not _local_index_users.get(previous):
+            previous.close()
+        # Results cached from the previous index version may be outdated
+        arxiv_cache.clear()
+    return _local_index
+
+def get_local_arxiv_index():
+    """
+    The offline index at ARXIV_INDEX_DIR (reopened after it is updated), or None if there is none.
+    
+    The returned index is closed once a later update replaces it; searches go
+    through search_local_index, which keeps it open while they run.
+    """
+    if not ARXIV_INDEX_DIR:
+        return None
+    with _local_index_lock:
+        return _refresh_local_index()
+
+def search_local_index(topic: str, max_results: int, sort_by: str, sort_order: str) -> Optional[List[ArxivPaper]]:
+    """Search the offline index, or None if no index is configured"""
+    if not ARXIV_INDEX_DIR:
+        return None
+    with _local_index_lock:
+        index = _refresh_local_index()
+        if index is None:
+            return None
+        _local_index_users[index] = _local_index_users.get(index, 0) + 1
+    try:
+        return index.search(topic, max_results=max_results, sort_by=sort_by, sort_order=sort_order)
+    finally:
+        with _local_index_lock:
+            _local_index_users[index] -= 1
+            if not _local_index_users[index]:
+                del _local_index_users[index]
+                if index is not _local_index:
+                    index.close()
+
+def fetch_arxiv_papers(topic: str, max_results: int, sort_by: str, sort_order: str) -> List[ArxivPaper]:
+    """Run one arXiv search (uncached) and parse the results with full abstracts"""
+    papers = search_local_index(topic, max_results, sort_by, sort_order)
+    if papers is not None:
+        return papers
+    
+    url = _arxiv_query_url(topic, max_results, sort_by, sort_order)
+    
+    def attempt():
+        try:
+            response = _arxiv_session.get(url, timeout=SEARCH_TIMEOUT)
+        except requests.RequestException as e:
+            raise RetryableError(type(e).__name__)
+        return _parse_arxiv_response(response.status_code, response.headers, response.text)
+    
+    try:
+        return arxiv_limiter.call(attempt)
+    except UpstreamUnavailable as e:
+        raise SearchError(f"Failed to fetch arXiv data: {e}")
+
+async def fetch_arxiv_papers_async(topic: str, max_results: int, sort_by: str, sort_order: str) -> List[ArxivPaper]:
+    """Async fetch_arxiv_papers on the pooled HTTP client, at most SEARCH_MAX_CONCURRENCY requests at a time"""
+    if ARXIV_INDEX_DIR:
+        papers = await asyncio.to_thread(search_local_index, topic, max_results, sort_by, sort_order)
+        if papers is not None:
+            return papers
+    
+    state = _get_async_state()
+    url = _arxiv_query_url(topic, max_results, sort_by, sort_order)
     
-    response = requests.get(url)
-    if response.status_code != 200:
-        return "Failed to fetch arXiv data"
+    async def attempt():
+        try:
+            async with state.arxiv_slots:
+                response = await state.client.get(url)
+        except httpx.HTTPError as e:
+            raise RetryableError(type(e).__name__)
+        # Parsing is CPU work; a feed of a few dozen entries is fast enough to stay on the loop
+        return _parse_arxiv_response(response.status_code, response.headers, response.text)
+    
+    try:
+        return await arxiv_limiter.call_async(attempt)
+    except UpstreamUnavailable as e:
+        raise SearchError(f"Failed to fetch arXiv data: {e}")
+
+class _AsyncSearchState:
+    """Pooled HTTP client and concurrency limits of the async search tools on one event loop"""
     
-    return response.text
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=SEARCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=SEARCH_MAX_CONCURRENCY,
+                max_keepalive_connections=SEARCH_MAX_CONCURRENCY,
+                keepalive_expiry=60
+            )
+        )
+        self.arxiv_slots = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+        self.web_slots = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+
+def _get_async_state() -> _AsyncSearchState:
+    # Clients and semaphores are bound to the loop they are first used on
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        state = _async_state[loop] = _AsyncSearchState()
+    return state
+
+async def close_async_search_clients() -> None:
+    """Close the pooled HTTP client of the running event loop (e.g. on application shutdown)"""
+    state = _async_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state.client.aclose()
+
+def get_search_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss/coalescing counters and hit rates of the arXiv and web search caches"""
+    return {"arxiv": arxiv_cache.get_stats(), "web": web_cache.get_stats()}
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue wait, throttling, retry and circuit breaker counters of the arXiv and web limiters"""
+    return {"arxiv": arxiv_limiter.get_stats(), "web": web_limiter.get_stats()}
+
+def _get_ddgs() -> DDGS:
+    ddgs = getattr(_ddgs_local, "client", None)
+    if ddgs is None:
+        ddgs = _ddgs_local.client = DDGS()
+    return ddgs
 
 def query_web(
     query: str,
@@ -73,7 +423,7 @@ def query_web(
         return_full_results (bool): Return full result objects instead of just URLs
         
     Returns:
-        list: List of URLs or full result objects
+        list: List of URLs or full result objects, or an error message (str) if the search failed
         
     Examples:
         # Basic search
@@ -94,6 +444,65 @@ def query_web(
             time_filter="w"
         )
     """
+    advanced_query, search_params = _build_web_search(
+        query, max_results, time_filter, site_specific, file_type, exclude_terms, include_keywords
+    )
+    key = (normalize_query(advanced_query), search_type, search_params.get("timelimit"), max_results)
+    
+    try:
+        results = web_cache.get_or_compute(key, lambda: web_limiter.call(lambda: _run_web_search(search_type, search_params)))
+        return _web_results(results, search_type, return_full_results)
+    except Exception as e:
+        # Reported to the agent, so a failed search is not mistaken for "no results"
+        print(f"Search error: {str(e)}")
+        return f"Web search failed: {e}"
+
+async def query_web_async(
+    query: str,
+    max_results: int = 5,
+    search_type: str = "text",
+    time_filter: str = None,
+    site_specific: str = None,
+    file_type: str = None,
+    exclude_terms: list = None,
+    include_keywords: list = None,
+    return_full_results: bool = False
+):
+    """
+    Web search using DuckDuckGo, without blocking the event loop.
+    
+    Args:
+        query (str): Main search query
+        max_results (int): Maximum number of results to return
+        search_type (str): Type of search - "text", "news", "images", or "videos"
+        time_filter (str): Time filter - "d" (day), "w" (week), "m" (month), "y" (year)
+        site_specific (str): Limit search to specific site (e.g., "arxiv.org")
+        file_type (str): Filter by file type (e.g., "pdf", "doc")
+        exclude_terms (list): Terms to exclude from search
+        include_keywords (list): Additional keywords to include
+        return_full_results (bool): Return full result objects instead of just URLs
+        
+    Returns:
+        list: List of URLs or full result objects, or an error message (str) if the search failed
+    """
+    advanced_query, search_params = _build_web_search(
+        query, max_results, time_filter, site_specific, file_type, exclude_terms, include_keywords
+    )
+    key = (normalize_query(advanced_query), search_type, search_params.get("timelimit"), max_results)
+    
+    async def attempt():
+        # DDGS has no async API: run it in a worker thread, bounded like the arXiv requests
+        async with _get_async_state().web_slots:
+            return await asyncio.to_thread(_run_web_search, search_type, search_params)
+    
+    try:
+        results = await web_cache.get_or_compute_async(key, lambda: web_limiter.call_async(attempt))
+        return _web_results(results, search_type, return_full_results)
+    except Exception as e:
+        print(f"Search error: {str(e)}")
+        return f"Web search failed: {e}"
+
+def _build_web_search(query, max_results, time_filter, site_specific, file_type, exclude_terms, include_keywords):
     advanced_query = query
     
     if site_specific:
@@ -119,8 +528,11 @@ def query_web(
     if time_filter in ["d", "w", "m", "y"]:
         search_params["timelimit"] = time_filter
     
-    # Initialize DuckDuckGo search client
-    ddgs = DDGS()
+    return advanced_query, search_params
+
+def _run_web_search(search_type: str, search_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Reuse this thread's DuckDuckGo search client
+    ddgs = _get_ddgs()
     
     # Select the appropriate search method
     if search_type == "images":
@@ -133,19 +545,22 @@ def query_web(
         search_method = ddgs.text
     
     try:
-        results = list(search_method(**search_params))
-        
-        if return_full_results:
-            return results
-        else:
-            # Handle different result formats
-            if search_type == "text" or search_type == "news":
-                return [r.get("href", "") for r in results]
-            elif search_type == "images" or search_type == "videos":
-                return [r.get("image", r.get("url", "")) for r in results]
-            
-    except Exception as e:
-        print(f"Search error: {str(e)}")
-        return []
+        return list(search_method(**search_params))
+    except RatelimitException:
+        raise RetryableError("rate limited", throttled=True)
+    except DuckDuckGoSearchException as e:
+        # Timeouts and HTTP errors of the search backend
+        raise RetryableError(str(e) or type(e).__name__)
+
+def _web_results(results: List[Dict[str, Any]], search_type: str, return_full_results: bool) -> list:
+    if return_full_results:
+        # Copies, so callers cannot modify cached results
+        return [dict(r) for r in results]
+    
+    # Handle different result formats
+    if search_type == "text" or search_type == "news":
+        return [r.get("href", "") for r in results]
+    elif search_type == "images" or search_type == "videos":
+        return [r.get("image", r.get("url", "")) for r in results]
     
-    return []
\ No newline at end of file
+    return []
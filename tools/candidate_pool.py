@@ -0,0 +1,149 @@
+import re
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from tools.arxiv_search_tool import (
+    ArxivPaper, SearchError, extract_main_topic, query_web_async, search_arxiv_papers_async, truncate_text
+)
+
+# Candidates retrieved per source for the shared judge pool
+POOL_RELEVANT_PAPERS = 10
+POOL_RECENT_PAPERS = 5
+POOL_WEB_RESULTS = 8
+
+# Abstract characters per candidate shown to the judges
+POOL_ABSTRACT_CHARS = 300
+
+_ARXIV_URL_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/([^\s?#]+?)(?:v\d+)?(?:\.pdf)?$')
+_TITLE_KEY_RE = re.compile(r'[^a-z0-9]+')
+
+
+@dataclass
+class Candidate:
+    """One paper in the shared candidate pool"""
+    id: str
+    title: str
+    abstract: str
+    url: str
+    authors: List[str] = field(default_factory=list)
+    year: str = ""
+    arxiv_id: Optional[str] = None
+    sources: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "title": self.title, "abstract": self.abstract, "link": self.url}
+
+
+def title_key(title: str) -> str:
+    """Normalized title used to recognize the same paper across sources"""
+    return _TITLE_KEY_RE.sub(' ', title.lower()).strip()
+
+
+def arxiv_id_from_url(url: str) -> Optional[str]:
+    """The arXiv id of an arxiv.org abs/pdf link, without version"""
+    match = _ARXIV_URL_RE.search(url or "")
+    return match.group(1) if match else None
+
+
+def _candidate_from_paper(paper: ArxivPaper, source: str) -> Candidate:
+    return Candidate(
+        id="", title=paper.title, abstract=paper.abstract, url=f"https://arxiv.org/abs/{paper.arxiv_id}",
+        authors=paper.authors, year=paper.year, arxiv_id=paper.arxiv_id, sources=[source]
+    )
+
+
+def _candidate_from_web_result(result: Dict[str, Any], source: str) -> Optional[Candidate]:
+    url = result.get("href") or result.get("url") or ""
+    title = result.get("title") or ""
+    if not url or not title:
+        return None
+    return Candidate(
+        id="", title=title, abstract=result.get("body") or "", url=url,
+        arxiv_id=arxiv_id_from_url(url), sources=[source]
+    )
+
+
+def dedup_candidates(candidates: List[Candidate]) -> List[Candidate]:
+    """Merge candidates that are the same paper (same arXiv id or same normalized title), keeping first-seen order"""
+    merged: List[Candidate] = []
+    by_key: Dict[str, Candidate] = {}
+    for candidate in candidates:
+        keys = [f"title:{title_key(candidate.title)}"]
+        if candidate.arxiv_id:
+            keys.append(f"arxiv:{candidate.arxiv_id}")
+
+        existing = next((by_key[k] for k in keys if k in by_key), None)
+        if existing is None:
+            merged.append(candidate)
+            existing = candidate
+        else:
+            existing.sources.extend(s for s in candidate.sources if s not in existing.sources)
+            # arXiv records carry the full abstract; web results only a snippet
+            if len(candidate.abstract) > len(existing.abstract):
+                existing.abstract = candidate.abstract
+            existing.arxiv_id = existing.arxiv_id or candidate.arxiv_id
+        for key in keys:
+            by_key.setdefault(key, existing)
+
+    for i, candidate in enumerate(merged, 1):
+        candidate.id = f"P{i}"
+    return merged
+
+
+async def build_candidate_pool(query: str) -> List[Candidate]:
+    """
+    Retrieve one deduplicated candidate pool for all judges.
+
+    Runs the searches the judges would otherwise run separately, concurrently and once:
+    the most relevant arXiv papers, the most recent ones, and web results for
+    well-cited work on the topic. A failing source only shrinks the pool.
+    """
+    topic = await asyncio.to_thread(extract_main_topic, query)
+    print(f"📚 Building candidate pool for: {topic}")
+
+    relevant, recent, web = await asyncio.gather(
+        search_arxiv_papers_async(topic, POOL_RELEVANT_PAPERS, "relevance", "descending"),
+        search_arxiv_papers_async(topic, POOL_RECENT_PAPERS, "submittedDate", "descending"),
+        query_web_async(f"{topic} highly cited paper", max_results=POOL_WEB_RESULTS, return_full_results=True),
+        return_exceptions=True
+    )
+
+    candidates: List[Candidate] = []
+    for source, papers in (("arxiv_relevance", relevant), ("arxiv_recent", recent)):
+        if isinstance(papers, SearchError):
+            print(f"⚠️ Warning: {source} search failed: {papers}")
+        elif isinstance(papers, BaseException):
+            raise papers
+        else:
+            candidates.extend(_candidate_from_paper(paper, source) for paper in papers)
+
+    if isinstance(web, BaseException):
+        raise web
+    if isinstance(web, str):
+        print(f"⚠️ Warning: {web}")
+    else:
+        for result in web:
+            candidate = _candidate_from_web_result(result, "web")
+            if candidate is not None:
+                candidates.append(candidate)
+
+    pool = dedup_candidates(candidates)
+    print(f"📚 Candidate pool: {len(pool)} papers ({len(candidates) - len(pool)} duplicates merged)")
+    return pool
+
+
+def format_candidate_pool(candidates: List[Candidate], abstract_chars: int = POOL_ABSTRACT_CHARS) -> str:
+    """Compact text listing of the pool for the judges: id, title, authors, year, link and abstract"""
+    lines = []
+    for candidate in candidates:
+        header = f"[{candidate.id}] {candidate.title}"
+        if candidate.authors:
+            authors = ", ".join(candidate.authors[:3]) + (" et al." if len(candidate.authors) > 3 else "")
+            header += f" | {authors}"
+        if candidate.year:
+            header += f" | {candidate.year}"
+        lines.append(f"{header} | {candidate.url}")
+        if candidate.abstract:
+            lines.append(truncate_text(candidate.abstract, abstract_chars))
+    return "\n".join(lines)
@@ -0,0 +1,155 @@
+import os
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+# Default SQLite file holding all checkpointed crawls: None resolves to CRAWL_CHECKPOINT_PATH,
+# or ./crawl_checkpoints.sqlite3, when a checkpoint is opened (see default_checkpoint_path)
+DEFAULT_CHECKPOINT_PATH = None
+
+# Node states: queued in the frontier, fully processed, or a back-edge to an already visited URL
+PENDING = 'pending'
+DONE = 'done'
+STUB = 'stub'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl_id TEXT PRIMARY KEY,
+    start_url TEXT NOT NULL,
+    max_depth INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    crawl_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    parent_url TEXT,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    record TEXT,
+    PRIMARY KEY (crawl_id, seq)
+);
+CREATE INDEX IF NOT EXISTS nodes_status ON nodes (crawl_id, status);
+"""
+
+
+def default_checkpoint_path() -> str:
+    """Checkpoint file used when none is given, resolved at call time"""
+    return os.getenv("CRAWL_CHECKPOINT_PATH") or os.path.join(os.getcwd(), "crawl_checkpoints.sqlite3")
+
+
+class CrawlCheckpoint:
+    """
+    SQLite-backed crawl state so an interrupted crawl can resume where it stopped.
+
+    Every node discovered by the crawl gets a row, in discovery order, keyed by
+    crawl_id. Pending rows are the frontier, pending and done rows together
+    are the visited set, and done rows hold the completed page records.
+    A page and the links it discovered are committed in one transaction.
+    """
+
+    def __init__(self, crawl_id: str, path: Optional[str] = DEFAULT_CHECKPOINT_PATH):
+        self.crawl_id = crawl_id
+        self.path = path = path or default_checkpoint_path()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+        row = self.conn.execute(
+            "SELECT COALESCE(MAX(seq), -1) FROM nodes WHERE crawl_id = ?", (crawl_id,)
+        ).fetchone()
+        self._next_seq = row[0] + 1
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the stored crawl settings, or None if this crawl_id is unknown"""
+        row = self.conn.execute(
+            "SELECT start_url, max_depth, completed FROM crawls WHERE crawl_id = ?", (self.crawl_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"start_url": row[0], "max_depth": row[1], "completed": bool(row[2])}
+
+    def start(self, start_url: str, max_depth: int) -> None:
+        """Register a new crawl and queue its start URL"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO crawls (crawl_id, start_url, max_depth, created_at) VALUES (?, ?, ?, ?)",
+                (self.crawl_id, start_url, max_depth, time.time())
+            )
+            self._insert(start_url, None, 0, PENDING)
+
+    def complete(self, url: str, record: Dict[str, Any], children: List[Tuple[str, str, int]],
+                 stubs: List[Tuple[str, str, int]]) -> None:
+        """Atomically store a finished page together with the child links it queued"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE nodes SET status = ?, record = ? WHERE crawl_id = ? AND url = ? AND status = ?",
+                (DONE, json.dumps(record, ensure_ascii=False), self.crawl_id, url, PENDING)
+            )
+            for child_url, parent_url, depth in children:
+                self._insert(child_url, parent_url, depth, PENDING)
+            for stub_url, parent_url, depth in stubs:
+                self._insert(stub_url, parent_url, depth, STUB)
+
+    def mark_completed(self) -> None:
+        """Flag the crawl as finished"""
+        with self.conn:
+            self.conn.execute("UPDATE crawls SET completed = 1 WHERE crawl_id = ?", (self.crawl_id,))
+
+    def pending(self) -> List[Tuple[str, Optional[str], int]]:
+        """Frontier entries (url, parent_url, depth) in discovery order"""
+        return self.conn.execute(
+            "SELECT url, parent_url, depth FROM nodes WHERE crawl_id = ? AND status = ? ORDER BY seq",
+            (self.crawl_id, PENDING)
+        ).fetchall()
+
+    def visited_urls(self) -> Iterator[str]:
+        """All URLs that were queued or processed (the visited set)"""
+        for (url,) in self.conn.execute(
+            "SELECT url FROM nodes WHERE crawl_id = ? AND status != ?", (self.crawl_id, STUB)
+        ):
+            yield url
+
+    def nodes(self) -> Iterator[Tuple[str, Optional[str], int, str, Optional[Dict[str, Any]]]]:
+        """Every node (url, parent_url, depth, status, record) in discovery order"""
+        for url, parent_url, depth, status, record in self.conn.execute(
+            "SELECT url, parent_url, depth, status, record FROM nodes WHERE crawl_id = ? ORDER BY seq",
+            (self.crawl_id,)
+        ):
+            yield url, parent_url, depth, status, json.loads(record) if record else None
+
+    @classmethod
+    def unfinished_crawls(cls, path: Optional[str] = DEFAULT_CHECKPOINT_PATH) -> List[Dict[str, Any]]:
+        """Crawls in a checkpoint file that have not completed, oldest first, with their pending URL counts"""
+        path = path or default_checkpoint_path()
+        if not os.path.exists(path):
+            return []
+        conn = sqlite3.connect(path)
+        try:
+            conn.executescript(_SCHEMA)
+            rows = conn.execute(
+                "SELECT c.crawl_id, c.start_url, c.max_depth, c.created_at, "
+                "(SELECT COUNT(*) FROM nodes n WHERE n.crawl_id = c.crawl_id AND n.status = ?) "
+                "FROM crawls c WHERE c.completed = 0 ORDER BY c.created_at",
+                (PENDING,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"crawl_id": crawl_id, "start_url": start_url, "max_depth": max_depth,
+             "created_at": created_at, "pending": pending}
+            for crawl_id, start_url, max_depth, created_at, pending in rows
+        ]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
+
+    def _insert(self, url: str, parent_url: Optional[str], depth: int, status: str) -> None:
+        self.conn.execute(
+            "INSERT INTO nodes (crawl_id, seq, url, parent_url, depth, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.crawl_id, self._next_seq, url, parent_url, depth, status)
+        )
+        self._next_seq += 1
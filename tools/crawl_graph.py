@@ -0,0 +1,165 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Text and error of the stub the nested form renders for a link to an already visited page
+ALREADY_VISITED = "Already visited"
+
+
+@dataclass(slots=True)
+class CrawlResult:
+    """One crawled page; pages are connected through the edge list of a CrawlGraph"""
+    url: str
+    depth: int
+    content_type: str = ""
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    extracted_text: str = ""
+    error: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    score: Optional[float] = None
+    id: int = -1
+
+
+class CrawlGraph:
+    """
+    Compact crawl result: a page table plus an edge list of (parent_id, child_id).
+
+    Page ids are assigned in discovery order, so a parent always has a lower id
+    than the pages it discovered. A link to an already visited page is just
+    another edge to the existing page. Edges are packed in an int64 array
+    (16 bytes each), and the first edge into a page is the one that discovered it.
+    """
+
+    __slots__ = ('pages', '_edges', '_ids')
+
+    def __init__(self):
+        self.pages: List[CrawlResult] = []
+        self._edges = array('q')
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edges) // 2
+
+    def iter_edges(self) -> Iterator[Tuple[int, int]]:
+        """(parent_id, child_id) pairs in the order the links were found"""
+        return zip(self._edges[0::2], self._edges[1::2])
+
+    @property
+    def root(self) -> Optional[CrawlResult]:
+        return self.pages[0] if self.pages else None
+
+    def get(self, url: str) -> Optional[CrawlResult]:
+        """The page recorded for a URL, if any"""
+        page_id = self._ids.get(url)
+        return self.pages[page_id] if page_id is not None else None
+
+    def add_page(self, page: CrawlResult, parent: Optional[CrawlResult] = None) -> CrawlResult:
+        """Record a newly discovered page, linked from `parent`"""
+        page.id = len(self.pages)
+        self.pages.append(page)
+        self._ids[page.url] = page.id
+        if parent is not None:
+            self._edges.extend((parent.id, page.id))
+        return page
+
+    def add_edge(self, parent: CrawlResult, url: str) -> bool:
+        """Link `parent` to an already recorded page; returns False if the URL is unknown"""
+        page_id = self._ids.get(url)
+        if page_id is None:
+            return False
+        self._edges.extend((parent.id, page_id))
+        return True
+
+    def remove_pages(self, predicate: Callable[[CrawlResult], bool]) -> None:
+        """Drop matching pages and their edges, renumbering the remaining pages"""
+        kept = [page for page in self.pages if not predicate(page)]
+        if len(kept) == len(self.pages):
+            return
+
+        new_ids = {}
+        for new_id, page in enumerate(kept):
+            new_ids[page.id] = new_id
+            page.id = new_id
+
+        edges = array('q')
+        for parent_id, child_id in self.iter_edges():
+            if parent_id in new_ids and child_id in new_ids:
+                edges.extend((new_ids[parent_id], new_ids[child_id]))
+        self._edges = edges
+        self.pages = kept
+        self._ids = {page.url: page.id for page in kept}
+
+
+def _page_fields(page: CrawlResult) -> Dict[str, Any]:
+    return {
+        "url": page.url,
+        "depth": page.depth,
+        "content_type": page.content_type,
+        "metadata": page.metadata,
+        "extracted_text": page.extracted_text
+    }
+
+
+def _add_optional_fields(converted: Dict[str, Any], page: CrawlResult) -> Dict[str, Any]:
+    if page.error:
+        converted["error"] = page.error
+
+    if page.duplicate_of:
+        converted["duplicate_of"] = page.duplicate_of
+
+    if page.score is not None:
+        converted["relevance"] = page.score
+
+    return converted
+
+
+def graph_to_nested(graph: CrawlGraph) -> Optional[Dict[str, Any]]:
+    """
+    Render the graph as the nested JSON tree rooted at the start page.
+
+    Each page appears once, under the page that discovered it; other links to
+    it become "Already visited" stubs. Built in one pass over the edges, so
+    deep crawls cannot hit the recursion limit.
+    """
+    nodes = []
+    for page in graph.pages:
+        converted = _page_fields(page)
+        converted["links"] = []
+        nodes.append(_add_optional_fields(converted, page))
+
+    # The root is never a child; every other page's first incoming edge is the one that discovered it
+    placed = {0}
+    for parent_id, child_id in graph.iter_edges():
+        if child_id not in placed:
+            placed.add(child_id)
+            nodes[parent_id]["links"].append(nodes[child_id])
+        else:
+            nodes[parent_id]["links"].append({
+                "url": graph.pages[child_id].url,
+                "depth": graph.pages[parent_id].depth + 1,
+                "content_type": "",
+                "metadata": {},
+                "extracted_text": ALREADY_VISITED,
+                "links": [],
+                "error": ALREADY_VISITED
+            })
+
+    return nodes[0] if nodes else None
+
+
+def graph_to_flat(graph: CrawlGraph) -> Dict[str, Any]:
+    """Render the graph as a page table (with ids) plus [parent_id, child_id] edges"""
+    pages = []
+    for page in graph.pages:
+        converted = {"id": page.id}
+        converted.update(_page_fields(page))
+        pages.append(_add_optional_fields(converted, page))
+
+    return {
+        "pages": pages,
+        "edges": [[parent_id, child_id] for parent_id, child_id in graph.iter_edges()]
+    }
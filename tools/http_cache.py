@@ -0,0 +1,137 @@
+import os
+import re
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any
+
+# Persistent cache storage
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+
+# Default on-disk location: None resolves to HTTP_CACHE_DIR, or ./http_cache next to
+# the embedding model cache, when the cache is built (see default_cache_dir)
+DEFAULT_CACHE_DIR = None
+DEFAULT_SIZE_LIMIT = 512 * 1024 * 1024
+# Seconds a response without Cache-Control/Expires stays fresh; 0 revalidates it on every fetch
+DEFAULT_TTL = int(os.getenv("HTTP_CACHE_DEFAULT_TTL", "0"))
+
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+def default_cache_dir() -> str:
+    """Cache directory used when none is given, resolved at call time"""
+    return os.getenv("HTTP_CACHE_DIR") or os.path.join(os.getcwd(), "http_cache")
+
+
+class HttpCache:
+    """
+    Persistent, size-bounded HTTP response cache for the web crawler.
+
+    Entries are keyed by normalized URL and hold the body together with the
+    validators (ETag / Last-Modified) needed for conditional revalidation.
+    When the size limit is reached entries are evicted in LRU order.
+    Responses without Cache-Control/Expires stay fresh for `default_ttl`
+    seconds (by default 0: they are revalidated before every use).
+    """
+
+    def __init__(self, directory: Optional[str] = DEFAULT_CACHE_DIR, size_limit: int = DEFAULT_SIZE_LIMIT,
+                 default_ttl: int = DEFAULT_TTL):
+        if not DISKCACHE_AVAILABLE:
+            raise ImportError("HTTP caching not available - diskcache not installed")
+
+        directory = directory or default_cache_dir()
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self._cache = diskcache.Cache(
+            directory,
+            size_limit=size_limit,
+            eviction_policy='least-recently-used'
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry for a URL (fresh or stale), or None"""
+        return self._cache.get(key)
+
+    def set(self, key: str, content_type: str, body: bytes, headers: Dict[str, str]) -> None:
+        """Store a response body with its validators, unless the server forbids caching"""
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control:
+            return
+
+        self._cache.set(key, {
+            'content_type': content_type,
+            'body': body,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'expires_at': time.time() + self.freshness_lifetime(headers)
+        })
+
+    def refresh(self, key: str, entry: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """Extend a revalidated (304) entry, picking up any updated validators"""
+        entry['etag'] = headers.get('etag') or entry.get('etag')
+        entry['last_modified'] = headers.get('last-modified') or entry.get('last_modified')
+        entry['expires_at'] = time.time() + self.freshness_lifetime(headers)
+        self._cache.set(key, entry)
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any]) -> bool:
+        """Check whether an entry can be served without contacting the server"""
+        return entry.get('expires_at', 0) > time.time()
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def freshness_lifetime(self, headers: Dict[str, str]) -> float:
+        """Seconds a response stays fresh, from Cache-Control/Expires or the default TTL"""
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-cache' in cache_control:
+            return 0
+
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return int(match.group(1))
+
+        expires = headers.get('expires')
+        if expires:
+            try:
+                return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return 0
+
+        return self.default_ttl
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        self._cache.clear()
+
+    def close(self) -> None:
+        """Close the underlying cache files"""
+        self._cache.close()
+
+
+_shared_caches: Dict[str, HttpCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_http_cache(directory: Optional[str] = DEFAULT_CACHE_DIR) -> Optional[HttpCache]:
+    """Return the process-wide cache for a directory, or None if caching is unavailable"""
+    if not DISKCACHE_AVAILABLE:
+        return None
+
+    directory = os.path.abspath(directory or default_cache_dir())
+    with _shared_lock:
+        if directory not in _shared_caches:
+            _shared_caches[directory] = HttpCache(directory)
+        return _shared_caches[directory]
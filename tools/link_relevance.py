@@ -0,0 +1,83 @@
+import re
+import logging
+import threading
+from typing import Callable, List, Optional
+from urllib.parse import urlparse, unquote
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Texts encoded per forward pass of the embedding model
+DEFAULT_BATCH_SIZE = 64
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def describe_link(url: str, anchor_text: str = "", context: str = "") -> str:
+    """Text used to score a link: anchor text, words from the URL path and the surrounding text"""
+    path_words = ' '.join(_TOKEN_RE.findall(unquote(urlparse(url).path).lower()))
+    return ' '.join(part for part in (anchor_text, path_words, context) if part)
+
+
+def load_sentence_transformer():
+    """The all-MiniLM-L6-v2 model shared with the document agent, or None if it cannot be loaded"""
+    try:
+        from agents.document_agent import EmbeddingsManager
+        return EmbeddingsManager.get_sentence_transformer()
+    except Exception as e:
+        logger.warning(f"Embedding model unavailable, falling back to keyword scoring: {e}")
+        return None
+
+
+class LinkScorer:
+    """
+    Scores candidate links against a query for best-first crawling.
+
+    Link descriptions are embedded in batches with MiniLM and compared to the
+    query embedding by cosine similarity. Without the embedding model, the
+    score is the fraction of query terms that occur in the description.
+    """
+
+    def __init__(self, query: str, model=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 model_loader: Callable[[], object] = load_sentence_transformer):
+        self.query = query
+        self.batch_size = batch_size
+        self._model = model
+        self._model_loader = model_loader
+        self._query_embedding: Optional[np.ndarray] = None
+        self._query_terms = set(_TOKEN_RE.findall(query.lower()))
+        self._lock = threading.Lock()
+        self._loaded = model is not None
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self._model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False
+        ))
+
+    def _ensure_model(self) -> None:
+        # Loaded on first use, so building a crawler stays cheap
+        with self._lock:
+            if not self._loaded:
+                self._model = self._model_loader()
+                self._loaded = True
+            if self._model is not None and self._query_embedding is None:
+                self._query_embedding = self._encode([self.query])[0]
+
+    def score(self, descriptions: List[str]) -> List[float]:
+        """Relevance of each description to the query (higher is better)"""
+        if not descriptions:
+            return []
+
+        self._ensure_model()
+        if self._model is None:
+            return [self._keyword_score(text) for text in descriptions]
+
+        embeddings = self._encode(descriptions)
+        return (embeddings @ self._query_embedding).tolist()
+
+    def _keyword_score(self, text: str) -> float:
+        if not self._query_terms:
+            return 0.0
+        terms = set(_TOKEN_RE.findall(text.lower()))
+        return len(self._query_terms & terms) / len(self._query_terms)
@@ -0,0 +1,118 @@
+import re
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Vectorized bit counting
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+# Pages with less text than this are too small to fingerprint reliably
+MIN_FINGERPRINT_TOKENS = 10
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """
+    Compute a 64-bit SimHash fingerprint over word shingles of the text.
+
+    Returns None when the text is too short to fingerprint.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < MIN_FINGERPRINT_TOKENS:
+        return None
+
+    shingles = Counter(
+        ' '.join(tokens[i:i + shingle_size])
+        for i in range(max(1, len(tokens) - shingle_size + 1))
+    )
+
+    digests = [hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles]
+    counts = list(shingles.values())
+
+    if NUMPY_AVAILABLE:
+        # Bit matrix (shingles x 64), least significant bit first, weighted by shingle count
+        hashes = np.frombuffer(b''.join(digests), dtype='>u8').astype('<u8')
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        weights = (bits.astype(np.int64) * 2 - 1).T @ np.array(counts, dtype=np.int64)
+    else:
+        weights = [0] * FINGERPRINT_BITS
+        for digest, count in zip(digests, counts):
+            h = int.from_bytes(digest, 'big')
+            for bit in range(FINGERPRINT_BITS):
+                if h >> bit & 1:
+                    weights[bit] += count
+                else:
+                    weights[bit] -= count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of matching fingerprint bits (1.0 = identical)"""
+    return 1.0 - bin(a ^ b).count('1') / FINGERPRINT_BITS
+
+
+class SimHashIndex:
+    """
+    Index of page fingerprints supporting near-duplicate lookups.
+
+    Uses the pigeonhole principle: two fingerprints within `max_distance`
+    differing bits must agree exactly on at least one of `max_distance + 1`
+    blocks, so only pages sharing a block are compared.
+    """
+
+    def __init__(self, threshold: float = 0.9):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("Near-duplicate threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.max_distance = int((1.0 - threshold) * FINGERPRINT_BITS)
+
+        num_blocks = min(self.max_distance + 1, FINGERPRINT_BITS)
+        block_width = FINGERPRINT_BITS // num_blocks
+        self._blocks: List[Tuple[int, int]] = []
+        for i in range(num_blocks):
+            start = i * block_width
+            width = FINGERPRINT_BITS - start if i == num_blocks - 1 else block_width
+            self._blocks.append((start, (1 << width) - 1))
+
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Return the URL of an indexed near-duplicate, if any"""
+        for i, (start, mask) in enumerate(self._blocks):
+            for other, url in self._buckets.get((i, fingerprint >> start & mask), ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fingerprint: int, url: str) -> None:
+        """Index a fingerprint under the URL it was seen at"""
+        for i, (start, mask) in enumerate(self._blocks):
+            self._buckets.setdefault((i, fingerprint >> start & mask), []).append((fingerprint, url))
+
+    def check(self, text: str, url: str) -> Optional[str]:
+        """Return the original URL if `text` is a near-duplicate, otherwise index it and return None"""
+        return self.check_fingerprint(simhash(text), url)
+
+    def check_fingerprint(self, fingerprint: Optional[int], url: str) -> Optional[str]:
+        """Same as check, for a fingerprint computed elsewhere (e.g. in an extraction worker)"""
+        if fingerprint is None:
+            return None
+
+        original = self.find(fingerprint)
+        if original is None:
+            self.add(fingerprint, url)
+        return original
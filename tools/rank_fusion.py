@@ -0,0 +1,209 @@
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from tools.arxiv_search_tool import truncate_text
+from tools.candidate_pool import Candidate, arxiv_id_from_url, title_key
+
+# Supported fusion methods
+FUSION_METHODS = ("rrf", "borda", "weighted")
+
+# Reciprocal rank fusion constant
+RRF_K = 60
+
+# Characters of abstract and of each judge's reason kept in the final judge's input
+FUSED_ABSTRACT_CHARS = 500
+FUSED_REASON_CHARS = 160
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+@dataclass
+class JudgeScore:
+    """One paper as scored by one judge"""
+    key: str
+    title: str
+    score: float
+    reason: str = ""
+    link: str = ""
+    abstract: str = ""
+
+
+@dataclass
+class FusedPaper:
+    """A paper after fusing all judges' rankings"""
+    key: str
+    title: str
+    link: str
+    abstract: str
+    fused_score: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+    reasons: Dict[str, str] = field(default_factory=dict)
+
+
+def _first(item: Dict[str, Any], *names: str) -> Any:
+    # Judges are free-form LLM output: accept the usual spellings of each field
+    lowered = {str(k).lower(): v for k, v in item.items()}
+    for name in names:
+        if lowered.get(name) not in (None, ""):
+            return lowered[name]
+    return None
+
+
+def _to_score(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value or ""))
+    return float(match.group()) if match else None
+
+
+def _json_items(text: str) -> List[Dict[str, Any]]:
+    """The list of objects in a judge's output, tolerating markdown fences and surrounding prose"""
+    fenced = _FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end <= start:
+        return []
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return []
+    return [item for item in data if isinstance(item, dict)]
+
+
+def parse_judge_output(text: str, candidates: Optional[List[Candidate]] = None) -> List[JudgeScore]:
+    """
+    Structured scores from one judge's output.
+
+    Papers are keyed by arXiv id when known, otherwise by normalized title; ids
+    like "P3" refer to the shared candidate pool. Entries without a score or
+    without an identifiable paper are dropped; a paper listed twice keeps its best score.
+    """
+    by_pool_id = {c.id: c for c in candidates or []}
+    scores: Dict[str, JudgeScore] = {}
+
+    for item in _json_items(text or ""):
+        score = _to_score(_first(item, "score", "rating", "relevance_score", "impact_score", "novelty_score"))
+        if score is None:
+            continue
+
+        candidate = by_pool_id.get(str(_first(item, "id", "paper_id") or "").strip("[] "))
+        if candidate is not None:
+            title, link, abstract, arxiv_id = candidate.title, candidate.url, candidate.abstract, candidate.arxiv_id
+        else:
+            title = str(_first(item, "title", "paper", "paper_title", "name") or "").strip()
+            link = str(_first(item, "link", "url", "pdf_url", "href") or "")
+            abstract = str(_first(item, "abstract", "summary") or "")
+            arxiv_id = arxiv_id_from_url(link) or _first(item, "arxiv_id")
+        if not title and not arxiv_id:
+            continue
+
+        key = f"arxiv:{arxiv_id}" if arxiv_id else f"title:{title_key(title)}"
+        reason = str(_first(item, "reason", "explanation", "justification", "comment") or "")
+        if key not in scores or score > scores[key].score:
+            scores[key] = JudgeScore(key=key, title=title, score=score, reason=reason, link=link, abstract=abstract)
+
+    return list(scores.values())
+
+
+def _merge_keys(judge_scores: Dict[str, List[JudgeScore]]) -> None:
+    """Map title keys onto the arXiv key of the same paper, when another judge gave its arXiv id"""
+    arxiv_by_title = {}
+    for scores in judge_scores.values():
+        for s in scores:
+            if s.key.startswith("arxiv:") and s.title:
+                arxiv_by_title.setdefault(title_key(s.title), s.key)
+    for scores in judge_scores.values():
+        for s in scores:
+            if s.key.startswith("title:"):
+                s.key = arxiv_by_title.get(s.key[len("title:"):], s.key)
+
+
+def fuse_rankings(judge_scores: Dict[str, List[JudgeScore]], method: str = "rrf", top_k: int = 5,
+                  weights: Optional[Dict[str, float]] = None) -> List[FusedPaper]:
+    """
+    Fuse per-judge scores into one deterministic ranking.
+
+    - rrf: sum of 1 / (RRF_K + rank) over the judges that ranked the paper
+    - borda: sum of (n - rank) points, n being the number of papers that judge ranked
+    - weighted: weighted mean score over all judges; a judge that did not list the paper counts 0
+
+    Judge weights (default 1) apply to every method. Ties break on the number of
+    judges that listed the paper, then the best single score, then the title.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}. Must be one of: {', '.join(FUSION_METHODS)}")
+    weights = weights or {}
+    _merge_keys(judge_scores)
+
+    fused: Dict[str, FusedPaper] = {}
+    for judge, scores in judge_scores.items():
+        weight = weights.get(judge, 1.0)
+        # Judge's own order: score descending, title as a stable tie-break
+        ranked = sorted(scores, key=lambda s: (-s.score, title_key(s.title)))
+        for rank, s in enumerate(ranked):
+            paper = fused.get(s.key)
+            if paper is not None and judge in paper.scores:
+                # Same paper listed twice by this judge (merged keys): keep its better rank
+                continue
+            if paper is None:
+                paper = fused[s.key] = FusedPaper(key=s.key, title=s.title, link=s.link, abstract=s.abstract)
+            paper.link = paper.link or s.link
+            if len(s.abstract) > len(paper.abstract):
+                paper.abstract = s.abstract
+            paper.scores[judge] = s.score
+            paper.reasons[judge] = s.reason
+
+            if method == "rrf":
+                paper.fused_score += weight / (RRF_K + rank + 1)
+            elif method == "borda":
+                paper.fused_score += weight * (len(ranked) - rank)
+            else:
+                paper.fused_score += weight * s.score
+
+    if method == "weighted":
+        total_weight = sum(weights.get(judge, 1.0) for judge in judge_scores) or 1.0
+        for paper in fused.values():
+            paper.fused_score /= total_weight
+
+    ranking = sorted(fused.values(), key=lambda p: (
+        -round(p.fused_score, 9), -len(p.scores), -max(p.scores.values()), title_key(p.title)
+    ))
+    return ranking[:top_k]
+
+
+def format_fused_papers(papers: List[FusedPaper], abstract_chars: int = FUSED_ABSTRACT_CHARS,
+                        reason_chars: int = FUSED_REASON_CHARS) -> str:
+    """Compact listing of the fused top-k for the final write-up: rank, title, link, scores, abstract, reasons"""
+    lines = []
+    for rank, paper in enumerate(papers, 1):
+        header = f"{rank}. {paper.title} | {paper.link or 'no link'}"
+        if paper.scores:
+            header += " | " + ", ".join(f"{judge.split('_', 1)[-1].lower()} {score:g}" for judge, score in paper.scores.items())
+        lines.append(header)
+        if paper.abstract:
+            lines.append(f"   Abstract: {truncate_text(paper.abstract, abstract_chars)}")
+        for judge, reason in paper.reasons.items():
+            if reason:
+                lines.append(f"   {judge.split('_', 1)[-1]}: {truncate_text(reason, reason_chars)}")
+    return "\n".join(lines)
+
+
+def fuse_judge_outputs(judge_outputs: Dict[str, str], method: str = "rrf", top_k: int = 5,
+                       weights: Optional[Dict[str, float]] = None,
+                       candidates: Optional[List[Candidate]] = None) -> List[FusedPaper]:
+    """Parse each judge's raw output and fuse them; empty if no judge output could be parsed"""
+    judge_scores = {judge: parse_judge_output(output, candidates) for judge, output in judge_outputs.items()}
+    return fuse_rankings({j: s for j, s in judge_scores.items() if s}, method, top_k, weights)
+
+
+def rank_candidates_by_retrieval(candidates: List[Candidate], top_k: int = 5) -> List[FusedPaper]:
+    """Top-k of the candidate pool in retrieval order, for when no judge scores are available"""
+    return [
+        FusedPaper(key=f"arxiv:{c.arxiv_id}" if c.arxiv_id else f"title:{title_key(c.title)}",
+                   title=c.title, link=c.url, abstract=c.abstract)
+        for c in candidates[:top_k]
+    ]
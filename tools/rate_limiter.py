@@ -0,0 +1,242 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class RetryableError(Exception):
+    """An upstream call failed in a way worth retrying (throttling, 5xx, timeout, connection error)"""
+
+    def __init__(self, message: str, throttled: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.throttled = throttled
+        self.retry_after = retry_after
+
+
+class UpstreamUnavailable(Exception):
+    """The call gave up: retries are exhausted or the circuit breaker is open"""
+
+    def __init__(self, message: str, retry_in: Optional[float] = None):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamLimiter:
+    """
+    Shared outbound limiter for one upstream service, usable from threads and coroutines.
+
+    - Token bucket: requests start at most `rate` per second (bursts up to `burst`).
+      Callers reserve a start time, so waiting callers are served in order without polling;
+      an async caller cancelled while waiting hands its reservation back.
+    - Adaptive rate: a throttled response (429/503) halves the rate, once per burst of
+      throttled responses; every success raises it again by a tenth of the configured rate.
+    - Retry-After pauses all callers, not just the throttled one.
+    - Retries use exponential backoff with full jitter.
+    - Circuit breaker: after `failure_threshold` consecutive failed attempts, calls fail
+      fast for `reset_timeout` seconds, then a single trial call decides whether to close.
+    """
+
+    def __init__(self, name: str, rate: float = 1.0, burst: int = 1, max_retries: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 30.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, min_rate: Optional[float] = None):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = 0.0
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self.stats = {
+            "calls": 0, "attempts": 0, "successes": 0, "failures": 0, "throttled": 0, "retries": 0,
+            "rejected": 0, "circuit_opens": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0
+        }
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before starting its request"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate, self._paused_until - now)
+            self.stats["queue_wait_total"] += wait
+            self.stats["queue_wait_max"] = max(self.stats["queue_wait_max"], wait)
+            return wait
+
+    def _admit(self) -> bool:
+        """Raise UpstreamUnavailable while the circuit is open; afterwards let one trial call through (returns True)"""
+        with self._lock:
+            self.stats["calls"] += 1
+            if self._consecutive_failures < self.failure_threshold:
+                return False
+            now = time.monotonic()
+            if now < self._open_until or self._trial_in_flight:
+                self.stats["rejected"] += 1
+                retry_in = max(0.0, self._open_until - now)
+                raise UpstreamUnavailable(
+                    f"{self.name} is temporarily unavailable after repeated failures; "
+                    f"try again in {retry_in:.0f}s", retry_in=retry_in
+                )
+            self._trial_in_flight = True
+            return True
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self.stats["attempts"] += 1
+            self.stats["successes"] += 1
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def _record_failure(self, error: RetryableError, started_at: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.stats["attempts"] += 1
+            self.stats["failures"] += 1
+            if error.throttled:
+                self.stats["throttled"] += 1
+                # Requests sent before the last decrease were throttled at the old rate
+                if started_at >= self._decreased_at:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._decreased_at = now
+                if error.retry_after:
+                    self._paused_until = max(self._paused_until, now + error.retry_after)
+            self._consecutive_failures += 1
+            if self._trial_in_flight or self._consecutive_failures == self.failure_threshold:
+                self._open_until = now + self.reset_timeout
+                self.stats["circuit_opens"] += 1
+            self._trial_in_flight = False
+
+    def _backoff(self, attempt: int, error: RetryableError) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, error.retry_after or 0.0)
+
+    def _give_up(self, attempt: int, error: RetryableError) -> UpstreamUnavailable:
+        reason = "rate limited" if error.throttled else str(error)
+        attempts = f"{attempt + 1} attempts" if attempt else "1 attempt"
+        return UpstreamUnavailable(f"{self.name} request failed after {attempts} ({reason})",
+                                   retry_in=error.retry_after)
+
+    def _should_retry(self, attempt: int) -> bool:
+        with self._lock:
+            if attempt >= self.max_retries or self._consecutive_failures >= self.failure_threshold:
+                return False
+            self.stats["retries"] += 1
+            return True
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """Run func() under the limiter, retrying RetryableErrors; other exceptions propagate unchanged"""
+        trial = self._admit()
+        attempt = 0
+        while True:
+            wait = self._reserve()
+            if wait > 0:
+                time.sleep(wait)
+            started_at = time.monotonic()
+            try:
+                result = func()
+            except RetryableError as e:
+                self._record_failure(e, started_at)
+                if not self._should_retry(attempt):
+                    raise self._give_up(attempt, e) from e
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            except BaseException:
+                if trial:
+                    self._release_trial()
+                raise
+            self._record_success()
+            return result
+
+    async def call_async(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Async call(): waits with asyncio.sleep, so the event loop keeps running"""
+        trial = self._admit()
+        attempt = 0
+        while True:
+            wait = self._reserve()
+            started_at = time.monotonic() + wait
+            try:
+                if wait > 0:
+                    await self._wait_for_token(wait)
+                result = await func()
+            except RetryableError as e:
+                self._record_failure(e, started_at)
+                if not self._should_retry(attempt):
+                    raise self._give_up(attempt, e) from e
+                try:
+                    await asyncio.sleep(self._backoff(attempt, e))
+                except BaseException:
+                    if trial:
+                        self._release_trial()
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                if trial:
+                    self._release_trial()
+                raise
+            self._record_success()
+            return result
+
+    async def _wait_for_token(self, wait: float) -> None:
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # A cancelled waiter never starts its request: return the reserved token
+            with self._lock:
+                self._tokens = min(self.burst, self._tokens + 1)
+            raise
+
+    def _release_trial(self) -> None:
+        # A trial call that ended without an upstream verdict (e.g. cancelled) must not block the circuit
+        with self._lock:
+            self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """closed, open or half-open"""
+        with self._lock:
+            if self._consecutive_failures < self.failure_threshold:
+                return "closed"
+            return "open" if time.monotonic() < self._open_until else "half-open"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus the current rate, circuit state and average queue wait (seconds)"""
+        state = self.state
+        with self._lock:
+            stats = dict(self.stats)
+            stats["rate"] = round(self.rate, 3)
+        starts = stats["attempts"] or 1
+        stats["queue_wait_avg"] = round(stats["queue_wait_total"] / starts, 3)
+        stats["queue_wait_total"] = round(stats["queue_wait_total"], 3)
+        stats["queue_wait_max"] = round(stats["queue_wait_max"], 3)
+        stats["circuit"] = state
+        return stats
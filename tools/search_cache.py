@@ -0,0 +1,163 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Result handed to coalesced async callers when the leading call was cancelled: retry
+_RETRY = object()
+
+
+class _Flight:
+    """A computation in progress that identical callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """
+    In-memory TTL cache for search results, bounded by entry count (LRU eviction).
+
+    get_or_compute coalesces concurrent identical calls (single-flight): while a key
+    is being computed, other callers wait for that result instead of sending their
+    own request. Results for which `cacheable` returns False (e.g. failed searches)
+    are handed to the waiting callers but not stored. get_or_compute_async does the
+    same for coroutines on an event loop; both share the cached entries.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._async_in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """Return the cached value for key, computing it at most once across concurrent callers"""
+        leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self.stats["expired"] += 1
+
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.stats["coalesced"] += 1
+            else:
+                flight = self._in_flight[key] = _Flight()
+                self.stats["misses"] += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.error is None and cacheable(flight.value):
+                    self._store(key, flight.value)
+            flight.done.set()
+
+        return flight.value
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                                   cacheable: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """Async get_or_compute: concurrent identical calls on the same event loop share one compute()"""
+        loop = asyncio.get_running_loop()
+        while True:
+            leader = False
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, expires_at = entry
+                    if expires_at > time.monotonic():
+                        self._entries.move_to_end(key)
+                        self.stats["hits"] += 1
+                        return value
+                    del self._entries[key]
+                    self.stats["expired"] += 1
+
+                future = self._async_in_flight.get(key)
+                if future is not None and future.get_loop() is loop:
+                    self.stats["coalesced"] += 1
+                else:
+                    future = self._async_in_flight[key] = loop.create_future()
+                    self.stats["misses"] += 1
+                    leader = True
+
+            if not leader:
+                # Shielded: a cancelled waiter must not cancel the shared result
+                value = await asyncio.shield(future)
+                if value is _RETRY:
+                    continue
+                return value
+
+            try:
+                value = await compute()
+            except asyncio.CancelledError:
+                self._finish_async(key, future)
+                future.set_result(_RETRY)
+                raise
+            except BaseException as e:
+                self._finish_async(key, future)
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else is waiting
+                future.exception()
+                raise
+
+            self._finish_async(key, future, value, cacheable(value))
+            future.set_result(value)
+            return value
+
+    def _finish_async(self, key: Hashable, future: asyncio.Future, value: Any = None, store: bool = False) -> None:
+        with self._lock:
+            if self._async_in_flight.get(key) is future:
+                del self._async_in_flight[key]
+            if store:
+                self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus the hit rate, counting coalesced calls as hits (no request was sent)"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query, for cache keys"""
+    return ' '.join(query.lower().split())
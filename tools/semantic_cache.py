@@ -0,0 +1,239 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from tools.link_relevance import load_sentence_transformer
+
+# Default SQLite file holding cached answers: None resolves to SEMANTIC_CACHE_PATH, or
+# ./semantic_cache.sqlite3 next to the crawl checkpoints, when the file is first opened
+DEFAULT_SEMANTIC_CACHE_PATH = None
+
+# Characters per chunk when replaying a cached answer as a stream
+REPLAY_CHUNK_CHARS = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_WORD_RE = re.compile(r'\S+\s*|\s+')
+
+
+def default_semantic_cache_path() -> str:
+    """Cache file used when none is given, resolved at call time"""
+    return os.getenv("SEMANTIC_CACHE_PATH") or os.path.join(os.getcwd(), "semantic_cache.sqlite3")
+
+
+@dataclass
+class SemanticCacheHit:
+    """A cached answer for a query similar enough to the one asked"""
+    query: str
+    answer: str
+    similarity: float
+    tokens: int
+
+
+class SemanticCache:
+    """
+    Persistent answer cache keyed by query embedding.
+
+    A lookup returns the answer of the most similar cached query (cosine
+    similarity of normalized MiniLM embeddings) if it reaches `threshold`
+    and is younger than `ttl` seconds. Answers live in SQLite; their
+    embeddings are also kept in memory for the similarity scan. Beyond
+    `max_entries` the least recently used answers are evicted. Entries are
+    separated by namespace (e.g. the pipeline mode that produced them).
+    Without the embedding model every lookup misses and nothing is stored.
+    Without a path the default file is resolved on first use, not at creation,
+    so a cache built at import follows the process's later working directory.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SEMANTIC_CACHE_PATH, threshold: float = 0.92,
+                 ttl: float = 7 * 24 * 3600, max_entries: int = 500,
+                 model_loader: Callable[[], object] = load_sentence_transformer):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._model_loader = model_loader
+        self._model = None
+        self._model_loaded = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # In-memory copy of the table for the similarity scan
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._namespaces = np.zeros(0, dtype=object)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._vectors: Optional[np.ndarray] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0, "tokens_saved": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held; the table is read into memory on first use
+        if self._conn is None:
+            self.path = self.path or default_semantic_cache_path()
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+            self._reload()
+        return self._conn
+
+    def _reload(self) -> None:
+        rows = self._conn.execute("SELECT id, namespace, created_at, embedding FROM answers ORDER BY id").fetchall()
+        self._ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self._namespaces = np.array([r[1] for r in rows], dtype=object)
+        self._created = np.array([r[2] for r in rows], dtype=np.float64)
+        self._vectors = np.stack([np.frombuffer(r[3], dtype=np.float32) for r in rows]) if rows else None
+
+    def embed(self, query: str) -> Optional[np.ndarray]:
+        """Normalized query embedding, or None without the embedding model"""
+        with self._lock:
+            if not self._model_loaded:
+                self._model = self._model_loader()
+                self._model_loaded = True
+        if self._model is None:
+            return None
+        return np.asarray(self._model.encode([query], normalize_embeddings=True)[0], dtype=np.float32)
+
+    def _best_match(self, embedding: np.ndarray, namespace: str, now: float):
+        """(row index, similarity) of the closest live entry in the namespace, or None"""
+        if self._vectors is None or self._vectors.shape[1] != embedding.shape[0]:
+            return None
+        live = (self._namespaces == namespace) & (self._created > now - self.ttl)
+        if not live.any():
+            return None
+        similarities = np.where(live, self._vectors @ embedding, -np.inf)
+        best = int(np.argmax(similarities))
+        return best, float(similarities[best])
+
+    def _drop(self, rows) -> None:
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        self._ids, self._namespaces, self._created = self._ids[keep], self._namespaces[keep], self._created[keep]
+        self._vectors = self._vectors[keep] if keep.any() else None
+
+    def _expire(self, now: float) -> None:
+        expired = np.flatnonzero(self._created <= now - self.ttl)
+        if len(expired):
+            self._conn.executemany("DELETE FROM answers WHERE id = ?", [(int(self._ids[i]),) for i in expired])
+            self._drop(expired)
+            self.stats["expired"] += len(expired)
+
+    def lookup(self, query: str, namespace: str = "", embedding: Optional[np.ndarray] = None) -> Optional[SemanticCacheHit]:
+        """The cached answer for the most similar query above the threshold, or None"""
+        if embedding is None:
+            embedding = self.embed(query)
+        if embedding is None:
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            match = self._best_match(embedding, namespace, now)
+            if match is None or match[1] < self.threshold:
+                self.stats["misses"] += 1
+                return None
+
+            entry_id = int(self._ids[match[0]])
+            with conn:
+                conn.execute("UPDATE answers SET hits = hits + 1, last_used_at = ? WHERE id = ?", (now, entry_id))
+            cached_query, answer, tokens = conn.execute(
+                "SELECT query, answer, tokens FROM answers WHERE id = ?", (entry_id,)
+            ).fetchone()
+            self.stats["hits"] += 1
+            self.stats["tokens_saved"] += tokens
+            return SemanticCacheHit(query=cached_query, answer=answer, similarity=match[1], tokens=tokens)
+
+    def store(self, query: str, answer: str, tokens: int, namespace: str = "",
+              embedding: Optional[np.ndarray] = None) -> bool:
+        """Cache an answer; replaces the entry of a near-identical query. False without the embedding model"""
+        if embedding is None:
+            embedding = self.embed(query)
+        if embedding is None:
+            return False
+
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            with conn:
+                self._expire(now)
+                match = self._best_match(embedding, namespace, now)
+                if match is not None and match[1] >= self.threshold:
+                    conn.execute("DELETE FROM answers WHERE id = ?", (int(self._ids[match[0]]),))
+                    self._drop([match[0]])
+
+                cursor = conn.execute(
+                    "INSERT INTO answers (namespace, query, embedding, answer, tokens, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, query, embedding.astype(np.float32).tobytes(), answer, tokens, now, now)
+                )
+                self._ids = np.append(self._ids, cursor.lastrowid)
+                self._namespaces = np.append(self._namespaces, np.array([namespace], dtype=object))
+                self._created = np.append(self._created, now)
+                vector = embedding.astype(np.float32)[None, :]
+                self._vectors = vector if self._vectors is None else np.vstack([self._vectors, vector])
+
+                overflow = len(self._ids) - self.max_entries
+                if overflow > 0:
+                    evicted = {row[0] for row in conn.execute(
+                        "SELECT id FROM answers ORDER BY last_used_at, id LIMIT ?", (overflow,)
+                    )}
+                    conn.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in evicted])
+                    self._drop(np.flatnonzero(np.isin(self._ids, list(evicted))))
+                    self.stats["evictions"] += len(evicted)
+            self.stats["stores"] += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM answers")
+            self._reload()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and tokens saved in this process, plus the stored entries and the tokens their hits saved"""
+        with self._lock:
+            conn = self._connect()
+            entries, tokens_saved_total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits * tokens), 0) FROM answers"
+            ).fetchone()
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "tokens_saved_total": tokens_saved_total,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def replay_chunks(answer: str, chunk_chars: int = REPLAY_CHUNK_CHARS) -> Iterator[str]:
+    """Split a cached answer into word-aligned chunks for streaming it back"""
+    chunk = ""
+    for word in _WORD_RE.findall(answer):
+        chunk += word
+        if len(chunk) >= chunk_chars:
+            yield chunk
+            chunk = ""
+    if chunk:
+        yield chunk
@@ -0,0 +1,174 @@
+import os
+import math
+import sqlite3
+import hashlib
+import tempfile
+from typing import Iterable, List, Optional, Union
+
+
+class ExactVisitedSet:
+    """In-memory set of full URLs (exact, memory grows with URL length)"""
+
+    def __init__(self):
+        self._urls = set()
+
+    def add(self, url: str) -> None:
+        self._urls.add(url)
+
+    def update(self, urls: Iterable[str]) -> None:
+        self._urls.update(urls)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+
+class _BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1: int, h2: int):
+        # Kirsch-Mitzenmacher double hashing
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, h1: int, h2: int) -> None:
+        for pos in self._positions(h1, h2):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, hashes) -> bool:
+        h1, h2 = hashes
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h1, h2))
+
+
+class BloomVisitedSet:
+    """
+    Scalable Bloom filter: constant bytes per URL, with a bounded false-positive rate.
+
+    A false positive makes the crawler skip a URL it has not actually seen;
+    URLs are never fetched twice. When the current filter is full a larger
+    one is added with a tighter error rate, so the overall rate stays below
+    `error_rate` however many URLs are inserted.
+    """
+
+    def __init__(self, error_rate: float = 0.001, initial_capacity: int = 100_000,
+                 growth: int = 2, tightening: float = 0.5):
+        if not 0.0 < error_rate < 1.0:
+            raise ValueError("Bloom filter error rate must be in (0, 1)")
+
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self._filters: List[_BloomFilter] = [_BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    @staticmethod
+    def _hashes(url: str):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def add(self, url: str) -> None:
+        hashes = self._hashes(url)
+        if any(hashes in f for f in self._filters):
+            return
+
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** len(self._filters)
+            current = _BloomFilter(current.capacity * self.growth, error_rate)
+            self._filters.append(current)
+        current.add(*hashes)
+
+    def update(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        hashes = self._hashes(url)
+        return any(hashes in f for f in self._filters)
+
+    def __len__(self) -> int:
+        """Approximate number of distinct URLs added"""
+        return sum(f.count for f in self._filters)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(f.bits) for f in self._filters)
+
+
+class DiskVisitedSet:
+    """Exact visited set stored in SQLite, keeping only a page cache in memory"""
+
+    def __init__(self, path: Optional[str] = None, cache_kb: int = 8192):
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='visited_', suffix='.sqlite3')
+            os.close(fd)
+            self._owns_file = True
+        else:
+            self._owns_file = False
+
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(f"PRAGMA cache_size = -{cache_kb}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._count = self.conn.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+
+    def add(self, url: str) -> None:
+        cursor = self.conn.execute("INSERT OR IGNORE INTO visited (url) VALUES (?)", (url,))
+        self._count += cursor.rowcount
+
+    def update(self, urls: Iterable[str]) -> None:
+        # One transaction for the whole batch
+        self.conn.execute("BEGIN")
+        try:
+            for url in urls:
+                self.add(url)
+        finally:
+            self.conn.execute("COMMIT")
+
+    def __contains__(self, url: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Close the database, deleting it if it was a temporary file"""
+        self.conn.close()
+        if self._owns_file:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+VISITED_BACKENDS = {
+    "exact": ExactVisitedSet,
+    "bloom": BloomVisitedSet,
+    "disk": DiskVisitedSet,
+}
+
+
+def create_visited_set(backend: Union[str, object] = "exact", **options):
+    """
+    Build a visited-set backend by name ("exact", "bloom" or "disk").
+
+    Objects that already provide add/update/__contains__ are returned unchanged,
+    so a preconfigured backend instance can be passed straight through.
+    """
+    if not isinstance(backend, str):
+        return backend
+
+    if backend not in VISITED_BACKENDS:
+        raise ValueError(f"Unknown visited set backend: {backend}. Must be one of: {', '.join(VISITED_BACKENDS)}")
+    return VISITED_BACKENDS[backend](**options)
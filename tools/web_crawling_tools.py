@@ -1,20 +1,37 @@
 import requests
 import time
+import asyncio
 import hashlib
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any, AsyncGenerator, Awaitable, Callable, Iterator, TextIO
 from urllib.parse import urljoin, urlparse, urlunparse
-from dataclasses import dataclass, asdict
 import re
 from bs4 import BeautifulSoup
-import mimetypes
+from tools.http_cache import HttpCache, get_http_cache, DEFAULT_CACHE_DIR
+from tools.near_duplicates import SimHashIndex, simhash
+from tools.visited_sets import create_visited_set
+from tools.link_relevance import LinkScorer, describe_link
+from tools.crawl_graph import CrawlResult, CrawlGraph, graph_to_nested, graph_to_flat
+from tools.crawl_checkpoint import CrawlCheckpoint, DEFAULT_CHECKPOINT_PATH, DONE as CHECKPOINT_DONE, STUB as CHECKPOINT_STUB
+import threading
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+from io import StringIO, BytesIO
+
+# Faster HTML parser backend for BeautifulSoup
+try:
+    import lxml
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
 
 # PDF processing
 try:
     import PyPDF2
-    from io import BytesIO
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
@@ -27,16 +44,59 @@ except ImportError:
     DOCX_AVAILABLE = False
 
 
-@dataclass
-class CrawlResult:
-    """Data structure for crawl results"""
-    url: str
-    depth: int
-    content_type: str
-    metadata: Dict[str, Any]
-    extracted_text: str
-    links: List['CrawlResult']
-    error: Optional[str] = None
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Binary formats we can extract text from; other binary bodies are never downloaded
+BINARY_CONTENT_TYPES = ('application/pdf', DOCX_CONTENT_TYPE)
+
+
+def is_text_content_type(content_type: str) -> bool:
+    """Check whether a content type should be decoded to a string"""
+    return ('text/' in content_type or 'html' in content_type
+            or 'xml' in content_type or 'json' in content_type)
+
+
+class SpilledContent:
+    """Large binary response body spilled to a temporary file instead of being held in memory"""
+    
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def open(self):
+        """Open the spilled body for binary reading"""
+        return open(self.path, 'rb')
+    
+    def cleanup(self) -> None:
+        """Delete the temporary file"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def open_content(content: Union[bytes, SpilledContent]):
+    """Open raw content (in memory or spilled) as a binary file object"""
+    if isinstance(content, SpilledContent):
+        return content.open()
+    return BytesIO(content)
+
+
+def discard_content(content: Union[bytes, SpilledContent]) -> None:
+    """Release the temporary file behind spilled content, if any"""
+    if isinstance(content, SpilledContent):
+        content.cleanup()
+
+
+# Error set on frontier nodes dropped once the max_pages budget is used up
+PAGE_BUDGET_EXHAUSTED = "Page budget exhausted"
+
+# Block elements whose text is used as the surrounding context of a link
+LINK_CONTEXT_TAGS = ('p', 'li', 'td', 'dd', 'dt', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figcaption', 'blockquote')
+LINK_CONTEXT_CHARS = 300
 
 
 class WebCrawler:
@@ -45,13 +105,63 @@ class WebCrawler:
     Handles recursive crawling with depth limits and various content types.
     """
     
-    def __init__(self, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50):
+    def __init__(self, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50,
+                 max_concurrency: int = 10, per_host_concurrency: int = 2, per_host_delay: float = 0.5,
+                 cache: Optional[HttpCache] = None, near_duplicate_threshold: Optional[float] = 0.9,
+                 max_bytes: int = 25 * 1024 * 1024, spill_threshold: int = 2 * 1024 * 1024,
+                 extract_workers: int = 0, extract_queue_size: Optional[int] = None,
+                 visited_backend: Union[str, Any] = "exact", query: Optional[str] = None,
+                 max_pages: Optional[int] = None):
         self.max_depth = max_depth
         self.timeout = timeout
         self.max_links_per_page = max_links_per_page
-        self.visited_urls = set()
+        
+        # Visited URLs: "exact" (in-memory set), "bloom" (scalable Bloom filter),
+        # "disk" (SQLite) or a preconfigured backend instance
+        self.visited_urls = create_visited_set(visited_backend)
+        
+        # Crawled pages and the links between them
+        self.graph = CrawlGraph()
+        
+        # Politeness settings for the concurrent crawl mode
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        
+        # Extraction stage of the concurrent crawl mode: 0 workers = threads, >0 = process pool
+        self.extract_workers = extract_workers
+        self.extract_queue_size = extract_queue_size or 2 * max(extract_workers, max_concurrency)
+        
+        # Download limits: abort bodies over max_bytes, keep binaries over spill_threshold on disk
+        self.max_bytes = max_bytes
+        self.spill_threshold = spill_threshold
+        
+        # Optional persistent response cache shared across crawls
+        self.cache = cache
+        self.cache_stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+        self._stats_lock = threading.Lock()
+        
+        # Successful fetches: page count, body bytes and per-page latency in seconds
+        self.fetch_stats = {"pages": 0, "bytes": 0}
+        self.fetch_latencies: List[float] = []
+        
+        # Best-first mode: follow the links most relevant to `query` first, fetching at most max_pages
+        self.link_scorer = LinkScorer(query) if query else None
+        self.max_pages = max_pages
+        # Pages taken from the frontier for fetching, counted against max_pages
+        self._pages_started = 0
+        self._frontier_seq = itertools.count()
+        
+        # Content fingerprints for near-duplicate detection (None disables it)
+        self.near_duplicates = SimHashIndex(near_duplicate_threshold) if near_duplicate_threshold else None
+        
         self.session = requests.Session()
         
+        # Size the connection pool for concurrent fetches
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         # Configure session with headers
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -61,6 +171,12 @@ class WebCrawler:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
+    def close(self) -> None:
+        """Release the HTTP session and any resources held by the visited-set backend"""
+        self.session.close()
+        if hasattr(self.visited_urls, 'close'):
+            self.visited_urls.close()
+    
     def normalize_url(self, url: str) -> str:
         """Normalize URL by removing fragments and ensuring consistency"""
         parsed = urlparse(url)
@@ -95,59 +211,100 @@ class WebCrawler:
         except Exception:
             return False
     
-    def extract_text_from_html(self, html_content: str) -> tuple[str, Dict[str, Any]]:
-        """Extract text and metadata from HTML content"""
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
-            
-            # Extract metadata
-            metadata = {}
-            
-            # Title
-            title_tag = soup.find('title')
-            if title_tag:
-                metadata['title'] = title_tag.get_text().strip()
+    def _text_and_metadata_from_soup(self, soup: BeautifulSoup) -> tuple[str, Dict[str, Any]]:
+        """Extract cleaned text and metadata from a parsed HTML tree (strips script/style in place)"""
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.extract()
+        
+        # Extract metadata
+        metadata = {}
+        
+        # Title
+        title_tag = soup.find('title')
+        if title_tag:
+            metadata['title'] = title_tag.get_text().strip()
+        
+        # Description
+        desc_tag = soup.find('meta', attrs={'name': 'description'})
+        if desc_tag:
+            metadata['description'] = desc_tag.get('content', '').strip()
+        
+        # Keywords
+        keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
+        if keywords_tag:
+            keywords = keywords_tag.get('content', '').strip()
+            metadata['keywords'] = [k.strip() for k in keywords.split(',') if k.strip()]
+        
+        # Extract main text content
+        text = soup.get_text()
+        # Clean up whitespace
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        text = ' '.join(chunk for chunk in chunks if chunk)
+        
+        return text, metadata
+    
+    def _links_from_soup(self, soup: BeautifulSoup, base_url: str, link_context: bool = False) -> List[Any]:
+        """
+        Collect absolute link targets from a parsed HTML tree.
+        
+        With link_context, returns (url, description) pairs where the description holds
+        the anchor text, URL words and the text of the enclosing block, for link scoring.
+        """
+        links = []
+        
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            absolute_url = urljoin(base_url, href)
             
-            # Description
-            desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if desc_tag:
-                metadata['description'] = desc_tag.get('content', '').strip()
+            if not link_context:
+                links.append(absolute_url)
+                continue
             
-            # Keywords
-            keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
-            if keywords_tag:
-                keywords = keywords_tag.get('content', '').strip()
-                metadata['keywords'] = [k.strip() for k in keywords.split(',') if k.strip()]
+            anchor_text = ' '.join(filter(None, (link.get_text(' ', strip=True), link.get('title', ''))))
+            block = link.find_parent(LINK_CONTEXT_TAGS)
+            context = block.get_text(' ', strip=True)[:LINK_CONTEXT_CHARS] if block is not None else ""
+            links.append((absolute_url, describe_link(absolute_url, anchor_text, context)))
+        
+        return links
+    
+    def parse_html(self, html_content: str, base_url: str,
+                   link_context: bool = False) -> tuple[str, Dict[str, Any], List[Any]]:
+        """Parse HTML once and extract text, metadata and links from the same tree"""
+        try:
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            links = self._links_from_soup(soup, base_url, link_context)
+            text, metadata = self._text_and_metadata_from_soup(soup)
             
-            # Extract main text content
-            text = soup.get_text()
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            return text, metadata, links
             
-            return text, metadata
+        except Exception as e:
+            self.logger.error(f"Error parsing HTML: {e}")
+            return "", {}, []
+    
+    def extract_text_from_html(self, html_content: str) -> tuple[str, Dict[str, Any]]:
+        """Extract text and metadata from HTML content"""
+        try:
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            return self._text_and_metadata_from_soup(soup)
             
         except Exception as e:
             self.logger.error(f"Error extracting text from HTML: {e}")
             return "", {}
     
-    def extract_text_from_pdf(self, content: bytes) -> str:
+    def extract_text_from_pdf(self, content: Union[bytes, SpilledContent]) -> str:
         """Extract text from PDF content"""
         if not PDF_AVAILABLE:
             return "PDF processing not available - PyPDF2 not installed"
         
         try:
-            pdf_file = BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            with open_content(content) as pdf_file:
+                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                
+                text = ""
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             
             return text.strip()
             
@@ -155,14 +312,14 @@ class WebCrawler:
             self.logger.error(f"Error extracting text from PDF: {e}")
             return f"Error processing PDF: {str(e)}"
     
-    def extract_text_from_docx(self, content: bytes) -> str:
+    def extract_text_from_docx(self, content: Union[bytes, SpilledContent]) -> str:
         """Extract text from DOCX content"""
         if not DOCX_AVAILABLE:
             return "DOCX processing not available - python-docx not installed"
         
         try:
-            doc_file = BytesIO(content)
-            doc = Document(doc_file)
+            with open_content(content) as doc_file:
+                doc = Document(doc_file)
             
             text = ""
             for paragraph in doc.paragraphs:
@@ -177,53 +334,169 @@ class WebCrawler:
     def extract_links_from_html(self, html_content: str, base_url: str) -> List[str]:
         """Extract all links from HTML content"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            links = []
-            
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                absolute_url = urljoin(base_url, href)
-                links.append(absolute_url)
-            
-            return links
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            return self._links_from_soup(soup, base_url)
             
         except Exception as e:
             self.logger.error(f"Error extracting links: {e}")
             return []
     
-    def fetch_content(self, url: str) -> tuple[str, str, bytes]:
-        """Fetch content from URL and return content type, text content, and raw bytes"""
+    def get_fetch_stats(self) -> Dict[str, Any]:
+        """Summarize fetch counters with per-page latency percentiles in milliseconds"""
+        with self._stats_lock:
+            stats = dict(self.fetch_stats)
+            latencies = sorted(self.fetch_latencies)
+        
+        if latencies:
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+            
+            stats["latency_ms"] = {
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+                "max": round(latencies[-1] * 1000, 1)
+            }
+        
+        return stats
+    
+    def _count_cache(self, outcome: str, saved_bytes: int = 0) -> None:
+        """Record a cache hit/revalidation/miss (fetches run on worker threads)"""
+        with self._stats_lock:
+            self.cache_stats[outcome] += 1
+            self.cache_stats["bytes_saved"] += saved_bytes
+    
+    def _decode(self, content_type: str, body: bytes) -> str:
+        """Decode a body to text only for text content types"""
+        if is_text_content_type(content_type):
+            return body.decode('utf-8', errors='ignore')
+        return ""
+    
+    def _read_body(self, url: str, response: requests.Response, content_type: str) -> Union[bytes, SpilledContent]:
+        """Stream a response body, aborting past max_bytes and spilling large binaries to disk"""
+        declared_length = response.headers.get('content-length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > self.max_bytes:
+            raise ValueError(f"Response too large: {declared_length} bytes exceeds limit of {self.max_bytes}")
+        
+        spill = not is_text_content_type(content_type)
+        buffer = bytearray()
+        spill_file = None
+        size = 0
+        
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f"Response too large: more than {self.max_bytes} bytes")
+                
+                if spill_file is not None:
+                    spill_file.write(chunk)
+                    continue
+                
+                buffer.extend(chunk)
+                if spill and len(buffer) > self.spill_threshold:
+                    spill_file = tempfile.NamedTemporaryFile(prefix='crawl_', delete=False)
+                    spill_file.write(buffer)
+                    buffer = bytearray()
+        except BaseException:
+            if spill_file is not None:
+                spill_file.close()
+                os.remove(spill_file.name)
+            raise
+        finally:
+            response.close()
+        
+        if spill_file is not None:
+            spill_file.close()
+            self.logger.info(f"Spilled {size} bytes from {url} to {spill_file.name}")
+            return SpilledContent(spill_file.name, size)
+        
+        return bytes(buffer)
+    
+    def fetch_content(self, url: str) -> tuple[str, str, Union[bytes, SpilledContent]]:
+        """
+        Fetch content from URL and return content type, text content, and raw content.
+        
+        Text is only decoded for text content types. Bodies of unsupported binary
+        types are not downloaded, and large binary bodies are returned as
+        SpilledContent backed by a temporary file (see discard_content).
+        """
+        start = time.perf_counter()
+        result = self._fetch_content(url)
+        
+        with self._stats_lock:
+            self.fetch_stats["pages"] += 1
+            self.fetch_stats["bytes"] += len(result[2])
+            self.fetch_latencies.append(time.perf_counter() - start)
+        
+        return result
+    
+    def _fetch_content(self, url: str) -> tuple[str, str, Union[bytes, SpilledContent]]:
+        """Cache-aware, size-capped fetch behind fetch_content"""
         try:
-            response = self.session.get(url, timeout=self.timeout, stream=True)
-            response.raise_for_status()
+            cache_key = self.normalize_url(url)
+            entry = self.cache.get(cache_key) if self.cache else None
+            
+            # Fresh cache hit: no network round trip at all
+            if entry and self.cache.is_fresh(entry):
+                self._count_cache("hits", len(entry['body']))
+                return entry['content_type'], self._decode(entry['content_type'], entry['body']), entry['body']
+            
+            # Stale entry: revalidate with a conditional request
+            headers = self.cache.conditional_headers(entry) if entry else None
+            response = self.session.get(url, timeout=self.timeout, stream=True, headers=headers)
+            
+            if entry and response.status_code == 304:
+                response.close()
+                self.cache.refresh(cache_key, entry, response.headers)
+                self._count_cache("revalidated", len(entry['body']))
+                return entry['content_type'], self._decode(entry['content_type'], entry['body']), entry['body']
+            
+            try:
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+            
+            # Any body served from the network counts as a miss, stored or not (e.g. spilled to disk)
+            if self.cache:
+                self._count_cache("misses")
             
             content_type = response.headers.get('content-type', '').lower()
             
+            # Check the type before downloading anything we cannot use
+            if not is_text_content_type(content_type) and not any(t in content_type for t in BINARY_CONTENT_TYPES):
+                response.close()
+                return content_type, "", b""
+            
             # Read content
-            content_bytes = response.content
+            content = self._read_body(url, response, content_type)
             
-            return content_type, content_bytes.decode('utf-8', errors='ignore'), content_bytes
+            if self.cache and isinstance(content, bytes):
+                self.cache.set(cache_key, content_type, content, response.headers)
+            
+            return content_type, self._decode(content_type, content) if isinstance(content, bytes) else "", content
             
         except Exception as e:
             self.logger.error(f"Error fetching {url}: {e}")
             raise
     
-    def process_content(self, url: str, content_type: str, text_content: str, raw_content: bytes) -> tuple[str, Dict[str, Any], List[str]]:
-        """Process content based on its type and extract text, metadata, and links"""
+    def process_content(self, url: str, content_type: str, text_content: str, raw_content: Union[bytes, SpilledContent],
+                        link_context: bool = False) -> tuple[str, Dict[str, Any], List[Any]]:
+        """Process content based on its type and extract text, metadata, and links (see _links_from_soup)"""
         extracted_text = ""
         metadata = {}
         links = []
         
         try:
             if 'text/html' in content_type:
-                extracted_text, metadata = self.extract_text_from_html(text_content)
-                links = self.extract_links_from_html(text_content, url)
+                extracted_text, metadata, links = self.parse_html(text_content, url, link_context)
                 
             elif 'application/pdf' in content_type:
                 extracted_text = self.extract_text_from_pdf(raw_content)
                 metadata = {'title': f"PDF document from {url}"}
                 
-            elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type:
+            elif DOCX_CONTENT_TYPE in content_type:
                 extracted_text = self.extract_text_from_docx(raw_content)
                 metadata = {'title': f"DOCX document from {url}"}
                 
@@ -241,26 +514,51 @@ class WebCrawler:
         
         return extracted_text, metadata, links
     
-    def crawl_recursive(self, url: str, current_depth: int = 0, base_domain: str = None) -> CrawlResult:
-        """Recursively crawl URLs up to max_depth"""
+    def extract_page(self, url: str, content_type: str, text_content: str, raw_content: Union[bytes, SpilledContent],
+                     fingerprint: bool = False, link_context: bool = False) -> tuple[str, Dict[str, Any], List[Any], Optional[int]]:
+        """process_content plus the page's SimHash fingerprint, so both run off the event loop"""
+        extracted_text, metadata, links = self.process_content(url, content_type, text_content, raw_content, link_context)
+        return extracted_text, metadata, links, simhash(extracted_text) if fingerprint and extracted_text else None
+    
+    def find_near_duplicate(self, url: str, extracted_text: str, fingerprint: Optional[int] = None) -> Optional[str]:
+        """Return the URL of an already-crawled page with near-identical text, if any"""
+        if self.near_duplicates is None or not extracted_text:
+            return None
+        
+        if fingerprint is not None:
+            original = self.near_duplicates.check_fingerprint(fingerprint, url)
+        else:
+            original = self.near_duplicates.check(extracted_text, url)
+        if original:
+            self.logger.info(f"Near-duplicate of {original}: {url}")
+        return original
+    
+    def filter_links(self, found_links: List[str], base_domain: str) -> List[str]:
+        """Keep valid in-scope links, up to max_links_per_page"""
+        valid_links = []
+        for link in found_links:
+            if self.is_valid_url(link, base_domain):
+                valid_links.append(link)
+                if len(valid_links) >= self.max_links_per_page:
+                    break
+        return valid_links
+    
+    def crawl_recursive(self, url: str, current_depth: int = 0, base_domain: str = None,
+                        parent: Optional[CrawlResult] = None) -> Optional[CrawlResult]:
+        """Recursively crawl URLs up to max_depth, recording pages and links in self.graph"""
         
         # Normalize URL
         normalized_url = self.normalize_url(url)
         
-        # Check if already visited
+        # Already visited: the link becomes an edge to the existing page
         if normalized_url in self.visited_urls:
-            return CrawlResult(
-                url=normalized_url,
-                depth=current_depth,
-                content_type="",
-                metadata={},
-                extracted_text="Already visited",
-                links=[],
-                error="Already visited"
-            )
+            if parent is not None:
+                self.graph.add_edge(parent, normalized_url)
+            return self.graph.get(normalized_url)
         
         # Mark as visited
         self.visited_urls.add(normalized_url)
+        result = self.graph.add_page(CrawlResult(url=normalized_url, depth=current_depth), parent)
         
         try:
             self.logger.info(f"Crawling depth {current_depth}: {normalized_url}")
@@ -269,19 +567,23 @@ class WebCrawler:
             content_type, text_content, raw_content = self.fetch_content(normalized_url)
             
             # Process content
-            extracted_text, metadata, found_links = self.process_content(
-                normalized_url, content_type, text_content, raw_content
-            )
-            
-            # Initialize result
-            result = CrawlResult(
-                url=normalized_url,
-                depth=current_depth,
-                content_type=content_type,
-                metadata=metadata,
-                extracted_text=extracted_text,
-                links=[]
-            )
+            try:
+                extracted_text, metadata, found_links = self.process_content(
+                    normalized_url, content_type, text_content, raw_content
+                )
+            finally:
+                discard_content(raw_content)
+            
+            result.content_type = content_type
+            result.metadata = metadata
+            
+            # Near-duplicates keep no text and are not expanded
+            duplicate_of = self.find_near_duplicate(normalized_url, extracted_text)
+            if duplicate_of:
+                result.duplicate_of = duplicate_of
+                return result
+            
+            result.extracted_text = extracted_text
             
             # Recursively crawl links if we haven't reached max depth
             if current_depth < self.max_depth and found_links:
@@ -291,51 +593,485 @@ class WebCrawler:
                     base_domain = urlparse(normalized_url).netloc
                 
                 # Filter and limit links
-                valid_links = []
-                for link in found_links:
-                    if self.is_valid_url(link, base_domain):
-                        valid_links.append(link)
-                        if len(valid_links) >= self.max_links_per_page:
-                            break
+                valid_links = self.filter_links(found_links, base_domain)
                 
                 # Crawl each valid link
                 for link in valid_links:
                     try:
-                        link_result = self.crawl_recursive(link, current_depth + 1, base_domain)
-                        result.links.append(link_result)
+                        self.crawl_recursive(link, current_depth + 1, base_domain, result)
                         
                         # Add small delay to be respectful
                         time.sleep(0.5)
                         
                     except Exception as e:
                         self.logger.error(f"Error crawling link {link}: {e}")
-                        error_result = CrawlResult(
-                            url=link,
-                            depth=current_depth + 1,
-                            content_type="",
-                            metadata={},
-                            extracted_text="",
-                            links=[],
-                            error=str(e)
-                        )
-                        result.links.append(error_result)
+                        self.graph.add_page(CrawlResult(url=link, depth=current_depth + 1, error=str(e)), result)
             
             return result
             
         except Exception as e:
             self.logger.error(f"Error crawling {normalized_url}: {e}")
-            return CrawlResult(
-                url=normalized_url,
-                depth=current_depth,
-                content_type="",
-                metadata={},
-                extracted_text="",
-                links=[],
-                error=str(e)
-            )
-
-
-def crawl_website(start_url: str, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50) -> Dict[str, Any]:
+            result.error = str(e)
+            return result
+    
+    async def crawl_async(self, url: str, on_page: Optional[Callable[[CrawlResult, Optional[str]], Awaitable[None]]] = None,
+                          build_tree: bool = True, checkpoint: Optional[CrawlCheckpoint] = None) -> CrawlGraph:
+        """
+        Crawl breadth-first with a bounded number of concurrent, per-host-polite fetches.
+        
+        Fetching and extraction run as separate stages joined by a bounded queue, so
+        network I/O overlaps with parsing. With extract_workers > 0, extraction runs
+        in a process pool and can use all cores.
+        
+        When the crawler has a query the crawl is best-first instead: the frontier is a
+        priority queue ordered by the relevance of each link to the query, and only the
+        max_links_per_page most relevant new links of a page are queued. At most
+        max_pages pages are fetched; the graph then holds only fetched pages.
+        
+        Args:
+            url: The URL to start crawling from
+            on_page: Optional coroutine called with (page, parent_url) as soon as each page is processed
+            build_tree: Record pages and links in self.graph; disable when pages are consumed
+                through on_page so finished pages can be released immediately
+            checkpoint: Persist the frontier, visited set and finished pages so the crawl
+                can resume; an existing checkpoint continues from where it stopped
+        
+        Returns:
+            The crawl graph (empty when build_tree is False). With a checkpoint the
+            full graph is rebuilt from the stored pages.
+        
+        An exception from on_page or a checkpoint write stops all workers and is
+        re-raised; the checkpoint then stays resumable.
+        """
+        if checkpoint is not None and (self.link_scorer is not None or self.max_pages is not None):
+            raise ValueError("Checkpointed crawls do not support a query or a max_pages budget")
+        
+        normalized_url = self.normalize_url(url)
+        base_domain = urlparse(normalized_url).netloc
+        
+        graph = self.graph if build_tree else None
+        root = CrawlResult(url=normalized_url, depth=0)
+        
+        # Queue of (priority, seq, result node, parent URL) still to be fetched: FIFO (BFS
+        # order), or lowest priority first in best-first mode. An entry is only marked done
+        # once its page has been fully extracted.
+        frontier: asyncio.Queue = asyncio.PriorityQueue() if self.link_scorer is not None else asyncio.Queue()
+        self._pages_started = 0
+        
+        if checkpoint is not None and checkpoint.load() is not None:
+            self._restore_checkpoint(checkpoint, frontier)
+        else:
+            if checkpoint is not None:
+                checkpoint.start(normalized_url, self.max_depth)
+            self.visited_urls.add(normalized_url)
+            if graph is not None:
+                graph.add_page(root)
+            self._enqueue(frontier, root, None)
+        
+        # Fetched pages waiting for extraction; bounded so fetching cannot run far ahead
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self.extract_queue_size)
+        throttles: Dict[str, HostThrottle] = {}
+        
+        pool = ProcessPoolExecutor(max_workers=self.extract_workers) if self.extract_workers > 0 else None
+        
+        # Best-first: a page is only taken from the frontier once a previous one is fully
+        # extracted, so fetching cannot run ahead on stale, lower-priority links
+        in_flight = asyncio.Semaphore(self.max_concurrency) if self.link_scorer is not None else None
+        
+        async def finish(node, parent_url, children=(), revisits=()):
+            try:
+                if checkpoint is not None:
+                    self._checkpoint_page(checkpoint, node, parent_url, children, revisits)
+                if on_page is not None:
+                    await on_page(node, parent_url)
+            finally:
+                if in_flight is not None:
+                    in_flight.release()
+                frontier.task_done()
+        
+        async def fetch_worker():
+            while True:
+                if in_flight is not None:
+                    await in_flight.acquire()
+                _, _, node, parent_url = await frontier.get()
+                
+                # Budget used up: drain the remaining frontier without fetching
+                if self.max_pages is not None and self._pages_started >= self.max_pages:
+                    node.error = PAGE_BUDGET_EXHAUSTED
+                    if in_flight is not None:
+                        in_flight.release()
+                    frontier.task_done()
+                    continue
+                self._pages_started += 1
+                
+                try:
+                    content = await self._fetch_node_async(node, throttles)
+                except BaseException:
+                    frontier.task_done()
+                    raise
+                
+                if content is None:
+                    await finish(node, parent_url)
+                    continue
+                try:
+                    await fetched.put((node, parent_url, content))
+                except BaseException:
+                    discard_content(content[2])
+                    frontier.task_done()
+                    raise
+        
+        async def extract_worker():
+            while True:
+                node, parent_url, content = await fetched.get()
+                try:
+                    children, revisits = await self._extract_node_async(node, content, base_domain, frontier, graph, pool)
+                except BaseException:
+                    # Cancelled (e.g. the consumer stopped) or failed: the page is not reported,
+                    # since on_page may wait on a consumer that is gone
+                    frontier.task_done()
+                    raise
+                await finish(node, parent_url, children, revisits)
+        
+        workers = [asyncio.create_task(fetch_worker()) for _ in range(self.max_concurrency)]
+        workers += [asyncio.create_task(extract_worker()) for _ in range(self.extract_workers or self.max_concurrency)]
+        crawl_done = asyncio.create_task(frontier.join())
+        try:
+            # Workers only return by raising (e.g. from on_page or a checkpoint write);
+            # waiting on them too keeps a dead worker from hanging the join
+            done, _ = await asyncio.wait([crawl_done, *workers], return_when=asyncio.FIRST_COMPLETED)
+            failed = next((task for task in done if task is not crawl_done), None)
+            if failed is not None:
+                error = failed.exception()
+                self.logger.error(f"Crawl of {normalized_url} aborted: {error!r}")
+                raise error
+        finally:
+            crawl_done.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Stopped early (cancelled or failed): drop fetched bodies nobody will extract
+            while not fetched.empty():
+                _, _, (_, _, raw_content) = fetched.get_nowait()
+                discard_content(raw_content)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        if checkpoint is not None:
+            checkpoint.mark_completed()
+            return crawl_graph_from_checkpoint(checkpoint)
+        
+        if graph is None:
+            return CrawlGraph()
+        
+        if self.max_pages is not None:
+            graph.remove_pages(lambda page: page.error == PAGE_BUDGET_EXHAUSTED)
+        
+        return graph
+    
+    def _enqueue(self, frontier: asyncio.Queue, node: CrawlResult, parent_url: Optional[str],
+                 score: float = 0.0) -> None:
+        """Add a node to the frontier; in best-first mode higher scores are fetched first"""
+        frontier.put_nowait((-score, next(self._frontier_seq), node, parent_url))
+    
+    def _restore_checkpoint(self, checkpoint: CrawlCheckpoint, frontier: asyncio.Queue) -> None:
+        """Reload the visited set, near-duplicate index and pending frontier of an interrupted crawl"""
+        self.visited_urls.update(checkpoint.visited_urls())
+        
+        if self.near_duplicates is not None:
+            for url, _, _, status, record in checkpoint.nodes():
+                if status == CHECKPOINT_DONE and record and record.get("text"):
+                    self.near_duplicates.check(record["text"], url)
+        
+        pending = checkpoint.pending()
+        self.logger.info(f"Resuming crawl {checkpoint.crawl_id} with {len(pending)} pending URLs")
+        
+        for url, parent_url, depth in pending:
+            self._enqueue(frontier, CrawlResult(url=url, depth=depth), parent_url)
+    
+    def _checkpoint_page(self, checkpoint: CrawlCheckpoint, node: CrawlResult, parent_url: Optional[str],
+                         children: List[CrawlResult], revisits: List[str]) -> None:
+        """Commit a finished page and the links it queued in one transaction"""
+        checkpoint.complete(
+            node.url,
+            page_record(node, parent_url),
+            [(child.url, node.url, child.depth) for child in children],
+            [(url, node.url, node.depth + 1) for url in revisits]
+        )
+    
+    async def _fetch_node_async(self, node: CrawlResult, throttles: Dict[str, 'HostThrottle']) -> Optional[tuple]:
+        """Fetch stage: download one frontier node, returning its content or None on error"""
+        host = urlparse(node.url).netloc
+        throttle = throttles.get(host)
+        if throttle is None:
+            throttle = throttles[host] = HostThrottle(self.per_host_concurrency, self.per_host_delay)
+        
+        try:
+            self.logger.info(f"Crawling depth {node.depth}: {node.url}")
+            
+            # Blocking network I/O runs off the event loop
+            async with throttle:
+                return await self._fetch_in_thread(node.url)
+        except Exception as e:
+            self.logger.error(f"Error crawling {node.url}: {e}")
+            node.error = str(e)
+            return None
+    
+    async def _fetch_in_thread(self, url: str) -> tuple:
+        """fetch_content on a worker thread; if the caller is cancelled, the body is discarded whenever it arrives"""
+        lock = threading.Lock()
+        handoff: Dict[str, Any] = {}
+        
+        def fetch():
+            result = self.fetch_content(url)
+            with lock:
+                if handoff.get("abandoned"):
+                    discard_content(result[2])
+                else:
+                    handoff["result"] = result
+            return result
+        
+        try:
+            return await asyncio.to_thread(fetch)
+        except asyncio.CancelledError:
+            with lock:
+                handoff["abandoned"] = True
+                if "result" in handoff:
+                    discard_content(handoff["result"][2])
+            raise
+    
+    async def _extract_node_async(self, node: CrawlResult, content: tuple, base_domain: str, frontier: asyncio.Queue,
+                                  graph: Optional[CrawlGraph] = None,
+                                  pool: Optional[ProcessPoolExecutor] = None) -> tuple[List[CrawlResult], List[str]]:
+        """
+        Extraction stage: process a fetched node in place, then enqueue its unvisited links.
+        
+        Returns the child pages queued from this page and the URLs of its links to
+        already visited pages; both are recorded as edges when a graph is given.
+        """
+        content_type, text_content, raw_content = content
+        fingerprint = self.near_duplicates is not None
+        link_context = self.link_scorer is not None
+        
+        try:
+            if pool is not None:
+                loop = asyncio.get_running_loop()
+                extracted_text, metadata, found_links, page_fingerprint = await loop.run_in_executor(
+                    pool, extract_content, node.url, content_type, text_content, raw_content, fingerprint, link_context
+                )
+            else:
+                extracted_text, metadata, found_links, page_fingerprint = await asyncio.to_thread(
+                    self.extract_page, node.url, content_type, text_content, raw_content, fingerprint, link_context
+                )
+        except Exception as e:
+            self.logger.error(f"Error crawling {node.url}: {e}")
+            node.error = str(e)
+            return [], []
+        finally:
+            discard_content(raw_content)
+        
+        node.content_type = content_type
+        node.metadata = metadata
+        
+        # Near-duplicates keep no text and are not expanded
+        duplicate_of = self.find_near_duplicate(node.url, extracted_text, page_fingerprint)
+        if duplicate_of:
+            node.duplicate_of = duplicate_of
+            return [], []
+        
+        node.extracted_text = extracted_text
+        
+        if node.depth >= self.max_depth or not found_links:
+            return [], []
+        
+        if self.link_scorer is not None:
+            children = await self._select_relevant_links(node, found_links, base_domain, frontier, graph)
+            return children, []
+        
+        children, revisits = [], []
+        for link in self.filter_links(found_links, base_domain):
+            normalized_link = self.normalize_url(link)
+            
+            # Links to visited pages are edges, not new nodes
+            if normalized_link in self.visited_urls:
+                revisits.append(normalized_link)
+                if graph is not None:
+                    graph.add_edge(node, normalized_link)
+                continue
+            
+            self.visited_urls.add(normalized_link)
+            child = CrawlResult(url=normalized_link, depth=node.depth + 1)
+            if graph is not None:
+                graph.add_page(child, node)
+            children.append(child)
+            self._enqueue(frontier, child, node.url)
+        
+        return children, revisits
+    
+    async def _select_relevant_links(self, node: CrawlResult, found_links: List[tuple], base_domain: str,
+                                     frontier: asyncio.Queue, graph: Optional[CrawlGraph] = None) -> List[CrawlResult]:
+        """Best-first link selection: score a page's unvisited links in one batch and queue the best ones"""
+        # Same counter as the fetch cut-off: no new links once the budget is taken
+        if self.max_pages is not None and self._pages_started >= self.max_pages:
+            return []
+        
+        # One description per unvisited in-scope URL, merging repeated links to the same target
+        descriptions: Dict[str, str] = {}
+        for link, description in found_links:
+            if not self.is_valid_url(link, base_domain):
+                continue
+            normalized_link = self.normalize_url(link)
+            if normalized_link in self.visited_urls:
+                continue
+            if normalized_link in descriptions:
+                descriptions[normalized_link] += ' ' + description
+            else:
+                descriptions[normalized_link] = description
+        
+        if not descriptions:
+            return []
+        
+        # Embedding the batch runs off the event loop
+        urls = list(descriptions)
+        scores = await asyncio.to_thread(self.link_scorer.score, [descriptions[u] for u in urls])
+        ranked = sorted(zip(scores, urls), key=lambda pair: pair[0], reverse=True)
+        
+        children = []
+        for score, link in ranked[:self.max_links_per_page]:
+            self.visited_urls.add(link)
+            child = CrawlResult(url=link, depth=node.depth + 1, score=round(score, 4))
+            if graph is not None:
+                graph.add_page(child, node)
+            children.append(child)
+            self._enqueue(frontier, child, node.url, score)
+        
+        return children
+
+
+# Per-process extractor used by the extraction process pool
+_process_extractor: Optional[WebCrawler] = None
+
+
+def extract_content(url: str, content_type: str, text_content: str, raw_content: Union[bytes, SpilledContent],
+                    fingerprint: bool = False, link_context: bool = False) -> tuple[str, Dict[str, Any], List[Any], Optional[int]]:
+    """Picklable entry point running WebCrawler.extract_page inside a pool worker process"""
+    global _process_extractor
+    if _process_extractor is None:
+        _process_extractor = WebCrawler(near_duplicate_threshold=None)
+    return _process_extractor.extract_page(url, content_type, text_content, raw_content, fingerprint, link_context)
+
+
+class HostThrottle:
+    """Per-host concurrency and minimum request spacing for the concurrent crawl mode"""
+    
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self.next_request_at = 0.0
+        self.lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            # Space out request starts to the same host by at least `delay` seconds
+            async with self.lock:
+                loop = asyncio.get_running_loop()
+                wait = self.next_request_at - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.next_request_at = loop.time() + self.delay
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+# Shapes of the "data" field in crawl responses
+CRAWL_LAYOUTS = ("nested", "flat")
+
+
+def convert_crawl_result(graph: CrawlGraph, layout: str = "nested") -> Optional[Dict[str, Any]]:
+    """Convert a crawl graph to the nested JSON tree or the flat page table + edge list"""
+    if layout == "nested":
+        return graph_to_nested(graph)
+    if layout == "flat":
+        return graph_to_flat(graph)
+    raise ValueError(f"Unknown crawl layout: {layout}. Must be one of: {', '.join(CRAWL_LAYOUTS)}")
+
+
+def new_crawl_id(start_url: str) -> str:
+    """Generate a unique crawl ID"""
+    return f"crawl_{int(time.time())}_{hashlib.md5(start_url.encode()).hexdigest()[:8]}"
+
+
+def crawl_graph_from_checkpoint(checkpoint: CrawlCheckpoint) -> CrawlGraph:
+    """Rebuild the crawl graph from the pages stored in a checkpoint"""
+    graph = CrawlGraph()
+    
+    # Nodes come in discovery order, so a parent always precedes its children
+    for url, parent_url, depth, status, record in checkpoint.nodes():
+        parent = graph.get(parent_url) if parent_url is not None else None
+        
+        if status == CHECKPOINT_STUB:
+            if parent is not None:
+                graph.add_edge(parent, url)
+            continue
+        
+        record = record or {}
+        graph.add_page(CrawlResult(
+            url=url,
+            depth=depth,
+            content_type=record.get("content_type", ""),
+            metadata=record.get("metadata", {}),
+            extracted_text=record.get("text", ""),
+            error=record.get("error"),
+            duplicate_of=record.get("duplicate_of")
+        ), parent)
+    
+    return graph
+
+
+def build_crawl_response(start_url: str, max_depth: int, graph: CrawlGraph, crawler: Optional[WebCrawler] = None,
+                         crawl_id: Optional[str] = None, layout: str = "nested") -> Dict[str, Any]:
+    """Wrap a crawl graph in the response envelope returned by crawl_website"""
+    response = {
+        "crawl_id": crawl_id or new_crawl_id(start_url),
+        "start_url": start_url,
+        "crawl_timestamp": datetime.utcnow().isoformat() + "Z",
+        "max_depth": max_depth,
+        "data": convert_crawl_result(graph, layout)
+    }
+    
+    if crawler is not None:
+        response["fetch_stats"] = crawler.get_fetch_stats()
+        
+        if crawler.cache is not None:
+            response["cache_stats"] = dict(crawler.cache_stats)
+    
+    return response
+
+
+def create_crawler(max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50,
+                   use_cache: bool = False, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, **crawler_options) -> WebCrawler:
+    """Build a WebCrawler, attaching the shared on-disk response cache when enabled"""
+    cache = get_http_cache(cache_dir) if use_cache else None
+    return WebCrawler(
+        max_depth=max_depth,
+        timeout=timeout,
+        max_links_per_page=max_links_per_page,
+        cache=cache,
+        **crawler_options
+    )
+
+
+def crawl_website(start_url: str, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50,
+                  concurrent: bool = False, use_cache: bool = False, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                  checkpoint: bool = False, resume: Optional[str] = None,
+                  checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH, query: Optional[str] = None,
+                  max_pages: Optional[int] = None, layout: str = "nested", crawl_id: Optional[str] = None,
+                  **crawler_options) -> Dict[str, Any]:
     """
     Main function to crawl a website and return structured data.
     
@@ -344,63 +1080,240 @@ def crawl_website(start_url: str, max_depth: int = 2, timeout: int = 30, max_lin
         max_depth: Maximum recursion depth (0 = only start URL, 1 = start + direct links, etc.)
         timeout: Request timeout in seconds
         max_links_per_page: Maximum number of links to follow per page
+        concurrent: Use the breadth-first asyncio crawl engine instead of sequential recursion
+        use_cache: Serve and revalidate responses through the persistent HTTP cache;
+            off by default, since it writes response bodies to cache_dir on disk
+        cache_dir: Directory of the persistent HTTP cache (default: $HTTP_CACHE_DIR or
+            ./http_cache, resolved when the cache is first built)
+        checkpoint: Persist crawl progress to SQLite so it can be resumed (implies concurrent)
+        resume: crawl_id of a checkpointed crawl to continue; its stored start URL and
+            depth are used and completed pages are not fetched again
+        checkpoint_path: SQLite file holding checkpointed crawls (default: $CRAWL_CHECKPOINT_PATH
+            or ./crawl_checkpoints.sqlite3, resolved when the crawl starts)
+        crawl_id: ID for a new checkpointed crawl, so the caller can resume it after a
+            crash (default: generated); see CrawlCheckpoint.unfinished_crawls
+        query: Crawl best-first, following the links most relevant to this query first
+            (implies concurrent); pages carry the "relevance" score of the link that led to them
+        max_pages: Total number of pages to fetch (implies concurrent)
+        layout: "nested" for the page tree (links to visited pages as "Already visited"
+            stubs), "flat" for {"pages": [...], "edges": [[parent_id, child_id], ...]}
+        **crawler_options: Further WebCrawler settings, e.g. max_concurrency,
+            per_host_concurrency and per_host_delay for the concurrent engine, or
+            near_duplicate_threshold (SimHash similarity, None to disable), or
+            extract_workers (size of the extraction process pool, 0 = threads), or
+            visited_backend ("exact", "bloom" or "disk") for very large crawls
     
     Returns:
-        Structured crawl data as specified in the requirements
+        Structured crawl data as specified in the requirements; checkpointed crawls
+        include their "crawl_id"
     """
+    if query or max_pages is not None:
+        crawler_options.update(query=query, max_pages=max_pages)
+        concurrent = True
     
-    # Generate unique crawl ID
-    crawl_id = f"crawl_{int(time.time())}_{hashlib.md5(start_url.encode()).hexdigest()[:8]}"
+    if concurrent or checkpoint or resume:
+        return asyncio.run(crawl_website_async(
+            start_url, max_depth=max_depth, timeout=timeout, max_links_per_page=max_links_per_page,
+            use_cache=use_cache, cache_dir=cache_dir, checkpoint=checkpoint, resume=resume,
+            checkpoint_path=checkpoint_path, layout=layout, crawl_id=crawl_id, **crawler_options
+        ))
     
     # Initialize crawler
-    crawler = WebCrawler(max_depth=max_depth, timeout=timeout, max_links_per_page=max_links_per_page)
+    crawler = create_crawler(max_depth, timeout, max_links_per_page, use_cache, cache_dir, **crawler_options)
     
     # Start crawling
-    crawl_result = crawler.crawl_recursive(start_url)
-    
-    # Convert to the specified format
-    def convert_crawl_result(result: CrawlResult) -> Dict[str, Any]:
-        """Convert CrawlResult to the specified JSON format"""
-        converted = {
-            "url": result.url,
-            "depth": result.depth,
-            "content_type": result.content_type,
-            "metadata": result.metadata,
-            "extracted_text": result.extracted_text,
-            "links": [convert_crawl_result(link) for link in result.links]
-        }
+    try:
+        crawler.crawl_recursive(start_url)
+    finally:
+        crawler.close()
+    
+    return build_crawl_response(start_url, max_depth, crawler.graph, crawler, layout=layout)
+
+
+async def crawl_website_async(start_url: str, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50,
+                              use_cache: bool = False, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                              checkpoint: bool = False, resume: Optional[str] = None,
+                              checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH, layout: str = "nested",
+                              crawl_id: Optional[str] = None, **crawler_options) -> Dict[str, Any]:
+    """
+    Concurrent variant of crawl_website for callers already running an event loop.
+    
+    query and max_pages are passed as crawler_options. Returns the same structure as crawl_website.
+    """
+    if crawl_id and resume and crawl_id != resume:
+        raise ValueError("Pass either crawl_id for a new crawl or resume for an existing one")
+    if not (checkpoint or resume):
+        crawler = create_crawler(max_depth, timeout, max_links_per_page, use_cache, cache_dir, **crawler_options)
+        try:
+            graph = await crawler.crawl_async(start_url)
+        finally:
+            crawler.close()
+        return build_crawl_response(start_url, max_depth, graph, crawler, layout=layout)
+    
+    crawl_id = resume or crawl_id or new_crawl_id(start_url)
+    state = CrawlCheckpoint(crawl_id, checkpoint_path)
+    try:
+        stored = state.load()
+        if resume and stored is None:
+            raise ValueError(f"No checkpointed crawl found for crawl_id {resume}")
         
-        if result.error:
-            converted["error"] = result.error
-            
-        return converted
+        if stored is not None:
+            start_url, max_depth = stored["start_url"], stored["max_depth"]
+        
+        crawler = create_crawler(max_depth, timeout, max_links_per_page, use_cache, cache_dir, **crawler_options)
+        crawler.logger.info(f"Checkpointing crawl {crawl_id} to {state.path}")
+        
+        try:
+            if stored is not None and stored["completed"]:
+                graph = crawl_graph_from_checkpoint(state)
+            else:
+                graph = await crawler.crawl_async(start_url, build_tree=False, checkpoint=state)
+        finally:
+            crawler.close()
+    finally:
+        state.close()
     
-    # Build final response
-    response = {
-        "crawl_id": crawl_id,
-        "start_url": start_url,
-        "crawl_timestamp": datetime.utcnow().isoformat() + "Z",
-        "max_depth": max_depth,
-        "data": convert_crawl_result(crawl_result)
+    return build_crawl_response(start_url, max_depth, graph, crawler, crawl_id, layout)
+
+
+def page_record(page: CrawlResult, parent_url: Optional[str]) -> Dict[str, Any]:
+    """Convert a single crawled page to a flat streaming record"""
+    record = {
+        "url": page.url,
+        "parent": parent_url,
+        "depth": page.depth,
+        "content_type": page.content_type,
+        "metadata": page.metadata,
+        "text": page.extracted_text
     }
     
-    return response
+    if page.error:
+        record["error"] = page.error
+    
+    if page.duplicate_of:
+        record["duplicate_of"] = page.duplicate_of
+    
+    if page.score is not None:
+        record["relevance"] = page.score
+        
+    return record
+
+
+async def iter_crawl_pages_async(start_url: str, max_depth: int = 2, timeout: int = 30, max_links_per_page: int = 50,
+                                 use_cache: bool = False, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                                 buffer_size: Optional[int] = None, **crawler_options) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Crawl a website and yield one flat page record as soon as each page is fetched.
+    
+    No result tree is kept: memory is bounded by the in-flight pages plus at most
+    `buffer_size` (default: max_concurrency) records waiting for the consumer.
+    Other keyword arguments are the same as for crawl_website.
+    
+    Yields:
+        Dicts with url, parent, depth, content_type, metadata, text (and error on failure)
+    """
+    crawler = create_crawler(max_depth, timeout, max_links_per_page, use_cache, cache_dir, **crawler_options)
+    pages: asyncio.Queue = asyncio.Queue(maxsize=buffer_size or crawler.max_concurrency)
+    finished = object()
+    
+    async def on_page(page: CrawlResult, parent_url: Optional[str]):
+        # Blocks the worker while the consumer is behind (backpressure)
+        await pages.put(page_record(page, parent_url))
+    
+    async def run():
+        try:
+            await crawler.crawl_async(start_url, on_page=on_page, build_tree=False)
+        except asyncio.CancelledError:
+            # Only an early-stopping consumer cancels the crawl; it no longer reads the queue
+            raise
+        except BaseException:
+            await pages.put(finished)
+            raise
+        await pages.put(finished)
+    
+    crawl_task = asyncio.create_task(run())
+    try:
+        while True:
+            record = await pages.get()
+            if record is finished:
+                break
+            yield record
+        
+        # Surface crawl failures to the consumer
+        await crawl_task
+    finally:
+        if not crawl_task.done():
+            crawl_task.cancel()
+            await asyncio.gather(crawl_task, return_exceptions=True)
+        crawler.close()
+
+
+def iter_crawl_pages(start_url: str, **kwargs) -> Iterator[Dict[str, Any]]:
+    """
+    Synchronous wrapper around iter_crawl_pages_async for batch jobs.
+    
+    Accepts the same keyword arguments. The crawl only advances while the
+    caller consumes records, so a slow consumer throttles fetching.
+    """
+    loop = asyncio.new_event_loop()
+    pages = iter_crawl_pages_async(start_url, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(pages.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(pages.aclose())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+def write_crawl_ndjson(start_url: str, out: TextIO, **kwargs) -> int:
+    """
+    Crawl a website and write each page to `out` as one NDJSON line as soon as it is fetched.
+    
+    Returns:
+        Number of page records written
+    """
+    count = 0
+    for record in iter_crawl_pages(start_url, **kwargs):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        count += 1
+    return count
 
 
 # Tool function for agent calling
-def web_crawling_tool(url: str, max_depth: int = 2) -> str:
+def web_crawling_tool(url: str, max_depth: int = 2, output_format: str = "json",
+                      query: Optional[str] = None, max_pages: int = 30) -> str:
     """
     Web crawling tool for agent use.
     
     Args:
         url: The URL to crawl
         max_depth: Maximum depth for recursive crawling (default: 2)
+        output_format: "json" for the nested crawl document, "flat" for a page table plus
+            edge list, "ndjson" for one flat page record per line
+        query: Optional topic; the crawl then follows the most relevant links first
+        max_pages: Page budget of a query-guided crawl (default: 30)
     
     Returns:
-        JSON string with crawl results
+        JSON (or NDJSON) string with crawl results
     """
     try:
-        result = crawl_website(url, max_depth=max_depth)
+        # Agents revisit the same sites, so their crawls share the on-disk HTTP cache
+        options = {"use_cache": True}
+        if query:
+            options.update(query=query, max_pages=max_pages)
+        
+        if output_format == "ndjson":
+            buffer = StringIO()
+            write_crawl_ndjson(url, buffer, max_depth=max_depth, **options)
+            return buffer.getvalue()
+        
+        layout = "flat" if output_format == "flat" else "nested"
+        result = crawl_website(url, max_depth=max_depth, layout=layout, **options)
         return json.dumps(result, indent=2)
     except Exception as e:
         error_result = {